@@ -0,0 +1,418 @@
+"""
+Benchmark the coreference resolver on the NAF files bundled with the tests.
+
+Every pipeline stage is timed (using `multisieve_coreference.profiling`) and
+the peak memory use per document is measured. Results are written as JSON,
+and can be compared to an earlier run to flag regressions:
+
+    $ python benchmarks/benchmark.py --save baseline.json
+    ... change some code ...
+    $ python benchmarks/benchmark.py --compare baseline.json
+
+The comparison exits with status 1 if any stage got slower, any benchmark used
+more memory or any stage did more comparisons than the tolerance allows.
+
+To see how the resolver scales, synthetic documents of a given number of terms
+can be added (see `generate_naf.py`):
+
+    $ python benchmarks/benchmark.py --synthetic 1000 10000 100000
+
+Peak memory is measured twice: as the peak resident set size of a fresh
+process (including the interpreter and lxml) and as the peak memory traced by
+`tracemalloc` (Python objects only).
+"""
+from __future__ import print_function, division
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+import subprocess
+from argparse import ArgumentParser
+from collections import OrderedDict
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from KafNafParserPy import KafNafParser
+
+from multisieve_coreference.resolve_coreference import process_coreference
+from multisieve_coreference.profiling import Profiler
+
+from generate_naf import generate_naf, write_naf
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+RESOURCES = os.path.abspath(os.path.join(
+    os.path.dirname(__file__),
+    os.pardir,
+    'tests',
+    'resources'
+))
+
+
+def get_benchmarks():
+    '''
+    Get the benchmarks to run
+
+    :return:    ordered dictionary of {benchmark name: list of NAF files}
+    '''
+    easy = os.path.join(RESOURCES, 'easy-sentences', 'NAFin')
+    return OrderedDict([
+        ('example', [os.path.join(RESOURCES, 'example-in.naf')]),
+        ('easy-sentences', [
+            os.path.join(easy, name) for name in sorted(os.listdir(easy))
+        ]),
+        ('sonar-dpc-cam-001280', [
+            os.path.join(RESOURCES, 'SoNaR-dpc-cam-001280-nl-sen-in.naf')
+        ]),
+        ('sonar-dpc-bal-001236', [
+            os.path.join(RESOURCES, 'SoNaR-dpc-bal-001236-nl-sen-in.naf')
+        ]),
+        ('sonar-WR-P-E-C-0000000021', [
+            os.path.join(RESOURCES, 'SoNaR-WR-P-E-C-0000000021-in.naf')
+        ]),
+    ])
+
+
+def get_synthetic_benchmarks(sizes, directory, seed=0):
+    '''
+    Generate synthetic documents for scaling benchmarks
+
+    :param sizes:       numbers of terms
+    :param directory:   directory to write the documents to
+    :return:            ordered dictionary of {benchmark name: list of NAF
+                        files}
+    '''
+    benchmarks = OrderedDict()
+    for size in sizes:
+        filename = os.path.join(directory, 'synthetic-{}.naf'.format(size))
+        write_naf(generate_naf(terms=size, seed=seed), filename)
+        benchmarks['synthetic-{}'.format(size)] = [filename]
+    return benchmarks
+
+
+def count_terms(filenames):
+    return sum(
+        len(list(KafNafParser(filename).get_terms()))
+        for filename in filenames
+    )
+
+
+def profile_file(filename, profiler):
+    '''
+    Run the whole pipeline on one file, including reading and writing NAF
+    '''
+    with profiler.stage('read_naf'):
+        nafobj = KafNafParser(filename)
+    process_coreference(nafobj, profiler=profiler)
+    with profiler.stage('dump'):
+        with open(os.devnull, 'wb') as out:
+            nafobj.dump(out)
+
+
+def sum_stages(profile, into):
+    '''
+    Add the stages of `profile` (a `Profiler.as_dict`) to `into`
+    '''
+    for stage in profile['stages']:
+        record = into.setdefault(stage['stage'], OrderedDict())
+        for key, value in stage.items():
+            if key != 'stage':
+                record[key] = record.get(key, 0) + value
+    return into
+
+
+def run_benchmark(filenames, repeat):
+    '''
+    Run one benchmark `repeat` times and measure its peak memory once
+
+    Of all runs, the fastest is kept per stage, as it is the least disturbed
+    by other things happening on the machine.
+
+    :param filenames:   NAF files of the benchmark
+    :param repeat:      number of timed runs
+    :return:            dictionary with stages, total and peak memory
+    '''
+    stages = OrderedDict()
+    for _ in range(repeat):
+        run = OrderedDict()
+        for filename in filenames:
+            profiler = Profiler()
+            profile_file(filename, profiler)
+            sum_stages(profiler.as_dict(), run)
+        for name, record in run.items():
+            best = stages.setdefault(name, record)
+            for key in ('wall', 'cpu'):
+                best[key] = min(best[key], record[key])
+
+    total = OrderedDict([
+        ('wall', sum(record['wall'] for record in stages.values())),
+        ('cpu', sum(record['cpu'] for record in stages.values())),
+    ])
+    return OrderedDict([
+        ('documents', len(filenames)),
+        ('terms', count_terms(filenames)),
+        ('stages', stages),
+        ('total', total),
+        ('peak_memory', measure_peak_rss(filenames)),
+        ('peak_traced_memory', measure_peak_traced_memory(filenames)),
+    ])
+
+
+def get_peak_rss():
+    '''
+    Peak resident set size of this process in bytes, or None if unknown
+    '''
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def measure_peak_rss(filenames):
+    '''
+    Peak resident set size (in bytes) of a fresh process that processes
+    `filenames`, or None if it can't be measured.
+
+    This includes the memory used by the interpreter itself and by lxml,
+    which `tracemalloc` doesn't see.
+    '''
+    if resource is None:
+        return None
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--measure-rss'] +
+        list(filenames)
+    )
+    return int(output.decode('ascii').strip())
+
+
+def measure_peak_traced_memory(filenames):
+    '''
+    Peak memory (in bytes) allocated by Python objects while processing any
+    one of `filenames`, or None if it can't be measured.
+
+    This is done separately from timing because tracing slows things down.
+    '''
+    if tracemalloc is None:
+        return None
+    peak = 0
+    for filename in filenames:
+        tracemalloc.start()
+        try:
+            profile_file(filename, Profiler())
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(names=None, repeat=3, benchmarks=None):
+    '''
+    Run all benchmarks (or only those in `names`)
+
+    :param benchmarks:  benchmarks to choose from (default: `get_benchmarks()`)
+    :return:            JSON serialisable dictionary with all results
+    '''
+    if benchmarks is None:
+        benchmarks = get_benchmarks()
+    results = OrderedDict()
+    for name, filenames in benchmarks.items():
+        if names and name not in names:
+            continue
+        logger.info("Running {}...".format(name))
+        results[name] = run_benchmark(filenames, repeat)
+    return OrderedDict([
+        ('meta', OrderedDict([
+            ('timestamp', time.strftime('%Y-%m-%dT%H:%M:%S%Z')),
+            ('python', platform.python_version()),
+            ('platform', platform.platform()),
+            ('repeat', repeat),
+        ])),
+        ('benchmarks', results),
+    ])
+
+
+def find_regressions(baseline, current, tolerance=0.25, min_time=0.005):
+    '''
+    Compare two results of `run_benchmarks`
+
+    A regression is a stage (or total) that takes more than `tolerance` (as a
+    fraction) longer or does more than `tolerance` more comparisons, or a
+    benchmark that uses more than `tolerance` more peak memory. Stages that
+    take less than `min_time` seconds in both runs are too noisy to compare
+    timings of.
+
+    :return:    list of human readable descriptions of regressions
+    '''
+    def exceeds(old, new):
+        return old is not None and new is not None and \
+            new > old * (1 + tolerance)
+
+    regressions = []
+    for name, result in current['benchmarks'].items():
+        old_result = baseline['benchmarks'].get(name)
+        if old_result is None:
+            continue
+        timings = list(result['stages'].items())
+        timings.append(('total', result['total']))
+        old_stages = dict(old_result['stages'])
+        old_stages['total'] = old_result['total']
+        for stage, record in timings:
+            old_record = old_stages.get(stage)
+            if old_record is None:
+                continue
+            old_wall, new_wall = old_record['wall'], record['wall']
+            if max(old_wall, new_wall) >= min_time and \
+                    exceeds(old_wall, new_wall):
+                regressions.append(
+                    "{}: {}: {:.4f}s -> {:.4f}s (+{:.0%})".format(
+                        name, stage, old_wall, new_wall,
+                        new_wall / old_wall - 1
+                    )
+                )
+            if exceeds(old_record.get('comparisons'),
+                       record.get('comparisons')):
+                regressions.append(
+                    "{}: {}: {} -> {} comparisons".format(
+                        name, stage,
+                        old_record['comparisons'], record['comparisons']
+                    )
+                )
+        for key in ('peak_memory', 'peak_traced_memory'):
+            if exceeds(old_result.get(key), result.get(key)):
+                regressions.append(
+                    "{}: {} {} -> {} bytes".format(
+                        name, key.replace('_', ' '),
+                        old_result[key], result[key]
+                    )
+                )
+    return regressions
+
+
+def print_results(results, out=sys.stdout):
+    for name, result in results['benchmarks'].items():
+        print("{} ({} documents, {} terms)".format(
+            name, result['documents'], result.get('terms')), file=out)
+        for stage, record in result['stages'].items():
+            print("  {:<40} {:>9.4f}s {:>12} comparisons".format(
+                stage, record['wall'], record['comparisons']), file=out)
+        print("  {:<40} {:>9.4f}s".format('total', result['total']['wall']),
+              file=out)
+        for key in ('peak_memory', 'peak_traced_memory'):
+            if result[key] is not None:
+                print("  {:<40} {:>9.1f}MB".format(
+                    key.replace('_', ' '), result[key] / 2 ** 20), file=out)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ['--measure-rss']:
+        # Used by `measure_peak_rss` in a fresh process
+        for filename in argv[1:]:
+            profile_file(filename, Profiler())
+        print(get_peak_rss())
+        return
+
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        'benchmarks',
+        nargs='*',
+        help="Benchmarks to run (default: all of {})".format(
+            ', '.join(get_benchmarks())),
+    )
+    parser.add_argument('-l', '--level', help="Logging level",
+                        default='WARNING')
+    parser.add_argument(
+        '-r',
+        '--repeat',
+        help="Number of timed runs per benchmark (default: %(default)s)",
+        type=int,
+        default=3,
+    )
+    parser.add_argument(
+        '--synthetic',
+        metavar='TERMS',
+        nargs='+',
+        type=int,
+        default=[],
+        help="Also run benchmarks on synthetic documents with (at least) this"
+             " many terms",
+    )
+    parser.add_argument(
+        '--save',
+        metavar='FILE',
+        help="Write the results to FILE as JSON",
+    )
+    parser.add_argument(
+        '--compare',
+        metavar='FILE',
+        help="Compare the results to an earlier result in FILE and exit with"
+             " status 1 if there are regressions",
+    )
+    parser.add_argument(
+        '--tolerance',
+        help="Allowed relative increase before something counts as a"
+             " regression (default: %(default)s)",
+        type=float,
+        default=0.25,
+    )
+    parser.add_argument(
+        '--min-time',
+        help="Stages faster than this many seconds are not compared"
+             " (default: %(default)s)",
+        type=float,
+        default=0.005,
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.level)
+
+    unknown = set(args.benchmarks) - set(get_benchmarks())
+    if unknown:
+        parser.error("Unknown benchmarks: {}".format(', '.join(unknown)))
+
+    benchmarks = get_benchmarks()
+    names = list(args.benchmarks)
+    tempdir = tempfile.mkdtemp()
+    try:
+        synthetic = get_synthetic_benchmarks(args.synthetic, tempdir)
+        benchmarks.update(synthetic)
+        if names:
+            names.extend(synthetic)
+        results = run_benchmarks(names, args.repeat, benchmarks)
+    finally:
+        shutil.rmtree(tempdir)
+    print_results(results)
+
+    if args.save:
+        with open(args.save, 'w') as fd:
+            json.dump(results, fd, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fd:
+            baseline = json.load(fd, object_pairs_hook=OrderedDict)
+        regressions = find_regressions(
+            baseline, results, args.tolerance, args.min_time)
+        if regressions:
+            print("\nRegressions compared to {}:".format(args.compare))
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print("\nNo regressions compared to {}".format(args.compare))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""
+Generate synthetic Alpino-style NAF documents of configurable size.
+
+The documents are nonsense Dutch, but have the layers and structures the
+resolver looks at: a text and term layer with Alpino POS tags and
+morphological features, dependencies (including PP chains of configurable
+depth, relative clauses, reflexives and multi-word names), named entities and
+direct quotations with a speech verb outside the quote. Like some of the
+SoNaR files in `tests/resources`, they can contain cyclic dependency
+sub-graphs.
+
+    $ python benchmarks/generate_naf.py --terms 100000 > big.naf
+"""
+from __future__ import print_function
+
+import sys
+import random
+from argparse import ArgumentParser
+
+from lxml import etree
+
+# (text, lemma, pos, morphofeat, term type)
+DETERMINERS = [
+    ('de', 'de', 'det', 'LID(bep,stan,rest)', 'close'),
+    ('het', 'het', 'det', 'LID(bep,stan,evon)', 'close'),
+    ('een', 'een', 'det', 'LID(onbep,stan,agr)', 'close'),
+]
+POSSESSIVES = [
+    ('zijn', 'zijn', 'det', 'VNW(bez,det,stan,vol,3,ev,prenom,zonder,agr)',
+     'close'),
+    ('haar', 'haar', 'det', 'VNW(bez,det,stan,vol,3,getal,prenom,zonder,agr)',
+     'close'),
+]
+ADJECTIVES = [
+    ('oude', 'oud', 'adj', 'ADJ(prenom,basis,met-e,stan)', 'open'),
+    ('grote', 'groot', 'adj', 'ADJ(prenom,basis,met-e,stan)', 'open'),
+    ('nieuwe', 'nieuw', 'adj', 'ADJ(prenom,basis,met-e,stan)', 'open'),
+    ('rode', 'rood', 'adj', 'ADJ(prenom,basis,met-e,stan)', 'open'),
+]
+NOUNS = [
+    ('man', 'man', 'noun', 'N(soort,ev,basis,zijd,stan)', 'open'),
+    ('vrouw', 'vrouw', 'noun', 'N(soort,ev,basis,zijd,stan)', 'open'),
+    ('huis', 'huis', 'noun', 'N(soort,ev,basis,onz,stan)', 'open'),
+    ('boek', 'boek', 'noun', 'N(soort,ev,basis,onz,stan)', 'open'),
+    ('stad', 'stad', 'noun', 'N(soort,ev,basis,zijd,stan)', 'open'),
+    ('kinderen', 'kind', 'noun', 'N(soort,mv,basis)', 'open'),
+    ('brieven', 'brief', 'noun', 'N(soort,mv,basis)', 'open'),
+    ('bedrijf', 'bedrijf', 'noun', 'N(soort,ev,basis,onz,stan)', 'open'),
+]
+# (tokens, entity type)
+NAMES = [
+    (['Jan', 'Jansen'], 'PER'),
+    (['Marie', 'de', 'Vries'], 'PER'),
+    (['Piet'], 'PER'),
+    (['Amsterdam'], 'LOC'),
+    (['Utrecht'], 'LOC'),
+    (['Philips'], 'ORG'),
+    (['Vrije', 'Universiteit'], 'ORG'),
+]
+NAME_MORPHOFEAT = 'N(eigen,ev,basis,zijd,stan)'
+PRONOUNS = [
+    ('hij', 'hij', 'pron', 'VNW(pers,pron,nomin,vol,3,ev,masc)', 'close'),
+    ('zij', 'zij', 'pron', 'VNW(pers,pron,nomin,vol,3v,ev,fem)', 'close'),
+    ('ik', 'ik', 'pron', 'VNW(pers,pron,nomin,vol,1,ev)', 'close'),
+    ('jij', 'jij', 'pron', 'VNW(pers,pron,nomin,vol,2v,ev)', 'close'),
+    ('wij', 'wij', 'pron', 'VNW(pers,pron,nomin,vol,1,mv)', 'close'),
+]
+OBJECT_PRONOUNS = [
+    ('hem', 'hem', 'pron', 'VNW(pers,pron,obl,vol,3,ev,masc)', 'close'),
+    ('haar', 'haar', 'pron', 'VNW(pers,pron,obl,vol,3,getal,fem)', 'close'),
+]
+REFLEXIVE = ('zichzelf', 'zichzelf', 'pron',
+             'VNW(refl,pron,obl,nadr,3,getal)', 'close')
+RELATIVE = ('die', 'die', 'pron', 'VNW(betr,pron,stan,vol,persoon,getal)',
+            'close')
+VERBS = [
+    ('ziet', 'zien', 'verb', 'WW(pv,tgw,met-t)', 'open'),
+    ('kent', 'kennen', 'verb', 'WW(pv,tgw,met-t)', 'open'),
+    ('zocht', 'zoeken', 'verb', 'WW(pv,verl,ev)', 'open'),
+    ('leest', 'lezen', 'verb', 'WW(pv,tgw,met-t)', 'open'),
+    ('bouwde', 'bouwen', 'verb', 'WW(pv,verl,ev)', 'open'),
+]
+SPEECH_VERB = ('zegt', 'zeggen', 'verb', 'WW(pv,tgw,met-t)', 'open')
+PREPOSITIONS = [
+    ('in', 'in', 'prep', 'VZ(init)', 'close'),
+    ('met', 'met', 'prep', 'VZ(init)', 'close'),
+    ('van', 'van', 'prep', 'VZ(init)', 'close'),
+    ('naast', 'naast', 'prep', 'VZ(init)', 'close'),
+]
+PERIOD = ('.', '.', 'punct', 'LET()', 'open')
+COMMA = (',', ',', 'punct', 'LET()', 'open')
+QUOTE = ('"', '"', 'punct', 'LET()', 'open')
+
+
+class SentenceBuilder:
+    '''
+    Collects the terms, dependencies and entities of one sentence.
+
+    Terms are referred to by their index in the sentence.
+    '''
+
+    def __init__(self, rng, depth):
+        self.rng = rng
+        self.depth = depth
+        self.terms = []
+        self.deps = []
+        self.entities = []
+
+    def add(self, term):
+        self.terms.append(term)
+        return len(self.terms) - 1
+
+    def dep(self, head, dependent, function):
+        self.deps.append((head, dependent, function))
+
+    def noun_phrase(self, depth, subject=False):
+        '''
+        Add a noun phrase and return the index of its head
+        '''
+        rng = self.rng
+        kind = rng.random()
+        if kind < 0.2:
+            tokens, etype = rng.choice(NAMES)
+            indices = [
+                self.add((token, token, 'name', NAME_MORPHOFEAT, 'open'))
+                for token in tokens
+            ]
+            for index in indices[1:]:
+                self.dep(indices[0], index, 'mwp/mwp')
+            self.entities.append((indices, etype))
+            return indices[0]
+        elif kind < 0.35:
+            return self.add(rng.choice(PRONOUNS if subject
+                                       else OBJECT_PRONOUNS))
+
+        determiner = self.add(rng.choice(DETERMINERS + POSSESSIVES))
+        adjective = self.add(rng.choice(ADJECTIVES)) \
+            if rng.random() < 0.4 else None
+        head = self.add(rng.choice(NOUNS))
+        self.dep(head, determiner, 'hd/det')
+        if adjective is not None:
+            self.dep(head, adjective, 'hd/mod')
+
+        if depth > 0:
+            # PP chain: noun -hd/mod-> prep -hd/obj1-> noun phrase
+            preposition = self.add(rng.choice(PREPOSITIONS))
+            self.dep(head, preposition, 'hd/mod')
+            self.dep(preposition, self.noun_phrase(depth - 1), 'hd/obj1')
+        elif rng.random() < 0.15:
+            # Relative clause: noun -hd/mod-> die -rhd/body-> verb
+            relative = self.add(RELATIVE)
+            verb_object = self.noun_phrase(0)
+            verb = self.add(rng.choice(VERBS))
+            self.dep(head, relative, 'hd/mod')
+            self.dep(relative, verb, 'rhd/body')
+            self.dep(verb, verb_object, 'hd/obj1')
+        return head
+
+    def clause(self):
+        '''
+        Add a main clause and return the index of its verb
+        '''
+        subject = self.noun_phrase(self.depth, subject=True)
+        verb = self.add(self.rng.choice(VERBS))
+        if self.rng.random() < 0.1:
+            obj = self.add(REFLEXIVE)
+        else:
+            obj = self.noun_phrase(self.depth)
+        self.dep(verb, subject, 'hd/su')
+        self.dep(verb, obj, 'hd/obj1')
+        return verb
+
+    def sentence(self, quotation=False):
+        if quotation:
+            # " clause " , zegt NAME .
+            begin = self.add(QUOTE)
+            quoted_verb = self.clause()
+            end = self.add(QUOTE)
+            comma = self.add(COMMA)
+            verb = self.add(SPEECH_VERB)
+            tokens, etype = self.rng.choice(
+                [name for name in NAMES if name[1] == 'PER'])
+            speaker = [
+                self.add((token, token, 'name', NAME_MORPHOFEAT, 'open'))
+                for token in tokens
+            ]
+            for index in speaker[1:]:
+                self.dep(speaker[0], index, 'mwp/mwp')
+            self.entities.append((speaker, etype))
+            self.dep(quoted_verb, verb, 'nucl/tag')
+            self.dep(verb, speaker[0], 'hd/su')
+            for punct in (begin, end, comma):
+                self.dep(quoted_verb, punct, '-- / --')
+            root = quoted_verb
+        else:
+            root = self.clause()
+        self.dep(root, self.add(PERIOD), '-- / --')
+
+    def add_cycle(self, size):
+        '''
+        Make a fully connected dependency sub-graph of `size` content terms
+        '''
+        content = [i for i, term in enumerate(self.terms)
+                   if term[2] != 'punct']
+        if len(content) < size:
+            return False
+        members = self.rng.sample(content, size)
+        for head in members:
+            for dependent in members:
+                if head != dependent:
+                    self.dep(head, dependent, 'hd/mod')
+        return True
+
+
+def generate_naf(terms=1000, depth=1, quotation_rate=0.1, cycles=0,
+                 cycle_size=2, seed=0):
+    '''
+    Generate a synthetic NAF document
+
+    :param terms:           minimum number of terms (whole sentences are
+                            generated until there are at least this many)
+    :param depth:           length of prepositional phrase chains in noun
+                            phrases, i.e. the depth of the dependency trees
+    :param quotation_rate:  fraction of sentences that is a direct quotation
+    :param cycles:          number of sentences with a cyclic dependency
+                            sub-graph
+    :param cycle_size:      number of terms in every cyclic sub-graph (2 is
+                            a circular reference, more makes them fully
+                            connected)
+    :param seed:            random seed, the same seed gives the same document
+    :return:                lxml ElementTree of the NAF document
+    '''
+    rng = random.Random(seed)
+    sentences = []
+    nterms = 0
+    while nterms < terms:
+        builder = SentenceBuilder(rng, depth)
+        builder.sentence(quotation=rng.random() < quotation_rate)
+        sentences.append(builder)
+        nterms += len(builder.terms)
+
+    for builder in rng.sample(sentences, min(cycles, len(sentences))):
+        builder.add_cycle(cycle_size)
+
+    return build_tree(sentences)
+
+
+def build_tree(sentences):
+    root = etree.Element('NAF', version='3.0')
+    root.set('{http://www.w3.org/XML/1998/namespace}lang', 'nl')
+    header = etree.SubElement(root, 'nafHeader')
+    for layer, name in [('text', 'synthetic'), ('terms', 'synthetic'),
+                        ('deps', 'synthetic'), ('entities', 'synthetic')]:
+        lps = etree.SubElement(header, 'linguisticProcessors', layer=layer)
+        etree.SubElement(lps, 'lp', name=name, version='1.0')
+    raw = etree.SubElement(root, 'raw')
+    text = etree.SubElement(root, 'text')
+    term_layer = etree.SubElement(root, 'terms')
+    dep_layer = etree.SubElement(root, 'deps')
+    entity_layer = etree.SubElement(root, 'entities')
+
+    offset = 0
+    raw_tokens = []
+    ntokens = 0
+    nentities = 0
+    for sent_nr, builder in enumerate(sentences, 1):
+        term_ids = []
+        for token, lemma, pos, morphofeat, term_type in builder.terms:
+            ntokens += 1
+            wid = 'w{}'.format(ntokens)
+            tid = 't_{}'.format(ntokens - 1)
+            wf = etree.SubElement(
+                text, 'wf', id=wid, offset=str(offset),
+                length=str(len(token)), sent=str(sent_nr), para='1'
+            )
+            wf.text = token
+            raw_tokens.append(token)
+            offset += len(token) + 1
+
+            term = etree.SubElement(
+                term_layer, 'term', id=tid, type=term_type, lemma=lemma,
+                pos=pos, morphofeat=morphofeat
+            )
+            span = etree.SubElement(term, 'span')
+            etree.SubElement(span, 'target', id=wid)
+            term_ids.append(tid)
+
+        for head, dependent, function in builder.deps:
+            etree.SubElement(
+                dep_layer, 'dep', rfunc=function,
+                to=term_ids[dependent], **{'from': term_ids[head]}
+            )
+
+        for indices, etype in builder.entities:
+            nentities += 1
+            entity = etree.SubElement(
+                entity_layer, 'entity', id='e{}'.format(nentities),
+                type=etype
+            )
+            references = etree.SubElement(entity, 'references')
+            span = etree.SubElement(references, 'span')
+            for index in indices:
+                etree.SubElement(span, 'target', id=term_ids[index])
+
+    raw.text = etree.CDATA(' '.join(raw_tokens))
+    return etree.ElementTree(root)
+
+
+def write_naf(tree, out):
+    tree.write(out, encoding='UTF-8', pretty_print=True, xml_declaration=True)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-t', '--terms', type=int, default=1000,
+                        help="Minimum number of terms (default: %(default)s)")
+    parser.add_argument('-d', '--depth', type=int, default=1,
+                        help="Length of prepositional phrase chains"
+                             " (default: %(default)s)")
+    parser.add_argument('-q', '--quotation-rate', type=float, default=0.1,
+                        help="Fraction of sentences that is a quotation"
+                             " (default: %(default)s)")
+    parser.add_argument('-c', '--cycles', type=int, default=0,
+                        help="Number of sentences with a cyclic dependency"
+                             " sub-graph (default: %(default)s)")
+    parser.add_argument('--cycle-size', type=int, default=2,
+                        help="Number of terms in every cyclic sub-graph"
+                             " (default: %(default)s)")
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help="Random seed (default: %(default)s)")
+    parser.add_argument('-o', '--output',
+                        help="File to write to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    tree = generate_naf(
+        terms=args.terms,
+        depth=args.depth,
+        quotation_rate=args.quotation_rate,
+        cycles=args.cycles,
+        cycle_size=args.cycle_size,
+        seed=args.seed,
+    )
+    if args.output is None:
+        write_naf(tree, getattr(sys.stdout, 'buffer', sys.stdout))
+    else:
+        write_naf(tree, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,13 @@
-from .resolve_coreference import process_coreference
+__version__ = '0.1.1'
+
+
+def process_coreference(*args, **kwargs):
+    """
+    Process coreferences and add to the given NAF.
+
+    See `resolve_coreference.process_coreference`; the resolver is only
+    imported when this is first called, so that importing this package (e.g.
+    for `--help`) stays cheap.
+    """
+    from .resolve_coreference import process_coreference
+    return process_coreference(*args, **kwargs)
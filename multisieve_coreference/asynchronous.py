@@ -0,0 +1,165 @@
+"""
+This module lets an asyncio event loop resolve many documents concurrently.
+
+Documents are resolved in an executor, so the event loop itself is never
+blocked. To use all cores, pass a process pool that loads the resources once
+per worker:
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multisieve_coreference.batch import init_worker
+    from multisieve_coreference.asynchronous import resolve_as_completed
+
+    with ProcessPoolExecutor(initializer=init_worker) as executor:
+        async for result in resolve_as_completed(documents, executor):
+            ...
+
+Only `max_in_flight` documents are submitted to the executor at a time and
+the next input is only taken from `documents` when one of them is done, so a
+slow consumer or a huge (asynchronous) input stream doesn't pile up work in
+memory.
+
+This module requires Python 3.6 or newer.
+"""
+import os
+import asyncio
+import logging
+import functools
+from collections import namedtuple
+
+from .batch import process_document
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+DocumentResult = namedtuple('DocumentResult', ['key', 'naf', 'error'])
+DocumentResult.__doc__ = '''
+Result of resolving one document: `naf` is the resulting NAF as bytes, or
+None if processing failed with exception `error`.
+'''
+
+
+async def _iterate(documents):
+    if hasattr(documents, '__aiter__'):
+        iterator = documents.__aiter__()
+        try:
+            async for document in iterator:
+                yield document
+        finally:
+            # Don't leave an asynchronous generator of the caller suspended
+            # when the iteration is abandoned
+            if hasattr(iterator, 'aclose'):
+                await iterator.aclose()
+    else:
+        for document in documents:
+            yield document
+
+
+def get_max_in_flight():
+    '''
+    Default number of documents to have in the executor at once: the number
+    of CPUs, which is also the default number of workers of a process pool.
+    '''
+    return os.cpu_count() or 1
+
+
+def get_running_loop():
+    '''
+    Get the event loop of the running coroutine
+    '''
+    if hasattr(asyncio, 'get_running_loop'):
+        return asyncio.get_running_loop()
+    # Python 3.6
+    return asyncio.get_event_loop()
+
+
+async def resolve_as_completed(documents, executor=None, max_in_flight=None,
+                               **kwargs):
+    '''
+    Resolve coreferences of documents and yield the results as they complete
+
+    A document that can't be processed gives a result with an `error`
+    instead of stopping the iteration.
+
+    :param documents:       iterable or asynchronous iterable of (key, NAF)
+                            pairs, where NAF is a `bytes` or `str` document
+                            and key is anything to identify it by
+    :param executor:        `concurrent.futures.Executor` to resolve the
+                            documents in (default: the default executor of
+                            the event loop)
+    :param max_in_flight:   maximum number of documents submitted to the
+                            executor at once (default: `get_max_in_flight`)
+    :param kwargs:          passed on to `batch.process_document`
+    :return:                asynchronous iterator of DocumentResult
+    '''
+    if max_in_flight is None:
+        max_in_flight = get_max_in_flight()
+    if max_in_flight < 1:
+        raise ValueError(
+            "max_in_flight must be positive, not {}".format(max_in_flight))
+
+    loop = get_running_loop()
+    inputs = _iterate(documents)
+    exhausted = False
+    pending = {}
+    try:
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    key, naf = await inputs.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                if isinstance(naf, str):
+                    naf = naf.encode('utf-8')
+                future = loop.run_in_executor(
+                    executor,
+                    functools.partial(process_document, naf, **kwargs)
+                )
+                pending[future] = key
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            # Keep submission order among documents that finished together
+            for future in [f for f in pending if f in done]:
+                key = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    yield DocumentResult(key, future.result(), None)
+                else:
+                    logger.error(
+                        "Could not process document {!r}".format(key),
+                        exc_info=error
+                    )
+                    yield DocumentResult(key, None, error)
+    finally:
+        for future in pending:
+            future.cancel()
+        await inputs.aclose()
+
+
+async def resolve_documents(documents, executor=None, max_in_flight=None,
+                            **kwargs):
+    '''
+    Resolve coreferences of documents concurrently
+
+    Takes the same arguments as `resolve_as_completed`.
+
+    :return:    list of DocumentResult in the order of `documents`
+    '''
+    async def numbered():
+        number = 0
+        inputs = _iterate(documents)
+        try:
+            async for key, naf in inputs:
+                yield (number, key), naf
+                number += 1
+        finally:
+            await inputs.aclose()
+
+    results = {}
+    async for result in resolve_as_completed(
+            numbered(), executor, max_in_flight, **kwargs):
+        number, key = result.key
+        results[number] = result._replace(key=key)
+    return [results[number] for number in sorted(results)]
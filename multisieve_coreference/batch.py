@@ -0,0 +1,273 @@
+"""
+This module processes many NAF files in a single process, so that start-up
+costs (imports, resources, version lookup) are only paid once.
+"""
+import io
+import os
+import time
+import logging
+import multiprocessing
+from collections import OrderedDict, namedtuple
+
+from KafNafParserPy import KafNafParser
+
+from . import constants as c
+from .mention_data import get_stop_words
+from .profiling import Profiler, NULL_PROFILER, write_profiles
+from .resolve_coreference import (
+    process_coreference,
+    process_coreference_file,
+    add_naf_header,
+    get_version
+)
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+TaskResult = namedtuple(
+    'TaskResult',
+    ['infile', 'pid', 'seconds', 'succeeded', 'profile']
+)
+
+
+def find_input_files(input_dir=None, file_list=None):
+    '''
+    Collect the paths of all documents that should be processed
+
+    :param input_dir:   directory of which every (non-hidden) file is an input
+                        file
+    :param file_list:   path of a file containing one input path per line
+    :return:            list of paths to input files
+    '''
+    infiles = []
+    if input_dir is not None:
+        for name in sorted(os.listdir(input_dir)):
+            path = os.path.join(input_dir, name)
+            if not name.startswith('.') and os.path.isfile(path):
+                infiles.append(path)
+    if file_list is not None:
+        with open(file_list) as fd:
+            for line in fd:
+                path = line.strip()
+                if path:
+                    infiles.append(path)
+    return infiles
+
+
+def get_output_files(infiles, output_dir):
+    '''
+    Get the output path for every input file: a file with the same name in
+    `output_dir`.
+
+    :param infiles:     list of paths to input files
+    :param output_dir:  directory to write output to
+    :return:            list of paths to output files
+    '''
+    outfiles = []
+    seen = set()
+    for infile in infiles:
+        outfile = os.path.join(output_dir, os.path.basename(infile))
+        if outfile in seen:
+            raise ValueError(
+                "More than one input file would be written to {!r}".format(
+                    outfile
+                )
+            )
+        seen.add(outfile)
+        outfiles.append(outfile)
+    return outfiles
+
+
+def process_document(data,
+                     fill_gaps=c.FILL_GAPS_IN_OUTPUT,
+                     include_singletons=c.INCLUDE_SINGLETONS_IN_OUTPUT,
+                     profiler=NULL_PROFILER,
+                     release_memory=False,
+                     columns=False):
+    '''
+    Add coreferences and a header to a NAF document given as bytes
+
+    :param data:        NAF document (bytes)
+    :param profiler:    Profiler to record the pipeline stages with
+    :param release_memory:  see `resolve_coreference.resolve_coreference`
+    :param columns:         see `resolve_coreference.resolve_coreference`
+    :return:            resulting NAF document (bytes)
+    '''
+    begintime = time.strftime('%Y-%m-%dT%H:%M:%S%Z')
+    nafobj = KafNafParser(io.BytesIO(data))
+    process_coreference(
+        nafobj,
+        fill_gaps=fill_gaps,
+        include_singletons=include_singletons,
+        profiler=profiler,
+        release_memory=release_memory,
+        columns=columns
+    )
+    add_naf_header(nafobj, begintime)
+    with io.BytesIO() as buffer:
+        nafobj.dump(buffer)
+        return buffer.getvalue()
+
+
+def process_file(infile, outfile,
+                 fill_gaps=c.FILL_GAPS_IN_OUTPUT,
+                 include_singletons=c.INCLUDE_SINGLETONS_IN_OUTPUT,
+                 profiler=NULL_PROFILER,
+                 streaming=False,
+                 cache_dir=None,
+                 release_memory=False,
+                 columns=False):
+    '''
+    Read a NAF file, add coreferences and a header and write the result
+
+    :param infile:      path to input NAF file
+    :param outfile:     path to write output NAF to
+    :param profiler:    Profiler to record the pipeline stages with
+    :param streaming:   whether to use `process_coreference_file` instead of
+                        a NAF object
+    :param cache_dir:   directory to cache preprocessed documents in (implies
+                        `streaming`)
+    :param release_memory:  see `resolve_coreference.resolve_coreference`
+    :param columns:         see `resolve_coreference.resolve_coreference`
+    :return:            None
+    '''
+    begintime = time.strftime('%Y-%m-%dT%H:%M:%S%Z')
+    if streaming or cache_dir is not None:
+        with open(outfile, 'wb') as out:
+            process_coreference_file(
+                infile,
+                out,
+                fill_gaps=fill_gaps,
+                include_singletons=include_singletons,
+                profiler=profiler,
+                begintime=begintime,
+                cache_dir=cache_dir,
+                release_memory=release_memory,
+                columns=columns
+            )
+        return
+
+    nafobj = KafNafParser(infile)
+    process_coreference(
+        nafobj,
+        fill_gaps=fill_gaps,
+        include_singletons=include_singletons,
+        profiler=profiler,
+        release_memory=release_memory,
+        columns=columns
+    )
+    add_naf_header(nafobj, begintime)
+    nafobj.dump(outfile)
+
+
+def init_worker():
+    '''
+    Load the resources needed for every document, so that this is done once
+    per worker instead of once per document.
+    '''
+    get_stop_words()
+    get_version()
+
+
+def process_task(task):
+    '''
+    Process one (infile, outfile, profile, kwargs) task in a worker
+
+    :param task:    tuple of input path, output path, whether to profile and
+                    keyword arguments for `process_file`
+    :return:        TaskResult
+    '''
+    infile, outfile, profile, kwargs = task
+    logger.info("Processing {}...".format(infile))
+    profiler = Profiler() if profile else NULL_PROFILER
+    start = time.time()
+    try:
+        process_file(infile, outfile, profiler=profiler, **kwargs)
+        succeeded = True
+    except Exception:
+        logger.exception("Could not process {}".format(infile))
+        succeeded = False
+    return TaskResult(
+        infile,
+        os.getpid(),
+        time.time() - start,
+        succeeded,
+        profiler.as_dict(document=infile) if profile else None
+    )
+
+
+def get_worker_throughput(results):
+    '''
+    Sum the results of `process_task` per worker
+
+    :param results: iterable of `TaskResult`s
+    :return:        ordered dictionary of {worker process ID: (number of
+                    documents, total processing time in seconds)}
+    '''
+    throughput = OrderedDict()
+    for result in results:
+        ndocs, total = throughput.get(result.pid, (0, 0.0))
+        throughput[result.pid] = (ndocs + 1, total + result.seconds)
+    return throughput
+
+
+def log_worker_throughput(throughput):
+    for pid, (ndocs, seconds) in throughput.items():
+        logger.info(
+            "Worker {}: {} documents in {:.2f}s ({:.2f} documents/s)".format(
+                pid,
+                ndocs,
+                seconds,
+                ndocs / seconds if seconds else float('inf')
+            )
+        )
+
+
+def process_files(infiles, output_dir, jobs=1, profile_file=None, **kwargs):
+    '''
+    Process every input file and write the result to a file with the same
+    name in `output_dir`.
+
+    With more than one job, the documents are spread over a pool of worker
+    processes. Results are collected in input order either way.
+
+    A document that cannot be processed is logged and skipped, so that one
+    broken file does not stop the whole batch.
+
+    :param infiles:     list of paths to input files
+    :param output_dir:  directory to write output to (created if necessary)
+    :param jobs:        number of worker processes (0 means one per CPU)
+    :param profile_file:    if given, profile every document and write the
+                            results to this file (see
+                            `profiling.write_profiles`)
+    :param kwargs:      passed on to `process_file`
+    :return:            list of input files that could not be processed
+    '''
+    outfiles = get_output_files(infiles, output_dir)
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    profile = profile_file is not None
+    tasks = [(infile, outfile, profile, kwargs)
+             for infile, outfile in zip(infiles, outfiles)]
+    if jobs == 0:
+        jobs = multiprocessing.cpu_count()
+
+    if jobs == 1:
+        init_worker()
+        results = list(map(process_task, tasks))
+    else:
+        pool = multiprocessing.Pool(jobs, initializer=init_worker)
+        try:
+            # `imap` keeps the results in input order
+            results = list(pool.imap(process_task, tasks, chunksize=1))
+        finally:
+            pool.close()
+            pool.join()
+
+    log_worker_throughput(get_worker_throughput(results))
+    if profile:
+        write_profiles(
+            profile_file,
+            [result.profile for result in results if result.succeeded]
+        )
+    return [result.infile for result in results if not result.succeeded]
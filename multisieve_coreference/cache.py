@@ -0,0 +1,177 @@
+"""
+This module keeps an on-disk cache of preprocessed documents.
+
+For every input document, the index of its tokens and terms, its entities and
+its dependency trees are stored in a compact binary file named after a hash
+of the contents of the document. When the same document is processed again
+(e.g. after changing a sieve), it is loaded from the cache in milliseconds
+instead of parsing the XML again.
+
+Cache files are written with `marshal`, whose format is specific to the
+Python version, so the Python version is stored in the file header with the
+version of the cache format. A file with another header is ignored and
+overwritten.
+"""
+import os
+import sys
+import struct
+import logging
+import marshal
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+from .constituency_tree import ConstituencyTrees
+from .document_info import DocumentInformation, TokenInfo, TermInfo
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+# Increase this whenever the contents of a cache file change
+CACHE_FORMAT = 1
+MAGIC = b'MSCOREF'
+HEADER = struct.Struct('>7sHBB')
+SUFFIX = '.cache'
+
+
+def get_cache_key(data):
+    '''
+    Get the key of a document in the cache: a hash of its contents
+
+    :param data:    bytes of the input NAF
+    :return:        hexadecimal string
+    '''
+    return hashlib.sha1(data).hexdigest()
+
+
+def get_header():
+    return HEADER.pack(MAGIC, CACHE_FORMAT, *sys.version_info[:2])
+
+
+class DocumentCache:
+    '''
+    A directory of cached documents
+    '''
+
+    def __init__(self, directory):
+        '''
+        :param directory:   directory to keep the cache files in (created if
+                            necessary)
+        '''
+        self.directory = directory
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process may have created it in the meantime
+                if not os.path.isdir(directory):
+                    raise
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key, **kwargs):
+        '''
+        Load a document from the cache
+
+        :param key:     result of `get_cache_key`
+        :param kwargs:  passed to `DocumentInformation`
+        :return:        DocumentInformation, or None if the document is not
+                        in the cache (or was cached in another format)
+        '''
+        try:
+            with open(self.get_path(key), 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            return None
+        if data[:HEADER.size] != get_header():
+            logger.info("Ignoring cache file {} from another version".format(
+                self.get_path(key)))
+            return None
+        try:
+            tokens, terms, head2deps, entities = marshal.loads(
+                data[HEADER.size:])
+        except (EOFError, ValueError, TypeError):
+            logger.warning("Ignoring corrupt cache file {}".format(
+                self.get_path(key)))
+            return None
+        return DocumentInformation(
+            OrderedDict((token[0], TokenInfo._make(token))
+                        for token in tokens),
+            OrderedDict((term[0], TermInfo._make(term)) for term in terms),
+            None,
+            entities,
+            tree=ConstituencyTrees(head2deps),
+            **kwargs
+        )
+
+    def store(self, key, doc):
+        '''
+        Store a document in the cache
+
+        The file is written under a temporary name first, so that other
+        processes never read a partially written file.
+
+        :param key:     result of `get_cache_key`
+        :param doc:     DocumentInformation created with the default
+                        `term_filter`
+        '''
+        data = marshal.dumps((
+            [tuple(token) for token in doc.tokens.values()],
+            [tuple(term) for term in doc.terms.values()],
+            doc.tree.head2deps,
+            doc.entities,
+        ))
+        fd, temp_path = tempfile.mkstemp(
+            suffix=SUFFIX, dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(get_header())
+                f.write(data)
+            os.rename(temp_path, self.get_path(key))
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+
+def read_document(data, cache_dir=None, **kwargs):
+    '''
+    Get the `DocumentInformation` of a NAF document given as bytes, from the
+    cache in `cache_dir` if it is there, otherwise by reading it with
+    `naf_reader.read_naf` (and adding it to the cache).
+
+    :param data:        bytes (or memory map) of the input NAF
+    :param cache_dir:   directory of the cache, or None to not use a cache
+    :param kwargs:      passed to `DocumentInformation`
+    :return:            DocumentInformation
+    '''
+    if cache_dir is None:
+        return read_buffer(data, **kwargs)
+    if kwargs.get('term_filter') is not None:
+        raise ValueError(
+            "Documents read with a term_filter can't be cached")
+
+    cache = DocumentCache(cache_dir)
+    key = get_cache_key(data)
+    doc = cache.load(key, **kwargs)
+    if doc is None:
+        logger.debug("Document {} is not in the cache".format(key))
+        doc = read_buffer(data, **kwargs)
+        cache.store(key, doc)
+    return doc
+
+
+def read_buffer(data, **kwargs):
+    '''
+    Read the `DocumentInformation` of a NAF document in memory with
+    `naf_reader.read_naf`, without copying it
+
+    :param data:    bytes (or memory map) of the input NAF
+    :param kwargs:  passed to `DocumentInformation`
+    '''
+    from .naf_reader import BufferReader, read_naf
+
+    reader = BufferReader(data)
+    try:
+        return read_naf(reader, **kwargs)
+    finally:
+        reader.close()
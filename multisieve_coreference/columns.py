@@ -0,0 +1,94 @@
+"""
+This module contains an optional columnar representation of a document:
+NumPy arrays with one entry per token or term, so that computations on long
+spans (offsets, begin and end, filling gaps) are vectorized instead of
+looping over terms in Python.
+
+It is only used when it is asked for (and then requires NumPy). Results are
+always plain Python lists and integers, so they are the same as without it.
+"""
+import numpy
+
+
+class DocumentColumns:
+    '''
+    The token and term attributes of one document that the vectorized
+    computations use, as arrays: the token offsets, and the begin and end
+    offsets of the terms.
+    '''
+
+    def __init__(self, tokens, terms, term_index=None):
+        '''
+        :param tokens:      ordered dictionary of {token ID: TokenInfo}
+        :param terms:       ordered dictionary of {term ID: TermInfo}
+        :param term_index:  {term ID: position in `terms`}, if it already
+                            exists
+        '''
+        self.token_offset = numpy.array(
+            [token.offset for token in tokens.values()], dtype=numpy.int64)
+        # Binary search on token offsets needs them in increasing order
+        self.tokens_sorted = bool(
+            numpy.all(self.token_offset[1:] > self.token_offset[:-1]))
+
+        if term_index is None:
+            term_index = {tid: i for i, tid in enumerate(terms)}
+        self.term_index = term_index
+        self.term_offset = numpy.array(
+            [term.offset for term in terms.values()], dtype=numpy.int64)
+        self.term_end = self.term_offset + numpy.array(
+            [term.length for term in terms.values()], dtype=numpy.int64)
+
+    def release(self):
+        '''
+        Drop the term columns, which are only needed to find the mentions,
+        and keep the token offsets for `fill_gaps`
+        '''
+        self.term_index = None
+        self.term_offset = None
+        self.term_end = None
+
+    def term_rows(self, term_ids):
+        '''
+        Get the row of every term in `term_ids` as an array
+        '''
+        index = self.term_index
+        return numpy.fromiter(
+            (index[tid] for tid in term_ids),
+            dtype=numpy.intp,
+            count=len(term_ids)
+        )
+
+    def span_offsets(self, term_ids):
+        '''
+        Sorted list of the offsets of the terms in `term_ids`
+        '''
+        return numpy.sort(self.term_offset[self.term_rows(term_ids)]).tolist()
+
+    def span_bounds(self, term_ids):
+        '''
+        Begin and end offset of a span of terms, (0, 0) for an empty span
+        '''
+        if len(term_ids) == 0:
+            return 0, 0
+        rows = self.term_rows(term_ids)
+        return (int(self.term_offset[rows].min()),
+                int(self.term_end[rows].max()))
+
+    def fill_gaps(self, span):
+        '''
+        Get all token offsets from the first to the last offset in `span`,
+        like `Cmention.fill_gaps` does with the list of all token offsets.
+
+        Only valid if `tokens_sorted` is True.
+
+        :param span:    non-empty sorted list of token offsets
+        :return:        list of token offsets
+        '''
+        start, end = numpy.searchsorted(
+            self.token_offset, [span[0], span[-1]])
+        if end < start or start == len(self.token_offset) or \
+                self.token_offset[start] != span[0] or \
+                end == len(self.token_offset) or \
+                self.token_offset[end] != span[-1]:
+            raise ValueError("Span offsets are not token offsets")
+        return self.token_offset[start:end + 1].tolist()
@@ -1,26 +1,27 @@
 from collections import defaultdict
 
-from . import constituents as csts
-from .constituents import get_constituent
-
 
 class Constituent:
     '''
     This class contains the main constructional information of mentions
     '''
 
-    def __init__(self, head_id, span=None, multiword=None, modifiers=None,
-                 appositives=None, predicatives=None, etype=''):
+    def __init__(self, doc, head_id, span=None, multiword=None,
+                 modifiers=None, appositives=None, predicatives=None,
+                 etype=''):
         '''
         Constructor for the constituent object
+
+        `doc` (a DocumentInformation) is only used to fill in the defaults and
+        is not stored.
         '''
         self.head_id = head_id
-        self.span = get_constituent(head_id) if span is None else span
+        self.span = doc.get_constituent(head_id) if span is None else span
 
         # Set the default values for `multiword`, `modifiers` and `appositives`
         if multiword is None or modifiers is None or appositives is None:
             self.multiword, self.modifiers, self.appositives = \
-                get_mwe_and_modifiers_and_appositives(self.head_id)
+                get_mwe_and_modifiers_and_appositives(doc, self.head_id)
 
         # Override the default if something different was passed
         if multiword is not None:
@@ -32,7 +33,7 @@ class Constituent:
 
         if predicatives is None:
             self.predicatives = []
-            self._add_predicative_information()
+            self._add_predicative_information(doc)
         else:
             self.predicatives = predicatives
 
@@ -53,27 +54,27 @@ class Constituent:
 
         self.predicatives.append(pred)
 
-    def _add_predicative_information(self):
+    def _add_predicative_information(self, doc):
         '''
         Function that checks if mention is subject in a predicative structure
         and, if so, adds predicative info to constituent object
-        :param head_id: identifier of the head of the mention
-        :param myConstituent: constituent object
+        :param doc: DocumentInformation of the input naf
         :return:
         '''
 
-        for headID, headrel in csts.dep2heads.get(self.head_id, []):
+        for headID, headrel in doc.dep2heads.get(self.head_id, []):
             if headrel == 'hd/su':
-                headscomps = csts.head2deps.get(headID)
+                headscomps = doc.head2deps.get(headID)
                 for depID, deprel in headscomps:
                     if deprel in ['hd/predc', 'hd/predm']:
-                        predicative = get_constituent(depID)
+                        predicative = doc.get_constituent(depID)
                         self.add_predicative(predicative)
 
 
-def get_mwe_and_modifiers_and_appositives(head_id):
+def get_mwe_and_modifiers_and_appositives(doc, head_id):
     '''
     Function that identifies full mwe head and posthead modifiers
+    :param doc: DocumentInformation of the input naf
     :param head_id: head_id
     :return: list of full head terms, list of posthead modifiers
     '''
@@ -82,37 +83,36 @@ def get_mwe_and_modifiers_and_appositives(head_id):
     mods = []
     apps = []
 
-    for ID, relation in csts.head2deps.get(head_id, []):
+    for ID, relation in doc.head2deps.get(head_id, []):
         if relation == 'mwp/mwp':
             mwe.append(head_id)
         elif relation == 'hd/mod':
-            dep_constituent = get_constituent(ID)
+            dep_constituent = doc.get_constituent(ID)
             mods.append(dep_constituent)
         elif relation == 'hd/app':
-            dep_constituent = get_constituent(ID)
+            dep_constituent = doc.get_constituent(ID)
             apps.append(dep_constituent)
 
     return mwe, mods, apps
 
 
-def get_constituents(mention_heads):
-    return {head: Constituent(head) for head in mention_heads}
+def get_constituents(doc, mention_heads):
+    return {head: Constituent(doc, head) for head in mention_heads}
 
 
-def get_named_entities(nafobj):
+def get_named_entities(doc):
     '''
     Function that runs to entity layer and registers named entities
-    :param nafobj: the input nafobject
+    :param doc: DocumentInformation of the input naf
     :return: dictionary of entities, linked to span and entity type
     '''
     entities = {}
     found_spans = []
-    for entity in nafobj.get_entities():
-        etype = entity.get_type()
-        for ref in entity.get_references():
-            espan = ref.get_span().get_span_ids()
-            head_term = find_head_in_span(espan)
+    for etype, espans in doc.entities:
+        for espan in espans:
+            head_term = find_head_in_span(doc, espan)
             myConstituent = Constituent(
+                doc,
                 head_term,
                 multiword=espan,
                 etype=etype
@@ -128,27 +128,28 @@ def get_named_entities(nafobj):
     return entities
 
 
-def find_head_in_span(span):
+def find_head_in_span(doc, span):
     '''
     Function that return the identifier of the head in the span
+    :param doc: DocumentInformation of the input naf
     :param span: list of term identiers
     :return: term_id
     '''
 
     head_term = None
     for term in span:
-        constituent = get_constituent(term)
+        constituent = doc.get_constituent(term)
         if set(span) < constituent:
             if head_term is None:
                 head_term = term
         #    else:
         #        print('span has more than one head')
     if head_term is None:
-        head_term = find_closest_to_head(span)
+        head_term = find_closest_to_head(doc, span)
     return head_term
 
 
-def find_closest_to_head(span):
+def find_closest_to_head(doc, span):
 
     if len(span) == 1:
         return span[0]
@@ -156,9 +157,9 @@ def find_closest_to_head(span):
     head_term_candidates = defaultdict(list)
 
     for tid in span:
-        if tid in csts.head2deps:
+        if tid in doc.head2deps:
             count = 0
-            for deprel in csts.head2deps:
+            for deprel in doc.head2deps:
                 if deprel[0] in span:
                     count += 1
             head_term_candidates[count].append(tid)
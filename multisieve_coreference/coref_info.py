@@ -22,6 +22,8 @@ class CoreferenceInformation:
 
     def __init__(self, coref_classes=None, id_counter=0):
         self.id_counter = id_counter
+        # Number of times `self.merge` was called (for profiling)
+        self.merge_count = 0
         self.coref_classes = {} if coref_classes is None else coref_classes
         for cID, mentions in self.coref_classes.items():
             if not isinstance(mentions, MutableSet):
@@ -99,6 +101,7 @@ class CoreferenceInformation:
 
         :return:    mapping of {original ID: new ID} for removed IDs only
         """
+        self.merge_count += 1
         # This is O(n * m), with n the number of coreference classes and
         # m the total number of mentions :(
         classes_to_merge = {
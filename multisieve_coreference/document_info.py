@@ -0,0 +1,399 @@
+"""
+This module contains the per-document state of the resolver.
+
+Everything that is derived from one input document (an index of its tokens
+and terms, its entities, the dependency trees, the mappings from offsets to
+strings and between sentences, tokens, offsets and terms) lives in a
+`DocumentInformation` object that is passed to the functions that need it.
+These are created once per document and shared by mention extraction,
+quotation detection, the sieves and the output. Nothing is stored at module
+level, so several documents can be resolved at the same time in one process.
+"""
+import logging
+from collections import OrderedDict, defaultdict, namedtuple
+
+from .constituency_tree import ConstituencyTrees
+from .mention_data import get_stop_words
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+NOMINAL_POS = frozenset(['noun', 'pron', 'name'])
+DOUBLE_QUOTES = frozenset(['"', '&amp;amp;amp;quot;'])
+SINGLE_QUOTE = "'"
+# What `DocumentInformation.release` drops: everything that is only needed
+# to find the mentions and quotations
+EXTRACTION_ATTRIBUTES = (
+    'nafobj', 'tokens', 'terms', 'entities', 'tree', 'head2deps',
+    'dep2heads', 'term_position', 'token2term', 'sentence2terms',
+    'mention_heads', 'quotations', 'offset2lemma', 'offset2lemma_id',
+)
+
+TokenInfo = namedtuple(
+    'TokenInfo',
+    ['id', 'offset', 'length', 'text', 'sentence']
+)
+TermInfo = namedtuple(
+    'TermInfo',
+    ['id', 'offset', 'length', 'pos', 'lemma', 'morphofeat', 'type',
+     'sentence', 'token_ids']
+)
+
+
+class DocumentInformation(object):
+    '''
+    Information about one NAF document that is used throughout the resolver.
+
+    It is not changed after construction, except by `release`.
+    '''
+
+    def __init__(self, tokens, terms, head2deps, entities, lang='nl',
+                 term_filter=None, columns=False, nafobj=None, tree=None,
+                 strings=None):
+        '''
+        Use `from_naf` to create this from a NAF object, or
+        `naf_reader.read_naf` to create it directly from a NAF file.
+
+        :param tokens:      ordered dictionary of {token ID: TokenInfo}
+        :param terms:       ordered dictionary of {term ID: TermInfo}
+        :param head2deps:   {head term ID: {(dependent term ID, function)}}
+                            for all dependencies in the document
+        :param entities:    list of (entity type, [term ID span, ...]) for all
+                            entities in the document
+        :param lang:        language of the stop word list
+        :param term_filter: (nafobj, term ID) -> bool function deciding which
+                            terms are part of the dependency trees (default:
+                            all terms except punctuation)
+        :param columns:     whether to also create a columnar representation
+                            (`columns.DocumentColumns`), which requires NumPy.
+                            It speeds up very long spans; gap filling is
+                            fast without it too.
+        :param nafobj:      the input NAF object, if there is one
+        :param tree:        `ConstituencyTrees` that was already created from
+                            `head2deps` and `term_filter` (e.g. by an earlier
+                            run), in which case these are not used
+        :param strings:     `StringTable` to intern the surface strings and
+                            lemmas in. Pass the same table to the documents
+                            of a batch to share it between them (default: a
+                            new table for this document).
+        '''
+        self.nafobj = nafobj
+        self.tokens = tokens
+        self.terms = terms
+        self.entities = entities
+
+        if strings is None:
+            strings = StringTable()
+        self.strings = strings
+
+        logger.debug("create document indexes")
+        self._index_terms(tokens, terms)
+        self._index_tokens(tokens)
+
+        self.columns = None
+        if columns:
+            self.columns = get_columns(
+                self.tokens, self.terms, self.term_position)
+
+        logger.debug("get_stop_words")
+        self.stop_words = get_stop_words(lang)
+
+        if tree is None:
+            logger.debug("create dependency trees")
+            if term_filter is None:
+                term_filter = self.is_not_punctuation
+            tree = ConstituencyTrees(ConstituencyTrees.filter_headdep_dict(
+                head2deps,
+                lambda t: term_filter(nafobj, t)
+            ))
+        self.tree = tree
+        self.head2deps = self.tree.head2deps
+        self.dep2heads = self.tree.dep2heads
+
+    @classmethod
+    def from_naf(cls, nafobj, **kwargs):
+        '''
+        Create the information of a NAF object
+
+        :param nafobj:  the input NAF object
+        :param kwargs:  see `__init__`
+        '''
+        logger.debug("index tokens and terms")
+        tokens = index_tokens(nafobj)
+        terms = index_terms(nafobj, tokens)
+        entities = [
+            (entity.get_type(), [
+                ref.get_span().get_span_ids()
+                for ref in entity.get_references()
+            ])
+            for entity in nafobj.get_entities()
+        ]
+        return cls(
+            tokens,
+            terms,
+            ConstituencyTrees.create_headdep_dict(nafobj),
+            entities,
+            nafobj=nafobj,
+            **kwargs
+        )
+
+    def _index_terms(self, tokens, terms):
+        '''
+        Walk the term layer once to create every index of the terms: their
+        positions, the term of every token and offset, the string IDs of
+        the lemmas, the candidate mention heads and the quotations.
+        '''
+        strings = self.strings
+        self.term_position = {}
+        self.token2term = {}
+        self.offset2term = {}
+        self.offset2lemma_id = {}
+        self.mention_heads = []
+        quotations = QuotationScanner()
+        for position, term in enumerate(terms.values()):
+            tid = term.id
+            self.term_position[tid] = position
+            for wid in term.token_ids:
+                self.token2term[wid] = tid
+                self.offset2term[tokens[wid].offset] = tid
+            self.offset2lemma_id[term.offset] = strings.add(term.lemma)
+            if is_mention_head(term):
+                self.mention_heads.append(tid)
+            quotations.add(term)
+        self.quotations = quotations.quotations
+        self.offset2lemma = {
+            offset: strings[sid]
+            for offset, sid in self.offset2lemma_id.items()
+        }
+
+    def _index_tokens(self, tokens):
+        '''
+        Walk the text layer once to create every index of the tokens: their
+        offsets and positions, the string IDs of their texts and the terms
+        of every sentence. Needs the indexes of `_index_terms`.
+        '''
+        strings = self.strings
+        token2term = self.token2term
+        # Position of every token (by offset) in document order
+        self.token_offsets = []
+        self.token_position = {}
+        self.offset2string_id = {}
+        self.offset2string = {}
+        # For every token in a sentence, the ID of its term (or None if it
+        # isn't part of a term)
+        self.sentence2terms = defaultdict(list)
+        for position, token in enumerate(tokens.values()):
+            offset = token.offset
+            self.token_offsets.append(offset)
+            self.token_position.setdefault(offset, position)
+            sid = self.offset2string_id[offset] = strings.add(token.text)
+            self.offset2string[offset] = strings[sid]
+            self.sentence2terms[token.sentence].append(token2term.get(token.id))
+
+    def is_not_punctuation(self, nafobj, term_id):
+        return self.terms[term_id].pos != 'punct'
+
+    def release(self):
+        '''
+        Drop the references to everything that is only needed to find the
+        mentions and quotations (see `EXTRACTION_ATTRIBUTES`), so that its
+        memory can be freed before the sieves run.
+
+        What the sieves, post-processing and the output need is kept: the
+        strings of the tokens, their offsets and positions, the token offsets
+        of the columns and `offset2term`.
+        '''
+        for name in EXTRACTION_ATTRIBUTES:
+            setattr(self, name, None)
+        if self.columns is not None:
+            self.columns.release()
+
+    def get_constituent(self, head):
+        """
+        Get all the terms in the constituent of which `head` is the head.
+        """
+        return self.tree.get_constituent(head)
+
+    def get_string_from_offsets(self, id_span):
+        """
+        Get the surface string of the tokens at the offsets in `id_span`.
+        """
+        return ' '.join(map(self.offset2string.get, id_span)).rstrip()
+
+    def get_ids_from_offsets(self, id_span):
+        """
+        Get the string IDs of the tokens at the offsets in `id_span`, which
+        can be compared instead of the result of `get_string_from_offsets`.
+        """
+        return tuple(map(self.offset2string_id.get, id_span))
+
+
+class StringTable(object):
+    '''
+    Interned strings with integer IDs
+
+    Every distinct string is stored once, so documents that share a table
+    share the memory of repeated words, and strings can be compared by ID.
+    '''
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, string):
+        '''
+        Get the ID of `string`, adding it to the table if it is new
+        '''
+        try:
+            return self.ids[string]
+        except KeyError:
+            sid = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+            return sid
+
+    def __getitem__(self, sid):
+        return self.strings[sid]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+def is_mention_head(term):
+    '''
+    Whether a term can be the head of a mention: a noun, pronoun or name, or
+    a possessive pronoun
+
+    :param term:    TermInfo
+    '''
+    return term.pos in NOMINAL_POS or (
+        term.pos == 'det' and 'VNW(bez' in term.morphofeat)
+
+
+class QuotationScanner(object):
+    '''
+    Finds the quotations of a document while its terms are added one by one,
+    in document order.
+
+    A quotation runs from a quote mark to the next one of the same kind.
+    Double quotes are assumed to never be embedded in single quotes: a
+    single quotation that contains a double quote is dropped.
+    '''
+
+    def __init__(self):
+        # List of (begin quote term ID, end quote term ID, (term ID, ...))
+        self.quotations = []
+        self.double = None
+        self.single = None
+
+    def add(self, term):
+        if term.lemma in DOUBLE_QUOTES:
+            self.double = self._add_quote(self.double, term.id)
+            # break off single quotation if double quotation found during this
+            self.single = None
+        elif self.double is not None:
+            self.double[1].append(term.id)
+
+        if term.lemma == SINGLE_QUOTE:
+            self.single = self._add_quote(self.single, term.id)
+        elif self.single is not None:
+            self.single[1].append(term.id)
+
+    def _add_quote(self, quotation, tid):
+        '''
+        Open a quotation, or close `quotation` if it is open
+
+        :return:    the open quotation ([begin ID, [term ID, ...]]) or None
+        '''
+        if quotation is None:
+            return [tid, []]
+        self.quotations.append((quotation[0], tid, tuple(quotation[1])))
+        return None
+
+
+def get_columns(tokens, terms, term_index=None):
+    '''
+    Create a `columns.DocumentColumns` (which requires NumPy)
+
+    NumPy is only imported here, so that it doesn't slow down start-up.
+    '''
+    from .columns import DocumentColumns
+    return DocumentColumns(tokens, terms, term_index)
+
+
+def index_tokens(nafobj):
+    '''
+    Read the text layer once
+
+    :param nafobj:  input NAF object
+    :return:        ordered dictionary of {token ID: TokenInfo}, in document
+                    order
+    '''
+    tokens = OrderedDict()
+    for token in nafobj.get_tokens():
+        tokens[token.get_id()] = TokenInfo(
+            id=token.get_id(),
+            offset=int(token.get_offset()),
+            length=int(token.get_length()),
+            text=token.get_text(),
+            sentence=token.get_sent(),
+        )
+    return tokens
+
+
+def index_terms(nafobj, tokens):
+    '''
+    Read the term layer once
+
+    The offset of a term is the lowest offset of its tokens and its length
+    runs from the start of its first token to the end of its last token.
+    The sentence of a term is the sentence (as an integer) of its first
+    token, or None if that isn't known.
+
+    :param nafobj:  input NAF object
+    :param tokens:  result of `index_tokens`
+    :return:        ordered dictionary of {term ID: TermInfo}, in document
+                    order
+    '''
+    terms = OrderedDict()
+    for term in nafobj.get_terms():
+        tid = term.get_id()
+        terms[tid] = make_term_info(
+            tokens,
+            tid,
+            tuple(term.get_span_ids()),
+            pos=term.get_pos(),
+            lemma=term.get_lemma(),
+            morphofeat=term.get_morphofeat(),
+            type=term.get_type(),
+        )
+    return terms
+
+
+def make_term_info(tokens, term_id, token_ids, **attributes):
+    '''
+    Create the TermInfo of one term
+
+    :param tokens:      ordered dictionary of {token ID: TokenInfo}
+    :param term_id:     ID of the term
+    :param token_ids:   tuple of the IDs of the tokens of the term
+    :param attributes:  pos, lemma, morphofeat and type of the term
+    :return:            TermInfo
+    '''
+    term_tokens = [tokens[wid] for wid in token_ids]
+
+    length = 0
+    expected_offset = 0
+    for token in term_tokens:
+        length += token.length
+        if expected_offset != 0 and expected_offset != token.offset:
+            length += token.offset - expected_offset
+        expected_offset = token.offset + token.length
+
+    sentence = term_tokens[0].sentence
+    return TermInfo(
+        id=term_id,
+        offset=min(token.offset for token in term_tokens),
+        length=length,
+        sentence=None if sentence is None else int(sentence),
+        token_ids=token_ids,
+        **attributes
+    )
@@ -1,12 +1,18 @@
 import logging
 
-from KafNafParserPy.span_data import Cspan, Ctarget
-from KafNafParserPy.coreference_data import  Ccoreference
-
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
 
-def add_coreference_to_naf(nafobj, corefclasses, mentions):
+def add_coreference_to_naf(nafobj, corefclasses, mentions,
+                           offset2termid=None):
+    '''
+    Add the coreference classes to the coreferences layer of `nafobj`
+
+    :param offset2termid:   {token offset: term ID}, e.g.
+                            `DocumentInformation.offset2term` (by default it
+                            is created from `nafobj`)
+    '''
+    from KafNafParserPy.coreference_data import Ccoreference
 
     start_count = get_starting_count(nafobj)
     coref_according_to_offset = get_ordered_coreference_chains(
@@ -14,7 +20,8 @@ def add_coreference_to_naf(nafobj, corefclasses, mentions):
         mentions
     )
 
-    offset2termid = get_offset_to_term_id_dict(nafobj)
+    if offset2termid is None:
+        offset2termid = get_offset_to_term_id_dict(nafobj)
 
     for mids in coref_according_to_offset:
         mids = set(mids)
@@ -52,6 +59,7 @@ def create_span(term_id_span, head_id):
     :param head_id: identifier for the head id
     :return: naf span object
     '''
+    from KafNafParserPy.span_data import Cspan, Ctarget
 
     mySpan = Cspan()
     for term in term_id_span:
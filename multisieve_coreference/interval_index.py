@@ -0,0 +1,190 @@
+"""
+This module contains an index of items that cover an interval of offsets,
+such as mentions and quotations.
+
+The items are kept in a centered interval tree, which finds the items whose
+interval contains an offset without looking at the others, and in a list
+sorted by the begin of their interval, which finds the items that begin in a
+range by bisecting. Together these find the items that contain, are
+contained in or overlap a given interval instead of comparing the interval
+with every item.
+"""
+from bisect import bisect_left, bisect_right
+
+
+class IntervalIndex(object):
+    '''
+    Items with an interval [begin, end] (both inclusive).
+
+    Every query only looks at the items whose interval contains the begin of
+    the queried interval or that begin inside it, however long the intervals
+    of the other items are. Every query returns the items in the order they
+    were given in.
+    '''
+
+    def __init__(self, items, get_interval):
+        '''
+        :param items:           items to index
+        :param get_interval:    (item) -> (begin, end) function, that returns
+                                None for an item that should not be indexed
+        '''
+        entries = []
+        for position, item in enumerate(items):
+            interval = get_interval(item)
+            if interval is not None:
+                begin, end = interval
+                entries.append((begin, position, end, item))
+        entries.sort(key=lambda entry: entry[:2])
+
+        self.begins = [entry[0] for entry in entries]
+        self.positions = [entry[1] for entry in entries]
+        self.ends = [entry[2] for entry in entries]
+        self.items = [entry[3] for entry in entries]
+        self.tree = IntervalNode.create(
+            range(len(entries)), self.begins, self.ends)
+
+    def __len__(self):
+        return len(self.items)
+
+    def get_items(self, found):
+        '''
+        Get the items at the sorted indexes in `found` in the order they
+        were given in
+        '''
+        found = sorted(found, key=self.positions.__getitem__)
+        return [self.items[i] for i in found]
+
+    def stabbing(self, offset):
+        '''
+        Get the sorted indexes of the items whose interval contains `offset`
+        '''
+        found = []
+        node = self.tree
+        while node is not None:
+            node.stab(offset, self.begins, self.ends, found)
+            if offset < node.center:
+                node = node.left
+            elif offset > node.center:
+                node = node.right
+            else:
+                break
+        return found
+
+    def containing(self, begin, end):
+        '''
+        Get the items whose interval contains [begin, end]
+        '''
+        ends = self.ends
+        return self.get_items(
+            i for i in self.stabbing(begin) if ends[i] >= end)
+
+    def contained_in(self, begin, end):
+        '''
+        Get the items whose interval is contained in [begin, end]
+        '''
+        ends = self.ends
+        return self.get_items(
+            i for i in range(bisect_left(self.begins, begin),
+                             bisect_right(self.begins, end))
+            if ends[i] <= end
+        )
+
+    def overlapping(self, begin, end):
+        '''
+        Get the items whose interval has at least one offset in common with
+        [begin, end]
+        '''
+        # The items that contain `begin` and the items that begin after it
+        # (but not after `end`) don't have any item in common
+        found = self.stabbing(begin)
+        found.extend(range(bisect_right(self.begins, begin),
+                           bisect_right(self.begins, end)))
+        return self.get_items(found)
+
+
+class IntervalNode(object):
+    '''
+    Node of a centered interval tree
+
+    A node keeps the items whose interval contains its `center`, sorted by
+    begin and by end. The items whose interval ends before the center are in
+    the `left` subtree and those that begin after it in the `right` subtree.
+    '''
+
+    __slots__ = ('center', 'by_begin', 'by_end', 'left', 'right')
+
+    def __init__(self, center, by_begin, by_end, left, right):
+        self.center = center
+        self.by_begin = by_begin
+        self.by_end = by_end
+        self.left = left
+        self.right = right
+
+    @classmethod
+    def create(cls, indexes, begins, ends):
+        '''
+        Create a tree of the items at `indexes`, or None if there are none
+
+        :param indexes: sorted indexes into `begins` and `ends`
+        :param begins:  begin of the interval of every item
+        :param ends:    end of the interval of every item
+        '''
+        indexes = list(indexes)
+        if not indexes:
+            return None
+        # The median begin splits the items in two halves, so that the depth
+        # of the tree is logarithmic
+        center = begins[indexes[len(indexes) // 2]]
+        left = []
+        right = []
+        here = []
+        for i in indexes:
+            if ends[i] < center:
+                left.append(i)
+            elif begins[i] > center:
+                right.append(i)
+            else:
+                here.append(i)
+        return cls(
+            center,
+            here,
+            sorted(here, key=ends.__getitem__, reverse=True),
+            cls.create(left, begins, ends),
+            cls.create(right, begins, ends),
+        )
+
+    def stab(self, offset, begins, ends, found):
+        '''
+        Add the items of this node whose interval contains `offset` to
+        `found`
+        '''
+        if offset < self.center:
+            # All of them end at or after the center
+            for i in self.by_begin:
+                if begins[i] > offset:
+                    break
+                found.append(i)
+        elif offset > self.center:
+            # All of them begin at or before the center
+            for i in self.by_end:
+                if ends[i] < offset:
+                    break
+                found.append(i)
+        else:
+            found.extend(self.by_begin)
+
+
+def get_span_interval(span):
+    '''
+    Get the smallest interval that contains all offsets in `span`
+
+    A span that contains all offsets of another span also contains its
+    interval, so an `IntervalIndex` of these intervals finds the candidates
+    for set containment of spans (which then still need to be checked).
+
+    :param span:    sequence of offsets
+    :return:        (begin, end), or None if `span` is empty
+    '''
+    if not span:
+        return None
+    return min(span), max(span)
@@ -0,0 +1,84 @@
+"""
+This module lets the resolver run as a long-lived worker that reads
+documents from stdin and writes results to stdout, one JSON object per line.
+
+Every input line is an object with the NAF document as text under "naf" and
+an optional "id" that is copied to the output:
+
+    {"id": "doc1", "naf": "<?xml version=..."}
+
+For every input line (including blank lines, which are invalid requests)
+exactly one output line is written, in input order, containing either the
+resulting NAF or an error message:
+
+    {"id": "doc1", "naf": "<?xml version=..."}
+    {"id": "doc2", "error": "..."}
+
+When profiling, successful responses also contain a "profile" object (see
+`profiling.Profiler.as_dict`).
+"""
+import sys
+import json
+import logging
+
+from .batch import init_worker, process_document
+from .profiling import Profiler, NULL_PROFILER
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+
+def handle_request(line, profile=False, **kwargs):
+    '''
+    Process one input line
+
+    :param line:    JSON encoded request
+    :param profile: whether to add a profile of the pipeline stages to the
+                    response
+    :param kwargs:  passed on to `process_document`
+    :return:        response dictionary
+    '''
+    if not line.strip():
+        return {'id': None, 'error': "Invalid request: empty line"}
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object")
+    except ValueError as e:
+        return {'id': None, 'error': "Invalid request: {}".format(e)}
+
+    response = {'id': request.get('id')}
+    if 'naf' not in request:
+        response['error'] = "Request has no 'naf' field"
+        return response
+
+    try:
+        profiler = Profiler() if profile else NULL_PROFILER
+        result = process_document(
+            request['naf'].encode('utf-8'), profiler=profiler, **kwargs)
+        response['naf'] = result.decode('utf-8')
+        if profile:
+            response['profile'] = profiler.as_dict()
+    except Exception as e:
+        logger.exception("Could not process document {!r}".format(
+            response['id']))
+        response['error'] = "Could not process document: {}".format(e)
+    return response
+
+
+def run(infile=None, outfile=None, **kwargs):
+    '''
+    Handle requests from `infile` until it is closed
+
+    :param infile:  file to read requests from (default: stdin)
+    :param outfile: file to write responses to (default: stdout)
+    :param kwargs:  passed on to `handle_request`
+    '''
+    infile = sys.stdin if infile is None else infile
+    outfile = sys.stdout if outfile is None else outfile
+    init_worker()
+    # `readline` doesn't wait for a full read-ahead buffer like iterating does
+    # in Python 2, so every response is written as soon as possible
+    for line in iter(infile.readline, ''):
+        response = handle_request(line, **kwargs)
+        outfile.write(json.dumps(response) + '\n')
+        outfile.flush()
@@ -0,0 +1,255 @@
+"""
+This module contains the collection of mentions of a document.
+
+A `MentionCollection` behaves like the ordered dictionary of {mention ID:
+`Cmention`} the sieves used to get, and keeps indexes of the mentions by
+sentence, head, head part of speech, entity type and span, so that the
+sieves can look up the mentions they compare a mention with instead of
+going through all of them. Mentions whose span contains or is contained in
+another span are found with an `IntervalIndex`.
+"""
+from collections import OrderedDict, defaultdict
+
+from .interval_index import IntervalIndex, get_span_interval
+
+
+class MentionCollection(object):
+    '''
+    Mentions in a fixed order (the order they were added in), with indexes.
+
+    Every query returns mentions in that order, so that a sieve that looks
+    up candidates finds them in the same order as when it would go through
+    all mentions.
+
+    The indexes are created when they are first used and thrown away when a
+    mention is added or removed. They are not updated when the attributes of
+    a mention change, so call `reindex` after changing the sentence, head,
+    head part of speech, entity type or span of a mention that is already in
+    the collection.
+    '''
+
+    def __init__(self, mentions=()):
+        '''
+        :param mentions:    dictionary of {mention ID: mention} or iterable of
+                            (mention ID, mention) pairs
+        '''
+        self.mentions = OrderedDict(mentions)
+        self.reindex()
+
+    def __repr__(self):
+        return self.__class__.__name__ + '(' + \
+            repr(list(self.mentions.items())) + ')'
+
+    def __len__(self):
+        return len(self.mentions)
+
+    def __iter__(self):
+        return iter(self.mentions)
+
+    def __contains__(self, mid):
+        return mid in self.mentions
+
+    def __getitem__(self, mid):
+        return self.mentions[mid]
+
+    def __setitem__(self, mid, mention):
+        self.mentions[mid] = mention
+        self.reindex()
+
+    def __delitem__(self, mid):
+        del self.mentions[mid]
+        self.reindex()
+
+    def get(self, mid, default=None):
+        return self.mentions.get(mid, default)
+
+    def keys(self):
+        return self.mentions.keys()
+
+    def values(self):
+        return self.mentions.values()
+
+    def items(self):
+        return self.mentions.items()
+
+    def reindex(self):
+        '''
+        Throw away all indexes, so that they are created again when needed
+        '''
+        self.positions = None
+        self.indexes = {}
+
+    def position(self, mention):
+        '''
+        Get the position of a mention in the collection
+        '''
+        if self.positions is None:
+            self.positions = {
+                id(m): i for i, m in enumerate(self.mentions.values())
+            }
+        return self.positions[id(mention)]
+
+    def index(self, name, key):
+        '''
+        Get (and create if needed) an index of the mentions
+
+        :param name:    name of the index, e.g. the name of the attribute of
+                        the mentions it is on
+        :param key:     (mention) -> key function of the index
+        :return:        {key: [mention, ...]} (in collection order)
+        '''
+        try:
+            return self.indexes[name]
+        except KeyError:
+            pass
+        index = defaultdict(list)
+        for mention in self.mentions.values():
+            index[key(mention)].append(mention)
+        # Don't let lookups add keys
+        index = self.indexes[name] = dict(index)
+        return index
+
+    def index_all(self, name, get_keys):
+        '''
+        Get (and create if needed) an index in which a mention can have
+        several keys
+
+        :param name:        name of the index
+        :param get_keys:    (mention) -> iterable of keys function of the
+                            index
+        :return:            {key: [mention, ...]} (in collection order)
+        '''
+        try:
+            return self.indexes[name]
+        except KeyError:
+            pass
+        index = defaultdict(list)
+        for mention in self.mentions.values():
+            for key in set(get_keys(mention)):
+                index[key].append(mention)
+        index = self.indexes[name] = dict(index)
+        return index
+
+    def lookup_all(self, name, get_keys, values):
+        '''
+        Get the mentions that have all of (non-empty) `values` among their
+        keys in an index
+
+        :param name:        name of the index (see `index_all`)
+        :param get_keys:    keys function of the index (see `index_all`)
+        :param values:      keys to look up
+        :return:            list of mentions (in collection order)
+        '''
+        index = self.index_all(name, get_keys)
+        # Start from the key with the fewest mentions
+        found_lists = sorted(
+            (index.get(value, []) for value in set(values)), key=len)
+        found = list(found_lists[0])
+        for other in found_lists[1:]:
+            if not found:
+                break
+            others = set(map(id, other))
+            found = [mention for mention in found if id(mention) in others]
+        return found
+
+    def lookup(self, name, key, values):
+        '''
+        Get the mentions whose key in an index is one of `values`
+
+        :param name:    name of the index (see `index`)
+        :param key:     key function of the index (see `index`)
+        :param values:  keys to look up
+        :return:        list of mentions (in collection order)
+        '''
+        index = self.index(name, key)
+        values = set(values)
+        if len(values) == 1:
+            return list(index.get(values.pop(), ()))
+        found = []
+        for value in values:
+            found.extend(index.get(value, ()))
+        return self.in_order(found)
+
+    def in_order(self, mentions):
+        '''
+        Sort `mentions` (that are in the collection) in collection order
+        '''
+        if len(mentions) < 2:
+            return list(mentions)
+        return sorted(mentions, key=self.position)
+
+    def in_sentences(self, *sentence_numbers):
+        return self.lookup(
+            'sentence_number', lambda m: m.sentence_number, sentence_numbers)
+
+    def with_head_offset(self, *head_offsets):
+        return self.lookup(
+            'head_offset', lambda m: m.head_offset, head_offsets)
+
+    def with_head_pos(self, *head_pos):
+        return self.lookup('head_pos', lambda m: m.head_pos, head_pos)
+
+    def with_entity_type(self, *entity_types):
+        return self.lookup(
+            'entity_type', lambda m: m.entity_type, entity_types)
+
+    def with_span(self, span):
+        '''
+        Get the mentions whose span contains exactly the offsets in `span`
+        (in any order)
+        '''
+        return self.lookup(
+            'span', lambda m: get_span_key(m.span), [get_span_key(span)])
+
+    def interval_index(self, name, get_interval):
+        '''
+        Get (and create if needed) an `IntervalIndex` of the mentions
+
+        :param name:            name of the index
+        :param get_interval:    (mention) -> (begin, end) function of the
+                                index, that returns None for mentions that
+                                should be left out
+        :return:                IntervalIndex (that returns mentions in
+                                collection order)
+        '''
+        try:
+            return self.indexes[name]
+        except KeyError:
+            pass
+        index = self.indexes[name] = IntervalIndex(
+            self.mentions.values(), get_interval)
+        return index
+
+    def span_index(self):
+        return self.interval_index(
+            'span_interval', lambda m: get_span_interval(m.span))
+
+    def containing(self, span):
+        '''
+        Get the mentions whose span contains all offsets in (non-empty)
+        `span`
+        '''
+        span = set(span)
+        return [
+            mention
+            for mention in self.span_index().containing(
+                *get_span_interval(span))
+            if span.issubset(mention.span)
+        ]
+
+    def contained_in(self, span):
+        '''
+        Get the mentions whose span only contains offsets in (non-empty)
+        `span`
+        '''
+        span = set(span)
+        return [
+            mention
+            for mention in self.span_index().contained_in(
+                *get_span_interval(span))
+            if span.issuperset(mention.span)
+        ]
+
+
+def get_span_key(span):
+    return frozenset(span)
@@ -3,6 +3,7 @@ This module parses the term layer of a KAF/NAF object
 """
 from __future__ import print_function
 import os
+import threading
 
 from .offset_info import (
     convert_term_ids_to_offsets,
@@ -11,32 +12,63 @@ from .offset_info import (
     get_pos_of_term,
 )
 
-stop_words = []
-
-
-def initiate_stopword_list(lang='nl'):
-
-    global stop_words
-    resources = os.path.abspath(os.path.join(
-        os.path.dirname(__file__),
-        "resources"
-    ))
-
-    stopfile = open(os.path.join(resources, lang, 'stop_words.txt'), 'r')
-    for line in stopfile:
-        stop_words.append(line.rstrip())
-
-    stopfile.close()
-
-
-class Cmention:
+# Stop word lists are shared by all documents and never changed after
+# loading, so they can be used from several threads at once
+_stop_words = {}
+_stop_words_lock = threading.Lock()
+
+
+def get_stop_words(lang='nl'):
+    """
+    Get the stop words of `lang` as a frozenset.
+
+    The list is only read from disk the first time it is requested for
+    `lang`, so calling this once per document is cheap.
+    """
+    try:
+        return _stop_words[lang]
+    except KeyError:
+        pass
+
+    with _stop_words_lock:
+        if lang not in _stop_words:
+            resources = os.path.abspath(os.path.join(
+                os.path.dirname(__file__),
+                "resources"
+            ))
+            with open(os.path.join(resources, lang, 'stop_words.txt'),
+                      'r') as stopfile:
+                _stop_words[lang] = frozenset(
+                    line.rstrip() for line in stopfile)
+    return _stop_words[lang]
+
+
+class Cmention(object):
     '''
     This class covers information about mentions that is relevant for
     coreference resolution.
 
-    `span` and other things store _offsets_.
+    `span` and other things store _offsets_, as tuples: `span`,
+    `relaxed_span`, `full_head`, `no_stop_words` and `main_modifiers` are
+    tuples of offsets and `modifiers`, `appositives` and `predicatives` are
+    tuples of such tuples. Mentions have no `__dict__`, so many of them can
+    be kept in memory at once.
+
+    The strings that the sieves compare for every pair of mentions are
+    stored on the mention by `add_strings`.
     '''
 
+    __slots__ = (
+        'id', 'span', 'head_offset', 'head_pos', 'full_head', 'begin_offset',
+        'end_offset', 'sentence_number', 'relaxed_span', 'no_stop_words',
+        'coreference_prohibited', 'modifiers', 'main_modifiers',
+        'appositives', 'predicatives', 'number', 'gender', 'person',
+        'entity_type', 'in_quotation', 'is_relative_pronoun',
+        'is_reflective_pronoun', 'span_string', 'span_ids',
+        'relaxed_span_ids', 'head_string_id', 'full_head_string',
+        'no_stop_words_string', 'main_modifiers_string', 'span_digits',
+    )
+
     def __init__(
             self,
             id,
@@ -65,14 +97,14 @@ class Cmention:
         #TODO: revise so that provides information needed for some sieve;
         #STEP 1: seive 3 needs option to remove post-head modifiers
 
-        :type span:                    list
+        :type span:                    sequence
         :type head_offset:             int
         :type head_pos:                str
         :type number:                  str
         :type gender:                  str
         :type person:                  str
-        :type full_head:               list
-        :type relaxed_span:            list
+        :type full_head:               sequence
+        :type relaxed_span:            sequence
         :type entity_type:             str
         :type in_quotation:            bool
         :type is_relative_pronoun:     bool
@@ -80,35 +112,35 @@ class Cmention:
         :type coreference_prohibited:  list
         :type begin_offset:            str
         :type end_offset:              str
-        :type modifiers:               list
-        :type appositives:             list
-        :type predicatives:            list
-        :type no_stop_words:           list
-        :type main_modifiers:          list
+        :type modifiers:               sequence of sequences
+        :type appositives:             sequence of sequences
+        :type predicatives:            sequence of sequences
+        :type no_stop_words:           sequence
+        :type main_modifiers:          sequence
         :type sentence_number:         str
         '''
 
         self.id = id   # confirmed
-        self.span = span
+        self.span = tuple(span)
         self.head_offset = head_offset
         self.head_pos = head_pos
 
-        self.full_head = [] if full_head is None else full_head
+        self.full_head = get_offsets(full_head)
 
         self.begin_offset = self.span[0]
         self.end_offset = self.span[-1]
         self.sentence_number = sentence_number
 
-        self.relaxed_span = [] if relaxed_span is None else relaxed_span
-        self.no_stop_words = [] if no_stop_words is None else no_stop_words
+        self.relaxed_span = get_offsets(relaxed_span)
+        self.no_stop_words = get_offsets(no_stop_words)
 
         self.coreference_prohibited = [] if coreference_prohibited is None \
             else coreference_prohibited
 
-        self.modifiers = [] if modifiers is None else modifiers
-        self.main_modifiers = [] if main_modifiers is None else main_modifiers
-        self.appositives = [] if appositives is None else appositives
-        self.predicatives = [] if predicatives is None else predicatives
+        self.modifiers = get_spans(modifiers)
+        self.main_modifiers = get_offsets(main_modifiers)
+        self.appositives = get_spans(appositives)
+        self.predicatives = get_spans(predicatives)
 
         self.number = number
         self.gender = gender
@@ -119,6 +151,15 @@ class Cmention:
         self.is_relative_pronoun = is_relative_pronoun
         self.is_reflective_pronoun = is_reflective_pronoun
 
+        self.span_string = None
+        self.span_ids = None
+        self.relaxed_span_ids = None
+        self.head_string_id = None
+        self.full_head_string = None
+        self.no_stop_words_string = None
+        self.main_modifiers_string = None
+        self.span_digits = None
+
     def __repr__(self):
         return self.__class__.__name__ + '(' + \
             'id={self.id!r}, ' \
@@ -144,29 +185,30 @@ class Cmention:
             ')'.format(self=self)
 
     def add_relaxed_span_offset(self, offset):
-        self.relaxed_span.append(offset)
+        self.relaxed_span += (offset,)
 
     def add_modifier(self, mod):
 
-        self.modifiers.append(mod)
+        self.modifiers += (tuple(mod),)
 
     def add_appositive(self, app):
 
-        self.appositives.append(app)
+        self.appositives += (tuple(app),)
 
     def add_predicative(self, pred):
 
-        self.predicatives.append(pred)
+        self.predicatives += (tuple(pred),)
 
     def add_no_stop_word(self, nsw):
 
-        self.no_stop_words.append(nsw)
+        self.no_stop_words += (nsw,)
 
     def add_main_modifier(self, mmod):
 
-        self.main_modifiers.append(mmod)
+        self.main_modifiers += (mmod,)
 
-    def fill_gaps(self, full_content, allow_adding=lambda _: True):
+    def fill_gaps(self, full_content, allow_adding=lambda _: True,
+                  positions=None):
         """
         Find and fill gaps in the span of this mention.
 
@@ -174,76 +216,134 @@ class Cmention:
         :param allow_adding:  (offset) -> bool function deciding whether a
                               missing term may be added or the gap should be
                               left as is.
+        :param positions:     {thing: index of its first occurrence in
+                              `full_content`}, to not have to search
+                              `full_content` (e.g.
+                              `DocumentInformation.token_position`)
         """
         if len(self.span) >= 2:
-            start = full_content.index(self.span[0])
-            end = full_content.index(self.span[-1], start)
-            self.span = full_content[start:end + 1]
+            if positions is None:
+                start = full_content.index(self.span[0])
+                end = full_content.index(self.span[-1], start)
+            else:
+                start = positions[self.span[0]]
+                end = positions[self.span[-1]]
+            self.span = tuple(full_content[start:end + 1])
 
 
-def create_mention(nafobj, constituentInfo, head, mid):
+def get_offsets(offsets):
+    '''
+    Get a (possibly None) sequence of offsets as a tuple
+    '''
+    return () if offsets is None else tuple(offsets)
+
+
+def get_spans(spans):
+    '''
+    Get a (possibly None) sequence of sequences of offsets as a tuple of
+    tuples
+    '''
+    return () if spans is None else tuple(map(tuple, spans))
+
+
+def create_mention(doc, constituentInfo, head, mid):
     '''
     Function that creates mention object from naf information
-    :param nafobj: the input naffile
+    :param doc: DocumentInformation of the input naffile
     :param constituentInfo: information about the constituent
     :param head: the id of the constituent's head
     :param mid: the mid (for creating a unique mention id
     :return:
     '''
 
-    head_offset = None if head is None else get_offset(nafobj, head)
+    head_offset = None if head is None else get_offset(doc, head)
 
     span = constituentInfo.span
-    offset_ids_span = convert_term_ids_to_offsets(nafobj, span)
+    offset_ids_span = convert_term_ids_to_offsets(doc, span)
     mention = Cmention(mid, span=offset_ids_span, head_offset=head_offset)
-    mention.sentence_number = get_sentence_number(nafobj, head)
+    mention.sentence_number = get_sentence_number(doc, head)
     # add no stop words and main modifiers
-    add_non_stopwords(nafobj, span, mention)
-    add_main_modifiers(nafobj, span, mention)
+    add_non_stopwords(doc, span, mention)
+    add_main_modifiers(doc, span, mention)
     # mwe info
     full_head_tids = constituentInfo.multiword
-    mention.full_head = convert_term_ids_to_offsets(nafobj, full_head_tids)
+    mention.full_head = tuple(
+        convert_term_ids_to_offsets(doc, full_head_tids))
     # modifers and appositives:
     relaxed_span = offset_ids_span
+    modifiers = []
     for mod_in_tids in constituentInfo.modifiers:
-        mod_span = convert_term_ids_to_offsets(nafobj, mod_in_tids)
-        mention.add_modifier(mod_span)
+        mod_span = convert_term_ids_to_offsets(doc, mod_in_tids)
+        modifiers.append(tuple(mod_span))
         for mid in mod_span:
             if mid > head_offset and mid in relaxed_span:
                 relaxed_span.remove(mid)
+    mention.modifiers = tuple(modifiers)
+    appositives = []
     for app_in_tids in constituentInfo.appositives:
-        app_span = convert_term_ids_to_offsets(nafobj, app_in_tids)
-        mention.add_appositive(app_span)
+        app_span = convert_term_ids_to_offsets(doc, app_in_tids)
+        appositives.append(tuple(app_span))
         for mid in app_span:
             if mid > head_offset and mid in relaxed_span:
                 relaxed_span.remove(mid)
-    mention.relaxed_span = relaxed_span
+    mention.appositives = tuple(appositives)
+    # The relaxed span has always been taken out of the span itself (they
+    # used to be the same list), so the span loses these offsets too
+    mention.span = mention.relaxed_span = tuple(relaxed_span)
 
-    for pred_in_tids in constituentInfo.predicatives:
-        pred_span = convert_term_ids_to_offsets(nafobj, pred_in_tids)
-        mention.add_predicative(pred_span)
+    mention.predicatives = tuple(
+        tuple(convert_term_ids_to_offsets(doc, pred_in_tids))
+        for pred_in_tids in constituentInfo.predicatives
+    )
 
     # set sequence of pos FIXME: if not needed till end; remove
     # os_seq = get_pos_of_span(nafobj, span)
     # mention.set_pos_seq(pos_seq)
     # set pos of head
     if head is not None:
-        head_pos = get_pos_of_term(nafobj, head)
+        head_pos = get_pos_of_term(doc, head)
         mention.head_pos = head_pos
         if head_pos in ['pron', 'noun', 'name']:
-            analyze_nominal_information(nafobj, head, mention)
+            analyze_nominal_information(doc, head, mention)
 
-    begin_offset, end_offset = get_offsets_from_span(nafobj, span)
+    begin_offset, end_offset = get_offsets_from_span(doc, span)
     mention.begin_offset = begin_offset
     mention.end_offset = end_offset
 
     return mention
 
 
-def add_main_modifiers(nafobj, span, mention):
+def add_strings(doc, mention):
+    '''
+    Store the strings of a mention that the sieves compare: the surface
+    strings of its span, full head, non stop words and main modifiers, the
+    string IDs of its span, relaxed span and head, and the digits in the
+    surface string of its span.
+
+    The strings are not updated when the mention changes, so call this
+    again after changing its offsets.
+
+    :param doc:     DocumentInformation of the input naf
+    :param mention: Cmention to add the strings to
+    '''
+    span_string = doc.get_string_from_offsets(mention.span)
+    mention.span_string = span_string
+    mention.span_ids = doc.get_ids_from_offsets(mention.span)
+    mention.relaxed_span_ids = doc.get_ids_from_offsets(mention.relaxed_span)
+    mention.head_string_id = doc.offset2string_id.get(mention.head_offset)
+    mention.full_head_string = doc.get_string_from_offsets(mention.full_head)
+    mention.no_stop_words_string = doc.get_string_from_offsets(
+        mention.no_stop_words)
+    mention.main_modifiers_string = doc.get_string_from_offsets(
+        mention.main_modifiers)
+    mention.span_digits = frozenset(
+        character for character in span_string if character.isdigit())
+
+
+def add_main_modifiers(doc, span, mention):
     '''
     Function that creates list of all modifiers that are noun or adjective (possibly including head itself)
-    :param nafobj: input naf
+    :param doc: DocumentInformation of the input naf
     :param span: list of term ids
     :param mention: mention object
     :return:
@@ -251,51 +351,47 @@ def add_main_modifiers(nafobj, span, mention):
 
     main_mods = []
     for tid in span:
-        term = nafobj.get_term(tid)
-        if term.get_pos() in ['adj','noun']:
+        term = doc.terms[tid]
+        if term.pos in ['adj','noun']:
             main_mods.append(tid)
 
-    main_mods_offset = convert_term_ids_to_offsets(nafobj, main_mods)
-    mention.main_modifiers = main_mods_offset
+    main_mods_offset = convert_term_ids_to_offsets(doc, main_mods)
+    mention.main_modifiers = tuple(main_mods_offset)
 
 
-def add_non_stopwords(nafobj, span, mention):
+def add_non_stopwords(doc, span, mention):
     '''
     Function that verifies which terms in span are not stopwords and adds these to non-stop-word list
-    :param nafobj: input naf (for linguistic information)
+    :param doc: DocumentInformation of the input naf (for linguistic information and stop words)
     :param span: list of term ids
     :param mention: mention object
     :return:
     '''
     non_stop_terms = []
+    stop_words = doc.stop_words
 
     for tid in span:
-        my_term = nafobj.get_term(tid)
-        if not my_term.get_type() == 'closed' and not my_term.get_lemma().lower() in stop_words:
+        my_term = doc.terms[tid]
+        if not my_term.type == 'closed' and not my_term.lemma.lower() in stop_words:
             non_stop_terms.append(tid)
 
-    non_stop_span = convert_term_ids_to_offsets(nafobj, non_stop_terms)
-    mention.no_stop_words = non_stop_span
+    non_stop_span = convert_term_ids_to_offsets(doc, non_stop_terms)
+    mention.no_stop_words = tuple(non_stop_span)
 
 
-def analyze_nominal_information(nafobj, term_id, mention):
+def analyze_nominal_information(doc, term_id, mention):
 
-    myterm = nafobj.get_term(term_id)
-    morphofeat = myterm.get_morphofeat()
+    myterm = doc.terms[term_id]
+    morphofeat = myterm.morphofeat
     identify_and_set_person(morphofeat, mention)
     identify_and_set_gender(morphofeat, mention)
     identify_and_set_number(morphofeat, myterm, mention)
     set_is_relative_pronoun(morphofeat, mention)
 
 
-def get_sentence_number(nafobj, head):
-
-    myterm = nafobj.get_term(head)
-    tokid = myterm.get_span().get_span_ids()[0]
-    mytoken = nafobj.get_token(tokid)
-    sent_nr = int(mytoken.get_sent())
+def get_sentence_number(doc, head):
 
-    return sent_nr
+    return doc.terms[head].sentence
 
 
 def identify_and_set_person(morphofeat, mention):
@@ -315,7 +411,7 @@ def identify_and_set_number(morphofeat, myterm, mention):
     elif 'mv' in morphofeat:
         mention.number = 'mv'
     elif 'getal' in morphofeat:
-        lemma = myterm.get_lemma()
+        lemma = myterm.lemma
         if lemma in ['haar', 'zijn', 'mijn', 'jouw', 'je']:
             mention.number = 'ev'
         elif lemma in ['ons', 'jullie', 'hun']:
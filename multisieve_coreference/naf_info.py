@@ -1,52 +1,42 @@
 import logging
-from collections import defaultdict, OrderedDict
+from collections import OrderedDict, defaultdict
 
-from .mention_data import create_mention
+from .mention_data import add_strings, create_mention
+from .mention_collection import MentionCollection
 from .offset_info import (
     convert_term_ids_to_offsets,
     get_offsets_from_span,
-    get_offset
 )
 from .quotation import Cquotation
 from .constituent_info import get_named_entities, get_constituents
 from .quotation_naf import CquotationNaf
-from . import constituents as csts
-from .constituents import get_constituent
+from .profiling import NULL_PROFILER
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
 
-def get_relevant_head_ids(nafobj):
+def get_relevant_head_ids(doc):
     '''
     Returns list of term ids that head potential mention
-    :param nafobj: input nafobj
+    :param doc: DocumentInformation of the input naf
     :return: list of term ids (string)
     '''
 
-    nominal_pos = ['noun', 'pron', 'name']
-    mention_heads = []
-    for term in nafobj.get_terms():
-        pos_tag = term.get_pos()
-        if pos_tag in nominal_pos:
-            mention_heads.append(term.get_id())
-        # check if possessive pronoun
-        elif pos_tag == 'det' and 'VNW(bez' in term.get_morphofeat():
-            mention_heads.append(term.get_id())
+    # These are found while `DocumentInformation` indexes the terms
+    return list(doc.mention_heads)
 
-    return mention_heads
 
-
-def get_mention_spans(nafobj):
+def get_mention_spans(doc):
     '''
-    Function explores various layers of nafobj and retrieves all mentions
+    Function explores various layers of the naf and retrieves all mentions
     possibly referring to an entity
 
-    :param nafobj:  input nafobj
+    :param doc:     DocumentInformation of the input nafobj
     :return:        dictionary of head term with as value constituent object
     '''
-    mention_heads = get_relevant_head_ids(nafobj)
+    mention_heads = get_relevant_head_ids(doc)
     logger.debug("Mention candidate heads: {!r}".format(mention_heads))
-    mention_constituents = get_constituents(mention_heads)
+    mention_constituents = get_constituents(doc, mention_heads)
     if logger.getEffectiveLevel() <= logging.DEBUG:
         import itertools as it
         logger.debug("Mention candidate constituents: {}".format('\n'.join(
@@ -55,35 +45,35 @@ def get_mention_spans(nafobj):
     return mention_constituents
 
 
-def get_string_of_term(nafobj, tid):
+def get_string_of_term(doc, tid):
 
-    my_term = nafobj.get_term(tid)
+    my_term = doc.terms[tid]
     termstring = ''
-    latest_offset = '-1'
+    latest_offset = -1
 
-    for wid in my_term.get_span().get_span_ids():
-        my_tok = nafobj.get_token(wid)
+    for wid in my_term.token_ids:
+        my_tok = doc.tokens[wid]
         # add space between tokens
-        if len(termstring) > 0 and int(my_tok.get_offset) > latest_offset:
+        if len(termstring) > 0 and my_tok.offset > latest_offset:
             termstring += ' '
-        termstring += my_tok.get_text()
-        latest_offset = int(my_tok.get_offset()) + int(my_tok.get_length())
+        termstring += my_tok.text
+        latest_offset = my_tok.offset + my_tok.length
     return termstring
 
 
-def get_string_of_span(nafobj, span):
+def get_string_of_span(doc, span):
 
     mstring = ''
     latest_offset = -1
     for tid in span:
-        my_term = nafobj.get_term(tid)
-        for wid in my_term.get_span().get_span_ids():
-            my_tok = nafobj.get_token(wid)
+        my_term = doc.terms[tid]
+        for wid in my_term.token_ids:
+            my_tok = doc.tokens[wid]
             #add space between tokens
-            if len(mstring) > 0 and int(my_tok.get_offset()) > latest_offset:
+            if len(mstring) > 0 and my_tok.offset > latest_offset:
                 mstring += ' '
-            mstring += my_tok.get_text()
-            latest_offset = int(my_tok.get_offset()) + int(my_tok.get_length())
+            mstring += my_tok.text
+            latest_offset = my_tok.offset + my_tok.length
     return mstring
 
 
@@ -115,108 +105,107 @@ def merge_two_mentions(mention1, mention2):
     return mention2
 
 
-def merge_mentions(mentions):
+def merge_mentions(mentions, profiler=NULL_PROFILER):
     '''
     Function that merges information from entity mentions
+
+    A mention is merged into every earlier kept mention with the same head or
+    the same set of span offsets, which are looked up in indexes instead of
+    comparing it to every kept mention. If there is none, it is kept.
+
     :param mentions: dictionary mapping mention number to specific mention
+    :param profiler: Profiler to count comparisons with
     :return: list of mentions where identical spans are merged
     '''
 
     final_mentions = {}
-
-    # TODO: create merge function and merge identical candidates
+    position = {}
+    # Indexes of the kept mentions, which are updated when merging changes
+    # the head or span of a kept mention
+    by_head = defaultdict(set)
+    by_span = defaultdict(set)
 
     for m, val in mentions.items():
-        found = False
-        for prevm, preval in final_mentions.items():
-            if val.head_offset == preval.head_offset:
-                updated_mention = merge_two_mentions(val, preval)
-                final_mentions[prevm] = updated_mention
-                found = True
-            elif set(val.span) == set(preval.span):
-                # print('same_set')
-                updated_mention = merge_two_mentions(val, preval)
-                final_mentions[prevm] = updated_mention
-                found = True
-        if not found:
+        matches = by_head.get(val.head_offset, set()) | \
+            by_span.get(frozenset(val.span), set())
+        profiler.count('comparisons', len(matches))
+        # Merging into one kept mention doesn't change whether another one
+        # matches, but merge in the order the mentions were kept anyway
+        for prevm in sorted(matches, key=position.get):
+            preval = final_mentions[prevm]
+            head_offset, span = preval.head_offset, preval.span
+            final_mentions[prevm] = merge_two_mentions(val, preval)
+            if preval.head_offset != head_offset:
+                by_head[head_offset].discard(prevm)
+                by_head[preval.head_offset].add(prevm)
+            if preval.span is not span:
+                by_span[frozenset(span)].discard(prevm)
+                by_span[frozenset(preval.span)].add(prevm)
+        if not matches:
+            position[m] = len(position)
             final_mentions[m] = val
+            by_head[val.head_offset].add(m)
+            by_span[frozenset(val.span)].add(m)
 
     return final_mentions
 
 
-def get_mentions(nafobj):
+def get_mentions(doc, profiler=NULL_PROFILER):
     '''
     Function that creates mention objects based on mentions retrieved from NAF
-    :param nafobj: input naf
-    :return: list of Cmention objects
+    :param doc: DocumentInformation of the input naf
+    :param profiler: Profiler to count mention candidates and comparisons with
+    :return: `MentionCollection` of Cmention objects
     '''
 
-    mention_spans = get_mention_spans(nafobj)
+    mention_spans = get_mention_spans(doc)
     mentions = OrderedDict()
     for head, constituentInfo in mention_spans.items():
         mid = 'm' + str(len(mentions))
-        mention = create_mention(nafobj, constituentInfo, head, mid)
+        mention = create_mention(doc, constituentInfo, head, mid)
         mentions[mid] = mention
 
-    entities = get_named_entities(nafobj)
+    entities = get_named_entities(doc)
     for entity, constituent in entities.items():
         mid = 'm' + str(len(mentions))
-        mention = create_mention(nafobj, constituent, entity, mid)
+        mention = create_mention(doc, constituent, entity, mid)
         mention.entity_type = constituent.etype
         mentions[mid] = mention
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         from .util import view_mentions
         logger.debug(
-            "Mentions before merging: {}".format(view_mentions(nafobj, mentions))
+            "Mentions before merging: {}".format(
+                view_mentions(doc, mentions))
         )
 
-    mentions = merge_mentions(mentions)
+    profiler.count('mentions', len(mentions))
+    mentions = merge_mentions(mentions, profiler)
+    # Merging changes spans and heads, so this is only done afterwards
+    for mention in mentions.values():
+        add_strings(doc, mention)
 
-    return mentions
+    return MentionCollection(mentions)
 
 
-def get_quotation_spans(nafobj):
+def get_quotation_spans(doc):
     '''
-    Function that goes through nafobj and identifies spans of quotations
-    :param nafobj: input naf
+    Function that goes through the naf and identifies spans of quotations
+    :param doc: DocumentInformation of the input naf
     :return: list of quotation objects with span defined
     '''
 
     # FIXME investigate on development corpus what to do with embedded
     # quotations; for now we'll assume a double quotation within a single
-    # quote is an error
+    # quote is an error (see `document_info.QuotationScanner`)
 
-    in_double_quotation = False
-    in_single_quotation = False
     quotations = []
-    for term in nafobj.get_terms():
-        if term.get_lemma() in ['"', '&amp;amp;amp;quot;']:
-            if not in_double_quotation:
-                in_double_quotation = True
-                myQuote = CquotationNaf()
-                myQuote.beginquote = term.get_id()
-            else:
-                in_double_quotation = False
-                myQuote.endquote = term.get_id()
-                quotations.append(myQuote)
-            # break off single quotation if double quotation found during this
-            if in_single_quotation:
-                in_single_quotation = False
-        elif in_double_quotation:
-            myQuote.add_span_id(term.get_id())
-
-        if term.get_lemma() == "'":
-            if not in_single_quotation:
-                in_single_quotation = True
-                myQuoteSingle = CquotationNaf()
-                myQuoteSingle.beginquote = term.get_id()
-            else:
-                in_single_quotation = False
-                myQuoteSingle.endquote = term.get_id()
-                quotations.append(myQuoteSingle)
-        elif in_single_quotation:
-            myQuoteSingle.add_span_id(term.get_id())
+    for beginquote, endquote, span in doc.quotations:
+        myQuote = CquotationNaf()
+        myQuote.beginquote = beginquote
+        myQuote.endquote = endquote
+        myQuote.add_span(list(span))
+        quotations.append(myQuote)
 
     return quotations
 
@@ -239,8 +228,9 @@ def find_relevant_spans(deps, outside_ids):
     return None
 
 
-def analyze_head_relations(nafobj, head_term, head2deps):
+def analyze_head_relations(doc, head_term):
 
+    head2deps = doc.head2deps
     dependents = head2deps.get(head_term)
     speaker = None
     addressee = None
@@ -250,43 +240,44 @@ def analyze_head_relations(nafobj, head_term, head2deps):
     if dependents is not None:
         for dep in dependents:
             if dep[1] == 'hd/su':
-                speaker = get_constituent(dep[0])
+                speaker = doc.get_constituent(dep[0])
             elif dep[1] == 'hd/obj2':
-                term = nafobj.get_term(dep[0])
-                if term.get_pos() == 'prep':
+                term = doc.terms[dep[0]]
+                if term.pos == 'prep':
                     if dep[0] in head2deps:
                         for deprel in head2deps.get(dep[0]):
                             if deprel[1] == 'hd/obj1':
-                                addressee = get_constituent(deprel[0])
+                                addressee = doc.get_constituent(deprel[0])
                 else:
-                    addressee = get_constituent(dep[0])
+                    addressee = doc.get_constituent(dep[0])
             elif dep[1] in ['hd/mod']:
-                term = nafobj.get_term(dep[0])
-                if term.get_pos() == 'prep':
+                term = doc.terms[dep[0]]
+                if term.pos == 'prep':
 
                     if dep[0] in head2deps:
                         # override addressee by complement if headed by
                         # preposition
                         for deprel in head2deps.get(dep[0]):
                             if deprel[1] == 'hd/obj1':
-                                if term.get_lemma() == 'tegen':
-                                    addressee = get_constituent(deprel[0])
-                                elif term.get_lemma() == 'over':
-                                    topic = get_constituent(deprel[0])
+                                if term.lemma == 'tegen':
+                                    addressee = doc.get_constituent(
+                                        deprel[0])
+                                elif term.lemma == 'over':
+                                    topic = doc.get_constituent(deprel[0])
 
     return speaker, addressee, topic
 
 
-def identify_direct_links_to_sip(nafobj, quotation):
+def identify_direct_links_to_sip(doc, quotation):
     '''
     Function that identifies
-    :param head2deps: dictionary linking head to dependents
+    :param doc: DocumentInformation of the input naf
     :param quotation: the quotation itself
     :return: boolean indicating whether source was found
     '''
 
     for tid in quotation.span:
-        deps = csts.head2deps.get(tid)
+        deps = doc.head2deps.get(tid)
         if deps is not None:
             # The first element of every tuple
             depids = set(next(iter(zip(*deps))))
@@ -300,25 +291,25 @@ def identify_direct_links_to_sip(nafobj, quotation):
                 head_term = find_relevant_spans(deps, my_joint_set)
                 if head_term is not None:
                     speaker, addressee, topic = analyze_head_relations(
-                        nafobj, head_term, csts.head2deps)
+                        doc, head_term)
                     if speaker is not None:
                         speaker_in_offsets = convert_term_ids_to_offsets(
-                            nafobj, speaker)
+                            doc, speaker)
                         quotation.source = speaker_in_offsets
                     if addressee is not None:
                         addressee_in_offsets = convert_term_ids_to_offsets(
-                            nafobj, addressee)
+                            doc, addressee)
                         quotation.addressee = addressee_in_offsets
                     if topic is not None:
                         topic_in_offsets = convert_term_ids_to_offsets(
-                            nafobj, topic)
+                            doc, topic)
                         quotation.topic = topic_in_offsets
 
 
-def check_if_quotation_contains_dependent(quotation):
+def check_if_quotation_contains_dependent(doc, quotation):
     #FIXME: verify on larger set of development corpus whether this behavior is correct
     for tid in quotation.span:
-        heads = csts.dep2heads.get(tid)
+        heads = doc.dep2heads.get(tid)
         if not heads is None:
             headids = create_set_of_tids_from_tidfunction(heads)
             span_with_quotes = quotation.span + [quotation.beginquote] + [quotation.endquote]
@@ -329,7 +320,7 @@ def check_if_quotation_contains_dependent(quotation):
                             if headrel[1] in ['cmp/body','hd/predc','hd/obj1','hd/vc','hd/su','hd/pc']:
                                 return False
                             elif headrel[1] in ['crd/cnj']:
-                                motherheadrels = csts.dep2heads.get(headrel[0])
+                                motherheadrels = doc.dep2heads.get(headrel[0])
                                 if motherheadrels is not None:
                                     for mhid in motherheadrels:
                                         if mhid[1] in ['cmp/body','hd/predc','hd/obj1','hd/vc','hd/su','hd/pc']:
@@ -344,17 +335,13 @@ def check_if_quotation_contains_dependent(quotation):
     return True
 
 
-def get_sentences_of_quotation(nafobj, quotation):
+def get_sentences_of_quotation(doc, quotation):
 
     sentences = set()
 
     for tid in quotation.span:
-        term = nafobj.get_term(tid)
-        wid = term.get_span().get_span_ids()[0]
-        token = nafobj.get_token(wid)
-        sentence_nr = token.get_sent()
         #storing them as integers; they need to be sorted later
-        sentences.add(int(sentence_nr))
+        sentences.add(doc.terms[tid].sentence)
     return sentences
 
 
@@ -370,12 +357,12 @@ def get_previous_and_next_sentence(sentences):
 
     return previous_sentence, following_sentence
 
-def retrieve_sentence_preceding_sip(nafobj, terms):
+def retrieve_sentence_preceding_sip(doc, terms):
     source_head = None
     for tid in terms:
-        myterm = nafobj.get_term(tid)
-        if myterm.get_lemma() == 'volgens':
-            deps = csts.head2deps.get(tid)
+        myterm = doc.terms[tid]
+        if myterm.lemma == 'volgens':
+            deps = doc.head2deps.get(tid)
             if deps is not None:
                 for dep in deps:
                     if dep[1] == 'hd/obj1':
@@ -384,13 +371,13 @@ def retrieve_sentence_preceding_sip(nafobj, terms):
     return source_head
 
 
-def retrieve_quotation_following_sip(nafobj, terms):
+def retrieve_quotation_following_sip(doc, terms):
 
     source_head = None
     for tid in terms:
-        myterm = nafobj.get_term(tid)
-        if myterm.get_lemma() == 'aldus':
-            deps = csts.head2deps.get(tid)
+        myterm = doc.terms[tid]
+        if myterm.lemma == 'aldus':
+            deps = doc.head2deps.get(tid)
             if deps is not None:
                 for dep in deps:
                     if dep[1] == 'hd/obj1':
@@ -399,46 +386,47 @@ def retrieve_quotation_following_sip(nafobj, terms):
     return source_head
 
 
-def identify_addressee_or_topic_relations(nafobj, tid, quotation):
+def identify_addressee_or_topic_relations(doc, tid, quotation):
 
     #FIXME: language specific function
-    heads = csts.dep2heads.get(tid)
+    heads = doc.dep2heads.get(tid)
     if heads is not None:
         for headrel in heads:
-            headterm = nafobj.get_term(headrel[0])
-            if headterm.get_lemma() == 'tegen' or headrel[1] == 'hd/obj2':
-                myconstituent = get_constituent(headterm.get_id())
-                addressee = convert_term_ids_to_offsets(nafobj, myconstituent)
+            headterm = doc.terms[headrel[0]]
+            if headterm.lemma == 'tegen' or headrel[1] == 'hd/obj2':
+                myconstituent = doc.get_constituent(headterm.id)
+                addressee = convert_term_ids_to_offsets(doc, myconstituent)
                 quotation.addressee = addressee
                 return True
-            elif headterm.get_lemma() == 'over':
-                myconstituent = get_constituent(headterm.get_id())
-                topic = convert_term_ids_to_offsets(nafobj, myconstituent)
+            elif headterm.lemma == 'over':
+                myconstituent = doc.get_constituent(headterm.id)
+                topic = convert_term_ids_to_offsets(doc, myconstituent)
                 quotation.topic = topic
                 return True
     return False
 
 
-def get_candidates_not_part_of_addressee_topic(candidate_names, quotation):
+def get_candidates_not_part_of_addressee_topic(doc, candidate_names,
+                                               quotation):
 
     remaining_candidates = []
     covered_tids = quotation.addressee + quotation.topic
     for tid in candidate_names:
         if not tid in covered_tids:
-            myconstituent = get_constituent(tid)
+            myconstituent = doc.get_constituent(tid)
             remaining_candidates.append(myconstituent)
             covered_tids += myconstituent
     return remaining_candidates
 
 
-def extract_full_names_or_prons(nafobj, constituents):
+def extract_full_names_or_prons(doc, constituents):
 
     names = []
     for const in constituents:
         name = []
         for tid in const:
-            term = nafobj.get_term(tid)
-            if term.get_pos() == 'name':
+            term = doc.terms[tid]
+            if term.pos == 'name':
                 name.append(tid)
         if len(name) == 0 and len(const) != 0:
             names.append(const)
@@ -447,111 +435,93 @@ def extract_full_names_or_prons(nafobj, constituents):
     return names
 
 
-def get_closest(candidates):
+def get_closest(doc, candidates):
 
     closest = []
     selected_cand = []
     for cand in candidates:
-        candnums = create_ordered_number_span(cand)
+        candnums = create_ordered_number_span(doc, cand)
         if len(closest) == 0 or candnums[-1] > closest[-1]:
             closest = candnums
             selected_cand = cand
     return selected_cand
 
-def identify_primary_candidate(candidates):
+def identify_primary_candidate(doc, candidates):
 
     for cand in candidates:
         for tid in cand:
-            if tid in csts.dep2heads:
-                for headrel in csts.dep2heads:
+            if tid in doc.dep2heads:
+                for headrel in doc.dep2heads:
                     if headrel[1] == 'hd/su':
                         return cand
 
     #if no highest ranking found, return closest candidate
-    return get_closest(candidates)
+    return get_closest(doc, candidates)
 
 
-def find_name_or_pronoun(nafobj, preceding_terms, quotation):
+def find_name_or_pronoun(doc, preceding_terms, quotation):
 
     #FIXME: not over paragraph borders; if nothing found, sentence after can also work
     candidate_names = []
     for tid in preceding_terms:
-        term = nafobj.get_term(tid)
-        if term.get_pos() == 'name' or term.get_pos() == 'pron':
-            if not identify_addressee_or_topic_relations(nafobj, tid, quotation):
-                candidate_names.append(term.get_id())
+        term = doc.terms[tid]
+        if term.pos == 'name' or term.pos == 'pron':
+            if not identify_addressee_or_topic_relations(doc, tid, quotation):
+                candidate_names.append(term.id)
 
     #change make dictionary with head term to constituent
     if len(candidate_names) > 0:
-        remaining_candidates = get_candidates_not_part_of_addressee_topic(candidate_names, quotation)
+        remaining_candidates = get_candidates_not_part_of_addressee_topic(doc, candidate_names, quotation)
         if len(remaining_candidates) > 0:
-            candidates = extract_full_names_or_prons(nafobj, remaining_candidates)
+            candidates = extract_full_names_or_prons(doc, remaining_candidates)
             if len(candidates) == 1:
-                candidate_in_offsets = convert_term_ids_to_offsets(nafobj, candidates[0])
+                candidate_in_offsets = convert_term_ids_to_offsets(doc, candidates[0])
                 quotation.source = candidate_in_offsets
             else:
-                candidate = identify_primary_candidate(candidates)
-                candidate_in_offsets = convert_term_ids_to_offsets(nafobj, candidate)
+                candidate = identify_primary_candidate(doc, candidates)
+                candidate_in_offsets = convert_term_ids_to_offsets(doc, candidate)
                 quotation.source = candidate_in_offsets
 
 
-def create_ordered_number_span(term_list):
-
-    number_list = []
-    for tid in term_list:
-        if 't_' in tid:
-            tnumber = int(tid.lstrip('t_'))
-            number_list.append(tnumber)
-        elif 't' in tid:
-            tnumber = int(tid.lstrip('t'))
-            number_list.append(tnumber)
-
-    return sorted(number_list)
+def create_ordered_number_span(doc, term_list):
+    '''
+    Get the sorted positions in the document of the terms in `term_list`
+    '''
+    term_position = doc.term_position
+    return sorted(term_position[tid] for tid in term_list)
 
 
-def get_preceding_terms_in_sentence(first_sentence, quotation_span):
-    # FIXME; move to offset based ids earlier; then this hack is not necessary
-    quotation_numbers = create_ordered_number_span(quotation_span)
+def get_preceding_terms_in_sentence(doc, first_sentence, quotation_span):
+    quotation_numbers = create_ordered_number_span(doc, quotation_span)
     preceeding_terms = []
     if len(quotation_numbers) > 0:
+        term_position = doc.term_position
         for tid in first_sentence:
-            if 't_' in tid:
-                tnumber = int(tid.lstrip('t_'))
-                if tnumber < quotation_numbers[0]:
-                    preceeding_terms.append(tid)
-            elif 't' in tid:
-                tnumber = int(tid.lstrip('t'))
-                if tnumber < quotation_numbers[0]:
-                    preceeding_terms.append(tid)
+            if term_position[tid] < quotation_numbers[0]:
+                preceeding_terms.append(tid)
     return preceeding_terms
 
 
-def get_following_terms_in_sentence(last_sentence, quotation_span):
+def get_following_terms_in_sentence(doc, last_sentence, quotation_span):
 
-    # FIXME; move to offset based ids earlier; then this hack is not necessary
-    quotation_numbers = create_ordered_number_span(quotation_span)
+    quotation_numbers = create_ordered_number_span(doc, quotation_span)
     following_terms = []
+    term_position = doc.term_position
     for tid in last_sentence:
-        if 't_' in tid:
-            tnumber = int(tid.lstrip('t_'))
-            if tnumber > quotation_numbers[0]:
-                following_terms.append(tid)
-        elif 't' in tid:
-            tnumber = int(tid.lstrip('t'))
-            if tnumber > quotation_numbers[0]:
-                following_terms.append(tid)
+        if term_position[tid] > quotation_numbers[0]:
+            following_terms.append(tid)
     return following_terms
 
 
-def identify_source_introducing_constructions(nafobj, quotation, sentence_to_term):
+def identify_source_introducing_constructions(doc, quotation, sentence_to_term):
     '''
     Function that identifies structures that introduce sources of direct quotes
-    :param nafobj: the input nafobj
+    :param doc: DocumentInformation of the input nafobj
     :param quotation: the quotation
     :return: None
     '''
 
-    sentences = get_sentences_of_quotation(nafobj, quotation)
+    sentences = get_sentences_of_quotation(doc, quotation)
     prev_sent, follow_sent = get_previous_and_next_sentence(sentences)
     #FIXME: find out using development data whether preceding and following sentence should be taken into account or not
     #preceding_terms = sentence_to_term.get(str(prev_sent)) + sentence_to_term.get(str(prev_sent + 1))
@@ -560,39 +530,22 @@ def identify_source_introducing_constructions(nafobj, quotation, sentence_to_ter
     following_sentence = sentence_to_term.get(str(follow_sent - 1))
     source_head = None
     if following_sentence is not None:
-        following_terms = get_following_terms_in_sentence(following_sentence,quotation.span)
-        source_head = retrieve_quotation_following_sip(nafobj,following_terms)
+        following_terms = get_following_terms_in_sentence(doc, following_sentence, quotation.span)
+        source_head = retrieve_quotation_following_sip(doc, following_terms)
 
     if source_head is None:
-        preceding_terms = get_preceding_terms_in_sentence(sentence_to_term.get(str(prev_sent + 1)),quotation.span)
-        source_head = retrieve_sentence_preceding_sip(nafobj, preceding_terms)
+        preceding_terms = get_preceding_terms_in_sentence(doc, sentence_to_term.get(str(prev_sent + 1)), quotation.span)
+        source_head = retrieve_sentence_preceding_sip(doc, preceding_terms)
 
     if source_head is not None:
-        source_constituent = get_constituent(source_head)
-        source_in_offsets = convert_term_ids_to_offsets(nafobj, source_constituent)
+        source_constituent = doc.get_constituent(source_head)
+        source_in_offsets = convert_term_ids_to_offsets(doc, source_constituent)
         quotation.source = source_in_offsets
     else:
-        find_name_or_pronoun(nafobj, preceding_terms, quotation)
+        find_name_or_pronoun(doc, preceding_terms, quotation)
     #3. check previous sentence for name or pronoun
 
 
-def get_sentence_to_terms(nafobj):
-
-    token2terms = {}
-    for term in nafobj.get_terms():
-        tokens = term.get_span().get_span_ids()
-        for tok in tokens:
-            token2terms[tok] = term.get_id()
-
-    sentence2terms = defaultdict(list)
-    for token in nafobj.get_tokens():
-        sent_nr = token.get_sent()
-        term_id = token2terms.get(token.get_id())
-        sentence2terms[sent_nr].append(term_id)
-
-    return sentence2terms
-
-
 def get_reduced_list_of_quotations(toremove, found_quotations):
 
     reduced_quotations = []
@@ -606,24 +559,24 @@ def get_reduced_list_of_quotations(toremove, found_quotations):
     return reduced_quotations
 
 
-def identify_direct_quotations(nafobj, mentions):
+def identify_direct_quotations(doc, mentions, profiler=NULL_PROFILER):
     '''
     Function that identifies direct quotations in naf
-    :param nafobj: input naf object
+    :param doc: DocumentInformation of the input naf object
+    :param profiler: Profiler to count comparisons with
     :return:
     '''
 
-    nafquotations = get_quotation_spans(nafobj)
+    nafquotations = get_quotation_spans(doc)
     toremove = []
     for quotation in nafquotations:
-        identify_direct_links_to_sip(nafobj, quotation)
+        identify_direct_links_to_sip(doc, quotation)
         if len(quotation.source) == 0:
             # this can lead to indication of quotation being attribution rather
             # than quotation
-            if check_if_quotation_contains_dependent(quotation):
-                sentence_to_terms = get_sentence_to_terms(nafobj)
+            if check_if_quotation_contains_dependent(doc, quotation):
                 identify_source_introducing_constructions(
-                    nafobj, quotation, sentence_to_terms)
+                    doc, quotation, doc.sentence2terms)
             else:
                 toremove.append(quotation)
 
@@ -632,79 +585,65 @@ def identify_direct_quotations(nafobj, mentions):
     quotations = []
     for qid, nafquotation in enumerate(finalnafquotations):
         myquote = create_coref_quotation_from_quotation_naf(
-            nafobj, nafquotation, mentions, qid)
+            doc, nafquotation, mentions, qid, profiler)
         quotations.append(myquote)
 
     return quotations
 
 
-def link_span_ids_to_mentions(span, mentions):
+def link_span_ids_to_mentions(span, mentions, profiler=NULL_PROFILER):
     '''
     Function that takes span as input and finds out whether this corresponds to a mention candidate and, if so, which one
     :param span: list of span ids
-    :param mentions: object containing all candidate mentions
+    :param mentions: `MentionCollection` of all candidate mentions
+    :param profiler: Profiler to count comparisons with
     :return:
     '''
 
-    for key, mention in mentions.items():
-        if set(span) == set(mention.span):
-            return key
+    same_span = mentions.with_span(span)
+    if same_span:
+        profiler.count('comparisons')
+        return same_span[0].id
 
-    for key, mention in mentions.items():
-        if set(span).issubset(set(mention.span)) or set(span).issuperset(mention.span):
-            return key
+    related = mentions.containing(span) + mentions.contained_in(span)
+    profiler.count('comparisons', len(related))
+    if related:
+        return min(related, key=mentions.position).id
 
 #    import traceback; print(traceback.extract_stack(limit=2)[-1][2] + " - span: " + str(span))
 
 
-def create_coref_quotation_from_quotation_naf(nafobj, nafquotation, mentions, quote_id):
+def create_coref_quotation_from_quotation_naf(doc, nafquotation, mentions, quote_id, profiler=NULL_PROFILER):
     '''
     Function that turns naf quotation object into quotation object to be passed on to multisieve
-    :param nafobj: input naf
+    :param doc: DocumentInformation of the input naf
     :param nafquotation: quotation object with naf specific information
     :param quote_id: identifier for quotation
+    :param profiler: Profiler to count comparisons with
     :return:
     '''
 
     myQuote = Cquotation(quote_id)
 
-    quotespan = convert_term_ids_to_offsets(nafobj, nafquotation.span)
+    quotespan = convert_term_ids_to_offsets(doc, nafquotation.span)
     myQuote.span = quotespan
 
-    quotestring = get_string_of_span(nafobj, nafquotation.span)
+    quotestring = get_string_of_span(doc, nafquotation.span)
     myQuote.string = quotestring
 
-    beginoffset, endoffset = get_offsets_from_span(nafobj, nafquotation.span)
+    beginoffset, endoffset = get_offsets_from_span(doc, nafquotation.span)
     myQuote.begin_offset = beginoffset
     myQuote.end_offset = endoffset
 
     if len(nafquotation.source) > 0:
-        source_mention_id = link_span_ids_to_mentions(nafquotation.source, mentions)
+        source_mention_id = link_span_ids_to_mentions(nafquotation.source, mentions, profiler)
         myQuote.source = source_mention_id
     if len(nafquotation.addressee) > 0:
-        addressee_mention_id = link_span_ids_to_mentions(nafquotation.addressee, mentions)
+        addressee_mention_id = link_span_ids_to_mentions(nafquotation.addressee, mentions, profiler)
         myQuote.addressee = addressee_mention_id
     if len(nafquotation.topic) > 0:
-        topic_mention_id = link_span_ids_to_mentions(nafquotation.topic, mentions)
+        topic_mention_id = link_span_ids_to_mentions(nafquotation.topic, mentions, profiler)
         myQuote.topic = topic_mention_id
 
     return myQuote
 
-
-def get_offset2string_dicts(nafobj):
-
-    offset2string = {}
-    offset2lemma = {}
-
-    for term in nafobj.get_terms():
-        identifier = get_offset(nafobj, term.get_id())
-        lemma = term.get_lemma()
-        offset2lemma[identifier] = lemma
-
-    for token in nafobj.get_tokens():
-        identifier = int(token.get_offset())
-        surface_string = token.get_text()
-        offset2string[identifier] = surface_string
-
-    return offset2string, offset2lemma
-
@@ -0,0 +1,164 @@
+"""
+This module reads the information the resolver needs directly from a NAF
+file, without building a `KafNafParser` object model of the whole document.
+
+The XML is parsed incrementally: only the text, terms, deps and entities
+layers are read, every element is freed as soon as it has been read and all
+other layers are thrown away when they end. The result is a
+`DocumentInformation`, which `resolve_coreference.resolve_coreference`
+accepts instead of a NAF object.
+"""
+import logging
+from collections import OrderedDict
+
+from lxml import etree
+
+from .document_info import DocumentInformation, TokenInfo, make_term_info
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+
+class BufferReader:
+    '''
+    Binary file object that reads from a buffer (e.g. bytes or a memory map)
+    without copying all of it, so that the parser only ever holds one chunk
+    of the input.
+    '''
+
+    def __init__(self, buffer):
+        self.view = memoryview(buffer)
+        self.position = 0
+
+    def read(self, size=-1):
+        start = self.position
+        if size is None or size < 0:
+            end = len(self.view)
+        else:
+            end = min(start + size, len(self.view))
+        self.position = end
+        return self.view[start:end].tobytes()
+
+    def close(self):
+        # Release the buffer, so that a memory map can be closed
+        if hasattr(self.view, 'release'):
+            self.view.release()
+
+
+class NafTables:
+    '''
+    The tables that are filled while reading a NAF file.
+    '''
+
+    def __init__(self):
+        self.tokens = OrderedDict()
+        self.terms = OrderedDict()
+        self.head2deps = {}
+        self.entities = []
+
+    def add_token(self, elem):
+        wid = elem.get('id')
+        self.tokens[wid] = TokenInfo(
+            id=wid,
+            offset=int(elem.get('offset')),
+            length=int(elem.get('length')),
+            text=elem.text,
+            sentence=elem.get('sent'),
+        )
+
+    def add_term(self, elem):
+        tid = elem.get('id')
+        self.terms[tid] = make_term_info(
+            self.tokens,
+            tid,
+            tuple(get_span_ids(elem.find('span'))),
+            pos=elem.get('pos'),
+            lemma=elem.get('lemma'),
+            morphofeat=elem.get('morphofeat'),
+            type=elem.get('type'),
+        )
+
+    def add_dependency(self, elem):
+        self.head2deps.setdefault(elem.get('from'), set()).add(
+            (elem.get('to'), elem.get('rfunc'))
+        )
+
+    def add_entity(self, elem):
+        self.entities.append((elem.get('type'), [
+            get_span_ids(references.find('span'))
+            for references in elem.iterfind('references')
+        ]))
+
+
+def get_span_ids(span):
+    '''
+    Get the target IDs of a span element, like `Cspan.get_span_ids`
+
+    :param span:    span element or None
+    :return:        list of IDs
+    '''
+    if span is None:
+        return []
+    return [target.get('id') for target in span.iterfind('target')]
+
+
+def read_tables(source):
+    '''
+    Read the text, terms, deps and entities layers of a NAF file
+
+    :param source:  file name or binary file object of a NAF file (use
+                    `BufferReader` for bytes in memory)
+    :return:        `NafTables`
+    '''
+    tables = NafTables()
+    handlers = {
+        'wf': tables.add_token,
+        'term': tables.add_term,
+        'dep': tables.add_dependency,
+        'entity': tables.add_entity,
+    }
+    root = None
+    for event, elem in etree.iterparse(
+            source, events=('start', 'end'), remove_comments=True):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+
+        handler = handlers.get(elem.tag)
+        if handler is not None:
+            handler(elem)
+            elem.clear()
+        elif elem.getparent() is root:
+            # A layer has ended: everything we needed from it has been read
+            elem.clear()
+            root.remove(elem)
+            continue
+        else:
+            continue
+        # Free the elements that were already read
+        parent = elem.getparent()
+        while elem.getprevious() is not None:
+            del parent[0]
+
+    logger.debug("read {} tokens, {} terms, {} entities".format(
+        len(tables.tokens), len(tables.terms), len(tables.entities)))
+    return tables
+
+
+def read_naf(source, **kwargs):
+    '''
+    Create the `DocumentInformation` of a NAF file without building a NAF
+    object.
+
+    :param source:  file name or binary file object of a NAF file
+    :param kwargs:  see `DocumentInformation`
+    :return:        `DocumentInformation` (whose `nafobj` is None)
+    '''
+    tables = read_tables(source)
+    return DocumentInformation(
+        tables.tokens,
+        tables.terms,
+        tables.head2deps,
+        tables.entities,
+        **kwargs
+    )
@@ -0,0 +1,342 @@
+"""
+This module writes the result of the resolver into the original bytes of a
+NAF document.
+
+Instead of building and re-serializing a NAF object, only the new
+`coreferences` layer (or new `coref` elements in an existing layer) and the
+`linguisticProcessors` header entry are inserted; every other byte of the
+input is copied unchanged. This works for NAF in any ASCII compatible
+encoding (in practice UTF-8).
+"""
+import re
+import time
+import logging
+import platform
+from xml.sax.saxutils import escape
+
+from .dump import get_ordered_coreference_chains
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+LAYER = 'coreferences'
+INDENT = '  '
+
+_ENCODING = re.compile(br'''^<\?xml[^>]*encoding=["']([A-Za-z0-9._-]+)["']''')
+# Tags are found by searching for a literal prefix and then matching a
+# regular expression at that position, which is much faster than searching
+# with the regular expression
+_ROOT_START = (b'<NAF', re.compile(br'<NAF\b[^>]*>'))
+_HEADER_END = (b'</nafHeader', re.compile(br'</nafHeader\s*>'))
+_LP_GROUP = (b'<linguisticProcessors', re.compile(
+    br'''<linguisticProcessors\s[^>]*layer=["']coreferences["'][^>]*(?<!/)>'''
+))
+_LP_GROUP_END = (b'</linguisticProcessors',
+                 re.compile(br'</linguisticProcessors\s*>'))
+_LAYER = (b'<coreferences',
+          re.compile(br'<coreferences\b[^>]*?(?P<empty>/?)>'))
+_LAYER_END = (b'</coreferences', re.compile(br'</coreferences\s*>'))
+_COREF = (b'<coref', re.compile(br'<coref[\s/>]'))
+_ROOT_END = re.compile(br'</NAF\s*>')
+_SKIPPED_SECTIONS = [(b'<!--', b'-->'), (b'<![CDATA[', b']]>')]
+
+
+def find_tag(tag, data, start=0, end=None):
+    '''
+    Find the first occurrence of `tag` that isn't in a comment or CDATA
+    section.
+
+    :param tag:     (literal prefix, regular expression)
+    :return:        match object or None
+    '''
+    prefix, pattern = tag
+    if end is None:
+        end = len(data)
+    pos = data.find(prefix, start, end)
+    while pos != -1:
+        match = pattern.match(data, pos, end)
+        if match is not None and not is_skipped(data, pos):
+            return match
+        pos = data.find(prefix, pos + 1, end)
+    return None
+
+
+def is_skipped(data, pos):
+    '''
+    Whether `pos` is in a comment or CDATA section
+    '''
+    for opening, closing in _SKIPPED_SECTIONS:
+        section = data.rfind(opening, 0, pos)
+        if section != -1 and \
+                data.find(closing, section + len(opening), pos) == -1:
+            return True
+    return False
+
+
+def get_encoding(data):
+    '''
+    Get the encoding from the XML declaration of `data` (default UTF-8)
+    '''
+    match = _ENCODING.match(data)
+    return 'utf-8' if match is None else match.group(1).decode('ascii')
+
+
+def get_indentation(data, pos):
+    '''
+    Get the whitespace between the start of the line and `pos`, or '' if
+    there is something else on that line before `pos`.
+    '''
+    line_start = data.rfind(b'\n', 0, pos) + 1
+    indentation = data[line_start:pos]
+    if indentation.strip():
+        return ''
+    return indentation.decode('ascii')
+
+
+def format_attributes(attributes):
+    return ''.join(
+        ' {}="{}"'.format(name, escape(value, {'"': '&quot;'}))
+        for name, value in attributes
+    )
+
+
+def render_block(lines, indentation):
+    '''
+    Turn `lines` into text to insert right before a closing tag that is
+    indented by `indentation`, so that the lines are indented one level more
+    than that closing tag.
+
+    :param lines:       list of (level, line) tuples
+    :param indentation: indentation of the closing tag
+    '''
+    return ''.join(
+        INDENT * (level + 1) + line + '\n' + indentation
+        for level, line in lines
+    )
+
+
+def remove_last_line(text, indentation):
+    '''
+    Remove the newline and indentation that `render_block` adds after the
+    last line
+    '''
+    return text[:len(text) - len(indentation) - 1]
+
+
+def get_lp_line(begintime, endtime=None, version=None):
+    '''
+    The `lp` element of the resolver, with the same attributes that
+    `resolve_coreference.add_naf_header` adds.
+    '''
+    if endtime is None:
+        endtime = time.strftime('%Y-%m-%dT%H:%M:%S%Z')
+    if version is None:
+        from . import __version__ as version
+    return '<lp{}/>'.format(format_attributes([
+        ('name', 'vua-multisieve-coreference'),
+        ('version', version),
+        ('timestamp', endtime),
+        ('beginTimestamp', begintime),
+        ('endTimestamp', endtime),
+        ('hostname', platform.node()),
+    ]))
+
+
+def get_coref_lines(doc, coref_classes, mentions, start_count, level=0):
+    '''
+    Create the `coref` elements like `dump.add_coreference_to_naf` does.
+
+    :param doc:             DocumentInformation of the input naf
+    :param coref_classes:   identified coreference classes
+    :param mentions:        dictionary of all mentions
+    :param start_count:     number of the first coreference ID
+    :param level:           indentation level of the `coref` elements
+    :return:                list of (level, line) tuples
+    '''
+    offset2termid = doc.offset2term
+    lines = []
+    for count, mids in enumerate(
+            get_ordered_coreference_chains(coref_classes, mentions),
+            start_count):
+        lines.append((level, '<coref{}>'.format(format_attributes([
+            ('id', 'co' + str(count)),
+            ('type', 'entity'),
+        ]))))
+        data = sorted(
+            (
+                offset2termid[mention.head_offset],
+                [offset2termid.get(offset) for offset in mention.span]
+            )
+            for mention in map(mentions.get, set(mids))
+        )
+        for head_id, term_id_span in data:
+            lines.append((level + 1, '<span>'))
+            for term_id in term_id_span:
+                attributes = [('id', term_id)]
+                if term_id == head_id:
+                    attributes.append(('head', 'yes'))
+                lines.append((level + 2, '<target{}/>'.format(
+                    format_attributes(attributes))))
+            lines.append((level + 1, '</span>'))
+        lines.append((level, '</coref>'))
+    return lines
+
+
+def get_header_insertion(data, lp_line):
+    '''
+    Get the position and text to insert the `lp` of the resolver in the
+    header, like `KafNafParser.add_linguistic_processor` does.
+
+    :return:    (position, text)
+    '''
+    header_end = find_tag(_HEADER_END, data)
+    if header_end is None:
+        root = find_tag(_ROOT_START, data)
+        if root is None:
+            raise ValueError("Input is not a NAF document")
+        indentation = get_indentation(data, root.start())
+        block = render_block([
+            (0, '<nafHeader>'),
+            (1, '<linguisticProcessors layer="{}">'.format(LAYER)),
+            (2, lp_line),
+            (1, '</linguisticProcessors>'),
+            (0, '</nafHeader>'),
+        ], indentation)
+        # The new header goes on its own line after the root start tag
+        return root.end(), '\n' + indentation + remove_last_line(
+            block, indentation)
+
+    group = find_tag(_LP_GROUP, data, 0, header_end.start())
+    if group is not None:
+        group_end = find_tag(
+            _LP_GROUP_END, data, group.end(), header_end.start())
+        if group_end is not None:
+            indentation = get_indentation(data, group_end.start())
+            return group_end.start(), render_block([(0, lp_line)],
+                                                   indentation)
+
+    indentation = get_indentation(data, header_end.start())
+    return header_end.start(), render_block([
+        (0, '<linguisticProcessors layer="{}">'.format(LAYER)),
+        (1, lp_line),
+        (0, '</linguisticProcessors>'),
+    ], indentation)
+
+
+def get_layer_insertion(data, doc, coref_classes, mentions):
+    '''
+    Get the position and text to insert the coreferences, either in an
+    existing `coreferences` layer or as a new layer at the end of the
+    document.
+
+    :return:    (start, end, text): replace `data[start:end]` by `text`
+    '''
+    layer = find_tag(_LAYER, data)
+    if layer is not None and not layer.group('empty'):
+        layer_end = find_tag(_LAYER_END, data, layer.end())
+        if layer_end is None:
+            raise ValueError("Unclosed coreferences layer")
+        start_count = 1
+        coref = find_tag(_COREF, data, layer.end(), layer_end.start())
+        while coref is not None:
+            start_count += 1
+            coref = find_tag(_COREF, data, coref.end(), layer_end.start())
+        indentation = get_indentation(data, layer_end.start())
+        text = render_block(
+            get_coref_lines(doc, coref_classes, mentions, start_count),
+            indentation
+        )
+        return layer_end.start(), layer_end.start(), text
+
+    if layer is not None:
+        # Replace the empty element, which is one level less indented than
+        # the lines `render_block` creates
+        indentation = get_indentation(data, layer.start())
+        text = render_block(get_layer_lines(
+            doc, coref_classes, mentions, -1), indentation)
+        return layer.start(), layer.end(), remove_last_line(
+            text, indentation)
+
+    # The root element ends with the last closing tag of the document
+    root_end = _ROOT_END.match(data, data.rfind(b'</NAF'))
+    if root_end is None:
+        raise ValueError("Input is not a NAF document")
+    indentation = get_indentation(data, root_end.start())
+    text = render_block(get_layer_lines(
+        doc, coref_classes, mentions, 0), indentation)
+    return root_end.start(), root_end.start(), text
+
+
+def get_layer_lines(doc, coref_classes, mentions, level):
+    '''
+    Create a new `coreferences` layer
+
+    :return:    list of (level, line) tuples
+    '''
+    lines = [(level, '<{}>'.format(LAYER))]
+    lines.extend(get_coref_lines(
+        doc, coref_classes, mentions, 1, level=level + 1))
+    lines.append((level, '</{}>'.format(LAYER)))
+    return lines
+
+
+def get_insertions(data, doc, coref_classes, mentions, begintime,
+                   endtime=None):
+    '''
+    Get the changes to make to `data`
+
+    :param data:            bytes (or memory map) of the input NAF
+    :param doc:             DocumentInformation of the input naf
+    :param coref_classes:   identified coreference classes
+    :param mentions:        dictionary of all mentions
+    :param begintime:       begin timestamp for the header
+    :param endtime:         end timestamp for the header (default: now)
+    :return:                sorted list of (start, end, encoded text): replace
+                            `data[start:end]` by the text
+    '''
+    encoding = get_encoding(data)
+    header_pos, header_text = get_header_insertion(
+        data, get_lp_line(begintime, endtime))
+    start, end, layer_text = get_layer_insertion(
+        data, doc, coref_classes, mentions)
+    return sorted([
+        (header_pos, header_pos, header_text.encode(encoding)),
+        (start, end, layer_text.encode(encoding)),
+    ])
+
+
+def write_naf(out, data, doc, coref_classes, mentions, begintime,
+              endtime=None):
+    '''
+    Write `data` to the binary file `out` with the coreferences and the
+    header entry inserted. See `get_insertions` for the arguments.
+    '''
+    view = memoryview(data)
+    try:
+        position = 0
+        for start, end, text in get_insertions(
+                data, doc, coref_classes, mentions, begintime, endtime):
+            out.write(view[position:start])
+            out.write(text)
+            position = end
+        out.write(view[position:])
+    finally:
+        # Release the buffer, so that a memory map can be closed
+        if hasattr(view, 'release'):
+            view.release()
+
+
+def add_coreferences(data, doc, coref_classes, mentions, begintime,
+                     endtime=None):
+    '''
+    Get `data` with the coreferences and the header entry inserted. See
+    `get_insertions` for the arguments.
+    '''
+    position = 0
+    chunks = []
+    for start, end, text in get_insertions(
+            data, doc, coref_classes, mentions, begintime, endtime):
+        chunks.append(data[position:start])
+        chunks.append(text)
+        position = end
+    chunks.append(data[position:])
+    return b''.join(chunks)
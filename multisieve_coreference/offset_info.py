@@ -1,69 +1,66 @@
-def get_offset(nafobj, term_id):
+# Spans with fewer terms than this are faster in plain Python than with
+# `columns.DocumentColumns`, because creating arrays has a fixed cost
+MIN_VECTORIZED_SPAN = 128
+
+
+def get_offset(doc, term_id):
     '''
     Function that returns beginning offset of term
-    :param nafobj: input naf
+    :param doc: DocumentInformation of the input naf
     :param term_id: id of term in question
     :return:
     '''
 
-    return min(
-        int(nafobj.get_token(wid).get_offset())
-        for wid in nafobj.get_term(term_id).get_span_ids()
-    )
+    return doc.terms[term_id].offset
 
 
-def convert_term_ids_to_offsets(nafobj, seq):
+def convert_term_ids_to_offsets(doc, seq):
     '''
     Convert a sequence of term IDs to a list of offsets
-    :param nafobj:  input naf object
+    :param doc:     DocumentInformation of the input naf
     :param seq:     sequence of term IDs
     :return:        a list of offsets
     '''
 
+    columns = doc.columns
+    if columns is not None and len(seq) >= MIN_VECTORIZED_SPAN:
+        return columns.span_offsets(seq)
+
+    terms = doc.terms
     return sorted(
-        get_offset(nafobj, tid)
+        terms[tid].offset
         for tid in seq
     )
 
 
-def get_term_length(nafobj, term_id):
+def get_term_length(doc, term_id):
     '''
     Function that returns the length of a term
-    :param nafobj: input naf
+    :param doc: DocumentInformation of the input naf
     :param term_id: id of term in question
     :return:
     '''
 
-    my_term = nafobj.get_term(term_id)
-    length = 0
-    expected_offset = 0
-    for wid in my_term.get_span().get_span_ids():
-        my_token = nafobj.get_token(wid)
-        offset = int(my_token.get_offset())
-        token_length = int(my_token.get_length())
-        length += token_length
-        if expected_offset != 0 and expected_offset != offset:
-            length += offset - expected_offset
-        expected_offset = offset + token_length
-
-    return length
+    return doc.terms[term_id].length
 
 
-def get_offsets_from_span(nafobj, span):
+def get_offsets_from_span(doc, span):
     '''
     Function that identifies begin and end offset for a span of terms
-    :param nafobj: input naf
+    :param doc: DocumentInformation of the input naf
     :param span: list of term identifiers
     :return:
     '''
+    columns = doc.columns
+    if columns is not None and len(span) >= MIN_VECTORIZED_SPAN:
+        return columns.span_bounds(span)
 
     offsets = []
     end_offsets = []
     for termid in span:
-        offset = get_offset(nafobj, termid)
-        length = get_term_length(nafobj, termid)
-        offsets.append(offset)
-        end_offsets.append(offset+length)
+        term = doc.terms[termid]
+        offsets.append(term.offset)
+        end_offsets.append(term.offset + term.length)
 
     begin_offset = 0
     end_offset = 0
@@ -74,17 +71,16 @@ def get_offsets_from_span(nafobj, span):
     return begin_offset, end_offset
 
 
-def get_pos_of_term(nafobj, tid):
+def get_pos_of_term(doc, tid):
 
-    term = nafobj.get_term(tid)
-    return term.get_pos()
+    return doc.terms[tid].pos
 
 
-def get_pos_of_span(nafobj, span):
+def get_pos_of_span(doc, span):
 
     pos_seq = []
     for tid in span:
-        tpos = get_pos_of_term(nafobj, tid)
+        tpos = get_pos_of_term(doc, tid)
         pos_seq.append(tpos)
 
     return pos_seq
@@ -0,0 +1,190 @@
+"""
+This module records where time goes while resolving coreference for a
+document: wall and CPU time per stage of the pipeline, together with counters
+that are incremented by the stages themselves, and the peak memory use of
+the process while the document was processed.
+"""
+import sys
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    from time import perf_counter as wall_clock, process_time as cpu_clock
+except ImportError:
+    from time import time as wall_clock, clock as cpu_clock
+
+
+# Counters every stage has, in output order
+COUNTERS = ('mentions', 'comparisons', 'merges')
+
+
+class Profiler:
+    '''
+    Keeps track of time and counters per stage.
+
+    Counters:
+
+        - mentions:     number of mentions inspected by the stage
+        - comparisons:  number of pairwise comparisons (mention to mention or
+                        mention to quotation) done by the stage
+        - merges:       number of `CoreferenceInformation.merge()` calls
+                        (only counted for the `CoreferenceInformation` passed
+                        to `track_merges`)
+
+    The peak memory use is that of the whole process. It is recorded when
+    the profiler is created and again by `as_dict`, so that a document that
+    raised it can be told apart from one that didn't; when documents are
+    processed at the same time in one process, the peak can also be raised
+    by the others.
+    '''
+
+    def __init__(self, memory=True):
+        '''
+        :param memory:  whether to record the peak memory use, which
+                        `as_dict` adds as `peak_memory_at_start` and
+                        `peak_memory` in kB
+        '''
+        self.stages = OrderedDict()
+        self.current = None
+        self.coref_info = None
+        self.memory = memory
+        self.start_peak_memory = get_peak_memory() if memory else None
+
+    def track_merges(self, coref_info):
+        '''
+        Count the merges of `coref_info` in the stages from now on
+        '''
+        self.coref_info = coref_info
+
+    def _merge_count(self):
+        return 0 if self.coref_info is None else self.coref_info.merge_count
+
+    @contextmanager
+    def stage(self, name):
+        '''
+        Context manager that records time and counters for stage `name`.
+        '''
+        record = self.stages.setdefault(name, OrderedDict(
+            [('wall', 0.0), ('cpu', 0.0)] + [(c, 0) for c in COUNTERS]
+        ))
+        previous, self.current = self.current, record
+        merges = self._merge_count()
+        wall = wall_clock()
+        cpu = cpu_clock()
+        try:
+            yield record
+        finally:
+            record['wall'] += wall_clock() - wall
+            record['cpu'] += cpu_clock() - cpu
+            record['merges'] += self._merge_count() - merges
+            self.current = previous
+
+    def count(self, counter, n=1):
+        '''
+        Increment `counter` of the current stage by `n`.
+        '''
+        if self.current is not None:
+            self.current[counter] += n
+
+    def as_dict(self, **extra):
+        '''
+        Get all recorded information as a (JSON serialisable) dictionary
+
+        :param extra:   additional items to add to the dictionary, e.g. the
+                        name of the document
+        '''
+        stages = []
+        total = OrderedDict([('wall', 0.0), ('cpu', 0.0)])
+        for name, record in self.stages.items():
+            stage = OrderedDict(stage=name)
+            stage.update(record)
+            stages.append(stage)
+            total['wall'] += record['wall']
+            total['cpu'] += record['cpu']
+        result = OrderedDict(extra)
+        result['stages'] = stages
+        result['total'] = total
+        if self.memory:
+            result['peak_memory_at_start'] = self.start_peak_memory
+            result['peak_memory'] = get_peak_memory()
+        return result
+
+
+def get_peak_memory():
+    '''
+    Get the peak resident memory use of this process in kB, or None if it
+    isn't known on this platform
+    '''
+    try:
+        with open('/proc/self/status') as fd:
+            for line in fd:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (IOError, OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, other systems kB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def reset_peak_memory():
+    '''
+    Reset the peak memory use of this process to its current memory use, so
+    that `get_peak_memory` returns the peak since then. This is only possible
+    on Linux; elsewhere the peak stays that of the whole process.
+
+    This changes the peak for everything in the process, so only use it when
+    a single document is processed.
+
+    :return:    whether the peak was reset
+    '''
+    try:
+        with open('/proc/self/clear_refs', 'w') as fd:
+            fd.write('5')
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def write_profiles(path, profiles):
+    '''
+    Append profiles to a file as JSON, one line per profile
+
+    :param path:        file to append to, or '-' for stderr
+    :param profiles:    iterable of `Profiler.as_dict` results
+    '''
+    if path == '-':
+        fd = sys.stderr
+    else:
+        fd = open(path, 'a')
+    try:
+        for profile in profiles:
+            fd.write(json.dumps(profile) + '\n')
+        fd.flush()
+    finally:
+        if fd is not sys.stderr:
+            fd.close()
+
+
+class NullProfiler(Profiler):
+    '''
+    Profiler that doesn't record anything
+    '''
+
+    def __init__(self):
+        Profiler.__init__(self, memory=False)
+
+    @contextmanager
+    def stage(self, name):
+        yield None
+
+    def count(self, counter, n=1):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
@@ -1,49 +1,37 @@
 import sys
 import logging
 import time
-from collections import defaultdict
-from pkg_resources import get_distribution
-
-from KafNafParserPy import KafNafParser, Clp
+from collections import OrderedDict
 
+from . import __version__
 from . import constants as c
 from .coref_info import CoreferenceInformation
-from .mention_data import initiate_stopword_list
-from .constituents import create_headdep_dicts
-from .dump import add_coreference_to_naf
-from .naf_info import (
-    get_mentions,
-    identify_direct_quotations,
-    get_offset2string_dicts
+from .profiling import (
+    Profiler,
+    NULL_PROFILER,
+    reset_peak_memory,
+    write_profiles,
 )
+from .document_info import DocumentInformation
+from .interval_index import IntervalIndex, get_span_interval
+from .offset_info import MIN_VECTORIZED_SPAN
+from .dump import add_coreference_to_naf
+from .naf_info import get_mentions, identify_direct_quotations
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
 
-# global values mapping offsets to string and lemma respectively
-offset2string = {}
-offset2lemma = {}
-
-
-def get_string_from_offsets(id_span):
-
-    surface_string = ''
-
-    for mid in id_span:
-        token_string = offset2string.get(mid)
-        surface_string += token_string + ' '
-
-    return surface_string.rstrip()
-
-
-def match_some_span(mentions, coref_info, get_span):
+def match_some_span(doc, mentions, coref_info, get_span_ids,
+                    profiler=NULL_PROFILER):
     '''
     Function that places entities with full string match in the same
     coreference group
 
+    :param doc:         DocumentInformation of the document
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count inspected mentions with
     :return:            None (mentions and coref_classes are updated in place)
     '''
     found_entities = {}
@@ -52,51 +40,59 @@ def match_some_span(mentions, coref_info, get_span):
     #        account here
     # FIXME 2: now only surface strings, we may want to look at lemma matches
     #          as well
-    for mid, mention in mentions.items():
-        if mention.head_pos in ['name', 'noun']:
-            mention_string = get_string_from_offsets(get_span(mention))
-            if mention_string in found_entities:
-                coref_id = found_entities[mention_string]
-                coref_classes[coref_id].add(mention.id)
+    for mention in mentions.with_head_pos('name', 'noun'):
+        profiler.count('mentions')
+        span_ids = get_span_ids(mention)
+        if span_ids in found_entities:
+            coref_id = found_entities[span_ids]
+            coref_classes[coref_id].add(mention.id)
+        else:
+            classes_of_mention = coref_info.classes_of_mention(mention.id)
+            if len(classes_of_mention) == 0:
+                # Don't merge because merging may change the IDs in
+                # `found_entities`
+                coref_id = coref_info.add_coref_class(
+                    [mention.id],
+                    merge=False
+                )
             else:
-                classes_of_mention = coref_info.classes_of_mention(mention.id)
-                if len(classes_of_mention) == 0:
-                    # Don't merge because merging may change the IDs in
-                    # `found_entities`
-                    coref_id = coref_info.add_coref_class(
-                        [mention.id],
-                        merge=False
-                    )
-                else:
-                    # coref classes will usually have a length 1; if not, it
-                    # doesn't matter which one is picked
-                    coref_id = next(iter(classes_of_mention))
-                found_entities[mention_string] = coref_id
-
-
-def match_full_name_overlap(mentions, coref_info):
+                # coref classes will usually have a length 1; if not, it
+                # doesn't matter which one is picked
+                coref_id = next(iter(classes_of_mention))
+            found_entities[span_ids] = coref_id
+
+
+def match_full_name_overlap(doc, mentions, coref_info,
+                            profiler=NULL_PROFILER):
     '''
     Function that places entities with full string match in the same
     coreference group
 
+    :param doc:         DocumentInformation of the document
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count inspected mentions with
     :return:            None (mentions and coref_classes are updated in place)
     '''
-    match_some_span(mentions, coref_info, lambda m: m.span)
+    match_some_span(doc, mentions, coref_info, lambda m: m.span_ids,
+                    profiler)
 
 
-def match_relaxed_string(mentions, coref_info):
+def match_relaxed_string(doc, mentions, coref_info,
+                         profiler=NULL_PROFILER):
     '''
     Function that matches mentions which have the same relaxed head
 
+    :param doc:         DocumentInformation of the document
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count inspected mentions with
     :return:            None (mentions and coref_classes are updated in place)
     '''
-    match_some_span(mentions, coref_info, lambda m: m.relaxed_span)
+    match_some_span(doc, mentions, coref_info, lambda m: m.relaxed_span_ids,
+                    profiler)
 
 
 def included_in_direct_speech(quotations, mention, coref_info):
@@ -145,7 +141,8 @@ def included_in_direct_speech(quotations, mention, coref_info):
                 # names to speaker
 
 
-def direct_speech_interpretation(quotations, mentions, coref_info):
+def direct_speech_interpretation(quotations, mentions, coref_info,
+                                 profiler=NULL_PROFILER):
     '''
     Function that applies the first sieve; assigning coreference or prohibited
     coreference based on direct speech
@@ -154,10 +151,18 @@ def direct_speech_interpretation(quotations, mentions, coref_info):
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     '''
+    quotation_index = IntervalIndex(
+        quotations, lambda quote: get_span_interval(quote.span))
     for mid, mention in mentions.items():
-        included_in_direct_speech(quotations, mention, coref_info)
+        profiler.count('mentions')
+        # Only the quotations around the mention can contain it
+        candidates = quotation_index.containing(
+            *get_span_interval(mention.span))
+        profiler.count('comparisons', len(candidates))
+        included_in_direct_speech(candidates, mention, coref_info)
 
 
 def identify_span_matching_mention(span, mid, mentions):
@@ -166,20 +171,19 @@ def identify_span_matching_mention(span, mid, mentions):
 
     :param span:        span to match mention spans against
     :param mid:         ID of the mention that should be ignored
-    :param mentions:    {ID: mention} dictionary of all mentions to consider
+    :param mentions:    `MentionCollection` of all mentions to consider
     :return:            list of IDs of mentions that have `span` as their span
     """
 
-    matching_mentions = []
-    for ment_id, mention in mentions.items():
-        if not ment_id == mid:
-            if set(mention.span) == set(span):
-                matching_mentions.append(ment_id)
+    return [
+        mention.id
+        for mention in mentions.with_span(span)
+        if mention.id != mid
+    ]
 
-    return matching_mentions
 
-
-def identify_some_structures(mentions, coref_info, get_structures):
+def identify_some_structures(mentions, coref_info, get_structures,
+                             profiler=NULL_PROFILER):
     """
     Assigns coreference for some structures in place
 
@@ -189,10 +193,12 @@ def identify_some_structures(mentions, coref_info, get_structures):
                            classes
     :param get_structures: function that returns a list of spans given a
                            `Cmention` object.
+    :param profiler:       Profiler to count mentions and comparisons with
     :return:               None (mentions and coref_classes are updated in
                            place)
     """
     for mid, mention in mentions.items():
+        profiler.count('mentions')
         structures = get_structures(mention)
         for structure in structures:
             matching_mentions = identify_span_matching_mention(
@@ -200,32 +206,39 @@ def identify_some_structures(mentions, coref_info, get_structures):
                 mid,
                 mentions
             )
+            profiler.count('comparisons', len(matching_mentions))
             if len(matching_mentions) > 0:
                 coref_info.add_coref_class([mid] + matching_mentions)
 
 
-def identify_appositive_structures(mentions, coref_info):
+def identify_appositive_structures(mentions, coref_info,
+                                   profiler=NULL_PROFILER):
     '''
     Assigns coreference for appositive structures in place
 
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     '''
-    identify_some_structures(mentions, coref_info, lambda m: m.appositives)
+    identify_some_structures(
+        mentions, coref_info, lambda m: m.appositives, profiler)
 
 
-def identify_predicative_structures(mentions, coref_info):
+def identify_predicative_structures(mentions, coref_info,
+                                    profiler=NULL_PROFILER):
     '''
     Assigns coreference for predicative structures in place
 
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     '''
-    identify_some_structures(mentions, coref_info, lambda m: m.predicatives)
+    identify_some_structures(
+        mentions, coref_info, lambda m: m.predicatives, profiler)
 
 
 def get_closest_match_relative_pronoun(mentions, matching, mention_index):
@@ -239,7 +252,8 @@ def get_closest_match_relative_pronoun(mentions, matching, mention_index):
     return antecedent
 
 
-def resolve_relative_pronoun_structures(mentions, coref_info):
+def resolve_relative_pronoun_structures(mentions, coref_info,
+                                        profiler=NULL_PROFILER):
     '''
     Identifies relative pronouns and assigns them to the class of the noun
     they're modifying
@@ -247,10 +261,13 @@ def resolve_relative_pronoun_structures(mentions, coref_info):
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     '''
     for mid, mention in mentions.items():
         if mention.is_relative_pronoun:
+            profiler.count('mentions')
+            profiler.count('comparisons', len(mentions))
             matching = []
             for omid, othermention in mentions.items():
                 if not omid == mid and \
@@ -270,25 +287,30 @@ def resolve_relative_pronoun_structures(mentions, coref_info):
                 coref_info.add_coref_class([my_match.id, mid])
 
 
-def resolve_reflective_pronoun_structures(mentions, coref_info):
+def resolve_reflective_pronoun_structures(mentions, coref_info,
+                                          profiler=NULL_PROFILER):
     '''
     Identifies mention that is correct coreference for reflectives
 
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     '''
     for mid, mention in mentions.items():
         if mention.is_reflective_pronoun:
+            profiler.count('mentions')
             matching = []
             sent_nr = mention.sentence_number
-            for omid, othermention in mentions.items():
-                if othermention.sentence_number == sent_nr:
-                    if not omid == mid and \
-                       mention.head_offset not in othermention.span:
-                        if int(othermention.head_offset) < mention.head_offset:
-                            matching.append(omid)
+            same_sentence = mentions.in_sentences(sent_nr)
+            profiler.count('comparisons', len(same_sentence))
+            for othermention in same_sentence:
+                omid = othermention.id
+                if not omid == mid and \
+                   mention.head_offset not in othermention.span:
+                    if int(othermention.head_offset) < mention.head_offset:
+                        matching.append(omid)
             if len(matching) == 1:
                 coref_info.add_coref_class(matching + [mid])
             elif len(matching) > 1:
@@ -301,19 +323,22 @@ def resolve_reflective_pronoun_structures(mentions, coref_info):
                 coref_info.add_coref_class([my_match.id, mid])
 
 
-def identify_acronyms_or_alternative_names(mentions, coref_info):
+def identify_acronyms_or_alternative_names(mentions, coref_info,
+                                           profiler=NULL_PROFILER):
     '''
     Identifies structures that add alternative name
 
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     '''
     # FIXME input specific
-    for mid, mention in mentions.items():
-        if mention.entity_type in ['PER', 'ORG', 'LOC', 'MISC'] and \
-           len(mention.modifiers) > 0:
+    for mention in mentions.with_entity_type('PER', 'ORG', 'LOC', 'MISC'):
+        mid = mention.id
+        if len(mention.modifiers) > 0:
+            profiler.count('mentions')
             final_matches = []
             for mod in mention.modifiers:
                 matching_mentions = identify_span_matching_mention(
@@ -321,6 +346,7 @@ def identify_acronyms_or_alternative_names(mentions, coref_info):
                     mid,
                     mentions
                 )
+                profiler.count('comparisons', len(matching_mentions))
                 for matchid in matching_mentions:
                     mymatch = mentions.get(matchid)
                     if mymatch.entity_type in ['PER', 'ORG', 'LOC', 'MISC']:
@@ -331,25 +357,28 @@ def identify_acronyms_or_alternative_names(mentions, coref_info):
 
 def get_sentence_mentions(mentions):
 
-    sentenceMentions = defaultdict(list)
+    sentenceMentions = OrderedDict()
 
-    for mid, mention in mentions.items():
-        snr = mention.sentence_number
-        sentenceMentions[snr].append(mid)
+    for snr, sentence_mentions in mentions.index(
+            'sentence_number', lambda m: m.sentence_number).items():
+        sentenceMentions[snr] = [mention.id for mention in sentence_mentions]
 
     return sentenceMentions
 
 
-def add_coref_prohibitions(mentions, coref_info):
+def add_coref_prohibitions(mentions, coref_info, profiler=NULL_PROFILER):
     """
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     """
     sentenceMentions = get_sentence_mentions(mentions)
     for snr, mids in sentenceMentions.items():
         for mid in mids:
+            profiler.count('mentions')
+            profiler.count('comparisons', len(mids))
             mention = mentions.get(mid)
             corefs = set()
             for c_class in coref_info.classes_of_mention(mention):
@@ -359,7 +388,7 @@ def add_coref_prohibitions(mentions, coref_info):
                     mention.coreference_prohibited.append(same_sent_mid)
 
 
-def apply_precise_constructs(mentions, coref_info):
+def apply_precise_constructs(mentions, coref_info, profiler=NULL_PROFILER):
     '''
     Function that moderates the precise constructs (calling one after the
     other)
@@ -367,122 +396,173 @@ def apply_precise_constructs(mentions, coref_info):
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     '''
-    identify_appositive_structures(mentions, coref_info)
-    identify_predicative_structures(mentions, coref_info)
-    resolve_relative_pronoun_structures(mentions, coref_info)
-    identify_acronyms_or_alternative_names(mentions, coref_info)
-    resolve_reflective_pronoun_structures(mentions, coref_info)
+    identify_appositive_structures(mentions, coref_info, profiler)
+    identify_predicative_structures(mentions, coref_info, profiler)
+    resolve_relative_pronoun_structures(mentions, coref_info, profiler)
+    identify_acronyms_or_alternative_names(mentions, coref_info, profiler)
+    resolve_reflective_pronoun_structures(mentions, coref_info, profiler)
     # f. Demonym Israel, Israeli (later)
 
 
-def find_strict_head_antecedents(mention, mentions, sieve):
+def find_strict_head_antecedents(doc, mention, mentions, sieve,
+                                profiler=NULL_PROFILER):
     '''
     Function that looks at which other mentions might be antecedent for the
     current mention
 
+    :param doc:      DocumentInformation of the document
     :param mention:  current mention
-    :param mentions: dictionary of all mentions
+    :param mentions: `MentionCollection` of all mentions
+    :param profiler: Profiler to count comparisons with
     :return:         list of antecedent ids
     '''
-    head_string = offset2string.get(mention.head_offset)
-    non_stop_words = get_string_from_offsets(mention.no_stop_words)
-    main_mods = get_string_from_offsets(mention.main_modifiers)
+    non_stop_words = mention.no_stop_words_string
+    main_mods = mention.main_modifiers_string
     antecedents = []
-    for mid, comp_mention in mentions.items():
+    same_head = mentions.lookup(
+        'head_string', lambda m: m.head_string_id, [mention.head_string_id])
+    profiler.count('comparisons', len(same_head))
+    for comp_mention in same_head:
+        mid = comp_mention.id
         # offset must be smaller to be antecedent and not i-to-i
         if comp_mention.head_offset < mention.head_offset and \
            not mention.head_offset <= comp_mention.end_offset:
-            if head_string == offset2string.get(comp_mention.head_offset):
-                match = True
-                full_span = get_string_from_offsets(comp_mention.span)
-                if sieve in ['5', '7']:
-                    for non_stop_word in non_stop_words:
-                        if non_stop_word not in full_span:
-                            match = False
-                if sieve in ['5', '6']:
-                    for mmod in main_mods:
-                        if mmod not in full_span:
-                            match = False
-                if match:
-                    antecedents.append(mid)
+            match = True
+            full_span = comp_mention.span_string
+            if sieve in ['5', '7']:
+                for non_stop_word in non_stop_words:
+                    if non_stop_word not in full_span:
+                        match = False
+            if sieve in ['5', '6']:
+                for mmod in main_mods:
+                    if mmod not in full_span:
+                        match = False
+            if match:
+                antecedents.append(mid)
 
     return antecedents
 
 
-def apply_strict_head_match(mentions, coref_info, sieve='5'):
+def apply_strict_head_match(doc, mentions, coref_info, sieve='5',
+                            profiler=NULL_PROFILER):
     """
+    :param doc:         DocumentInformation of the document
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
     :param sieve:       ID of the sieve as a string
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     """
     # FIXME: parser specific check for pronoun
     for mention in mentions.values():
         if not mention.head_pos == 'pron':
+            profiler.count('mentions')
             antecedents = find_strict_head_antecedents(
+                doc,
                 mention,
                 mentions,
-                sieve
+                sieve,
+                profiler
             )
             if len(antecedents) > 0:
                 coref_info.add_coref_class(antecedents + [mention.id])
 
 
-def only_identical_numbers(span1, span2):
+def only_identical_numbers(mention1, mention2):
+    '''
+    Whether every digit in the span of `mention1` is also in the span of
+    `mention2`
+    '''
+    return mention1.span_digits <= mention2.span_digits
 
-    word_list1 = get_string_from_offsets(span1)
-    word_list2 = get_string_from_offsets(span2)
 
-    for word in word_list1:
-        if word.isdigit() and word not in word_list2:
-            return False
+def contains_number(mention):
 
-    return True
+    return bool(mention.span_digits)
 
 
-def contains_number(span):
+# Length of the substrings of full heads that the head match sieve looks up
+HEAD_NGRAM_LENGTH = 3
 
-    for word in get_string_from_offsets(span):
-        if word.isdigit():
-            return True
 
-    return False
+def get_named_head_ngrams(mention):
+    '''
+    Get all substrings of at most `HEAD_NGRAM_LENGTH` characters of the full
+    head of a mention of a person, organisation or location (none for other
+    mentions)
+    '''
+    if mention.entity_type not in ('PER', 'ORG', 'LOC'):
+        return []
+    string = mention.full_head_string
+    return [
+        string[start:start + length]
+        for length in range(1, HEAD_NGRAM_LENGTH + 1)
+        for start in range(len(string) - length + 1)
+    ]
+
+
+def get_word_ngrams(word):
+    '''
+    Get substrings of `word` that a string that contains `word` also
+    contains, and that `get_named_head_ngrams` returns for such a string
+    '''
+    if len(word) <= HEAD_NGRAM_LENGTH:
+        return [word]
+    return [
+        word[start:start + HEAD_NGRAM_LENGTH]
+        for start in range(len(word) - HEAD_NGRAM_LENGTH + 1)
+    ]
 
 
-def find_head_match_coreferents(mention, mentions):
+def find_head_match_coreferents(doc, mention, mentions,
+                                profiler=NULL_PROFILER):
     '''
     Function that looks at which mentions might be antecedent for the current
     mention
 
+    :param doc: DocumentInformation of the document
     :param mention: current mention
-    :param mentions: dictionary of all mentions
+    :param mentions: `MentionCollection` of all mentions
+    :param profiler: Profiler to count comparisons with
     :return: list of mention coreferents
     '''
 
     boffset = mention.begin_offset
     eoffset = mention.end_offset
-    full_head_string = get_string_from_offsets(mention.full_head)
-    contains_numbers = contains_number(mention.span)
+    full_head_words = mention.full_head_string.split()
+    contains_numbers = contains_number(mention)
 
     coreferents = []
 
-    for mid, comp_mention in mentions.items():
-        if mid != mention.id and \
-           comp_mention.entity_type in ['PER', 'ORG', 'LOC']:
+    if full_head_words:
+        # Only mentions whose full head contains every word of the full head
+        # of the mention can match, so look those up by their substrings
+        candidates = mentions.lookup_all(
+            'named_head_ngrams',
+            get_named_head_ngrams,
+            [ngram for word in full_head_words
+             for ngram in get_word_ngrams(word)]
+        )
+    else:
+        candidates = mentions.with_entity_type('PER', 'ORG', 'LOC')
+    profiler.count('comparisons', len(candidates))
+    for comp_mention in candidates:
+        mid = comp_mention.id
+        if mid != mention.id:
             # mention may not be included in other mention
             if not comp_mention.begin_offset <= boffset and \
                comp_mention.end_offset >= eoffset:
                 match = True
-                comp_string = get_string_from_offsets(comp_mention.full_head)
-                for word in full_head_string.split():
+                comp_string = comp_mention.full_head_string
+                for word in full_head_words:
                     if word not in comp_string:
                         match = False
-                if contains_numbers and contains_number(comp_mention.span):
-                    if not only_identical_numbers(
-                            mention.span, comp_mention.span):
+                if contains_numbers and contains_number(comp_mention):
+                    if not only_identical_numbers(mention, comp_mention):
                         match = False
                 if match:
                     coreferents.append(mid)
@@ -490,63 +570,71 @@ def find_head_match_coreferents(mention, mentions):
     return coreferents
 
 
-def apply_proper_head_word_match(mentions, coref_info):
+def apply_proper_head_word_match(doc, mentions, coref_info,
+                                 profiler=NULL_PROFILER):
 
     # FIXME: tool specific output for entity type
-    for mention in mentions.values():
-        if mention.entity_type in ['PER', 'ORG', 'LOC', 'MISC']:
-            coreferents = find_head_match_coreferents(mention, mentions)
-            if len(coreferents) > 0:
-                coref_info.add_coref_class(coreferents + [mention.id])
+    for mention in mentions.with_entity_type('PER', 'ORG', 'LOC', 'MISC'):
+        profiler.count('mentions')
+        coreferents = find_head_match_coreferents(
+            doc, mention, mentions, profiler)
+        if len(coreferents) > 0:
+            coref_info.add_coref_class(coreferents + [mention.id])
 
 
-def find_relaxed_head_antecedents(mention, mentions):
+def find_relaxed_head_antecedents(doc, mention, mentions,
+                                  profiler=NULL_PROFILER):
     '''
     Function that identifies antecedents for which relaxed head match applies
 
+    :param doc:
     :param mention:
-    :param mentions:
+    :param mentions: `MentionCollection` of all mentions
+    :param profiler: Profiler to count comparisons with
     :return:
     '''
 
     boffset = mention.begin_offset
-    full_head_string = get_string_from_offsets(mention.full_head)
-    non_stop_words = get_string_from_offsets(mention.no_stop_words)
+    full_head_words = mention.full_head_string.split()
+    non_stop_words = mention.no_stop_words_string
     antecedents = []
 
-    for mid, comp_mention in mentions.items():
+    candidates = mentions.with_entity_type(mention.entity_type)
+    profiler.count('comparisons', len(candidates))
+    for comp_mention in candidates:
         # we want only antecedents
         if comp_mention.end_offset < boffset:
-            if comp_mention.entity_type == mention.entity_type:
-                match = True
-                full_comp_head = get_string_from_offsets(
-                    comp_mention.full_head
-                )
-                for word in full_head_string.split():
-                    if word not in full_comp_head:
-                        match = False
-                full_span = get_string_from_offsets(comp_mention.span)
-                for non_stop_word in non_stop_words:
-                    if non_stop_word not in full_span:
-                        match = False
-                if match:
-                    antecedents.append(mid)
+            match = True
+            full_comp_head = comp_mention.full_head_string
+            for word in full_head_words:
+                if word not in full_comp_head:
+                    match = False
+            full_span = comp_mention.span_string
+            for non_stop_word in non_stop_words:
+                if non_stop_word not in full_span:
+                    match = False
+            if match:
+                antecedents.append(comp_mention.id)
 
     return antecedents
 
 
-def apply_relaxed_head_match(mentions, coref_info):
+def apply_relaxed_head_match(doc, mentions, coref_info,
+                             profiler=NULL_PROFILER):
     """
+    :param doc:         DocumentInformation of the document
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     """
-    for mention in mentions.values():
-        if mention.entity_type in ['PER', 'ORG', 'LOC', 'MISC']:
-            antecedents = find_relaxed_head_antecedents(mention, mentions)
-            if len(antecedents) > 0:
-                coref_info.add_coref_class(antecedents + [mention.id])
+    for mention in mentions.with_entity_type('PER', 'ORG', 'LOC', 'MISC'):
+        profiler.count('mentions')
+        antecedents = find_relaxed_head_antecedents(
+            doc, mention, mentions, profiler)
+        if len(antecedents) > 0:
+            coref_info.add_coref_class(antecedents + [mention.id])
 
 
 def is_compatible(string1, string2):
@@ -582,19 +670,20 @@ def check_compatibility(mention1, mention2):
     return True
 
 
-def get_candidates_and_distance(mention, mentions):
+def get_candidates_and_distance(mention, mentions, profiler=NULL_PROFILER):
 
     candidates = {}
     sent_nr = mention.sentence_number
-    for mid, comp_mention in mentions.items():
+    # only consider up to 3 preceding sentences
+    comp_mentions = mentions.in_sentences(*range(sent_nr - 3, sent_nr + 1))
+    profiler.count('comparisons', len(comp_mentions))
+    for comp_mention in comp_mentions:
+        mid = comp_mention.id
         if mention.head_offset > comp_mention.head_offset:
-            csnr = comp_mention.sentence_number
-            # only consider up to 3 preceding sentences
-            if csnr <= sent_nr <= csnr + 3:
-                # check if not prohibited
-                if mid not in mention.coreference_prohibited:
-                    if check_compatibility(mention, comp_mention):
-                        candidates[mid] = comp_mention.head_offset
+            # check if not prohibited
+            if mid not in mention.coreference_prohibited:
+                if check_compatibility(mention, comp_mention):
+                    candidates[mid] = comp_mention.head_offset
 
     return candidates
 
@@ -610,27 +699,28 @@ def identify_closest_candidate(mention_index, candidates):
     return antecedent
 
 
-def identify_antecedent(mention, mentions):
+def identify_antecedent(mention, mentions, profiler=NULL_PROFILER):
 
-    candidates = get_candidates_and_distance(mention, mentions)
+    candidates = get_candidates_and_distance(mention, mentions, profiler)
     mention_index = mention.head_offset
     antecedent = identify_closest_candidate(mention_index, candidates)
 
     return antecedent
 
 
-def resolve_pronoun_coreference(mentions, coref_info):
+def resolve_pronoun_coreference(mentions, coref_info, profiler=NULL_PROFILER):
     """
     :param mentions:    dictionary of all available mention objects (key is
                         mention id)
     :param coref_info:  CoreferenceInformation with current coreference classes
+    :param profiler:    Profiler to count mentions and comparisons with
     :return:            None (mentions and coref_classes are updated in place)
     """
-    for mention in mentions.values():
+    for mention in mentions.with_head_pos('pron'):
         # we only deal with unresolved pronouns here
-        if mention.head_pos == 'pron' and \
-           len(coref_info.classes_of_mention(mention)) == 0:
-            antecedent = identify_antecedent(mention, mentions)
+        if len(coref_info.classes_of_mention(mention)) == 0:
+            profiler.count('mentions')
+            antecedent = identify_antecedent(mention, mentions, profiler)
             if antecedent is not None:
                 coref_info.add_coref_class([antecedent, mention.id])
 
@@ -645,7 +735,7 @@ def remove_singleton_coreference_classes(coref_classes):
         del coref_classes[cID]
 
 
-def post_process(nafobj, mentions, coref_info,
+def post_process(doc, mentions, coref_info,
                  fill_gaps=c.FILL_GAPS_IN_OUTPUT,
                  include_singletons=c.INCLUDE_SINGLETONS_IN_OUTPUT):
     # Remove unused mentions
@@ -656,168 +746,203 @@ def post_process(nafobj, mentions, coref_info,
 
     # Fill gaps in the used mentions
     if fill_gaps:
-        all_offsets = [
-            int(token.get_offset()) for token in nafobj.get_tokens()
-        ]
+        columns = doc.columns
+        if columns is not None and not columns.tokens_sorted:
+            columns = None
         for mention in mentions.values():
-            mention.fill_gaps(all_offsets)
+            if columns is not None and \
+                    len(mention.span) >= MIN_VECTORIZED_SPAN:
+                mention.span = tuple(columns.fill_gaps(mention.span))
+            else:
+                mention.fill_gaps(
+                    doc.token_offsets, positions=doc.token_position)
 
     if not include_singletons:
         remove_singleton_coreference_classes(coref_info.coref_classes)
 
 
-def initialize_global_dictionaries(nafobj):
-
-    global offset2string, offset2lemma
-
-    logger.debug("get_offset2string_dicts")
-    offset2string, offset2lemma = get_offset2string_dicts(nafobj)
-
-    logger.debug("initiate_stopword_list")
-    initiate_stopword_list()
-
-    logger.debug("create_headdep_dicts")
-    create_headdep_dicts(nafobj)
-
-
 def resolve_coreference(nafin,
                         fill_gaps=c.FILL_GAPS_IN_OUTPUT,
-                        include_singletons=c.INCLUDE_SINGLETONS_IN_OUTPUT):
+                        include_singletons=c.INCLUDE_SINGLETONS_IN_OUTPUT,
+                        profiler=NULL_PROFILER,
+                        release_memory=False,
+                        columns=False):
+    """
+    Find the coreference classes and mentions of a document.
+
+    :param nafin:   the input NAF object, or the `DocumentInformation` of the
+                    input (e.g. from `naf_reader.read_naf`)
+    :param release_memory:  whether to drop the parts of the document
+                            information that are only needed to find
+                            mentions and quotations before running the sieves
+                            (see `DocumentInformation.release`). The document
+                            information can then only be used for output.
+    :param columns: whether to compute the offsets of long spans with
+                    `columns.DocumentColumns` (which requires NumPy) when
+                    `nafin` is a NAF object. The result is the same.
+    :return:        (coreference classes, mentions)
+    """
 
     logger.info("Initializing...")
-    initialize_global_dictionaries(nafin)
+    with profiler.stage('initialisation'):
+        if isinstance(nafin, DocumentInformation):
+            doc = nafin
+        else:
+            doc = DocumentInformation.from_naf(nafin, columns=columns)
     logger.info("Finding mentions...")
-    mentions = get_mentions(nafin)
+    with profiler.stage('get_mentions'):
+        mentions = get_mentions(doc, profiler)
     logger.info("Finding quotations...")
-    quotations = identify_direct_quotations(nafin, mentions)
+    with profiler.stage('identify_direct_quotations'):
+        quotations = identify_direct_quotations(doc, mentions, profiler)
+
+    if release_memory:
+        if logger.getEffectiveLevel() <= logging.DEBUG:
+            # The debug output of the sieves needs the terms and tokens
+            logger.debug("Not releasing the document information")
+        else:
+            doc.release()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         from .util import view_mentions
         logger.debug(
             "Mentions just before S1: {}".format(
-                view_mentions(nafin, mentions)
+                view_mentions(doc, mentions)
             )
         )
 
     coref_info = CoreferenceInformation()
+    profiler.track_merges(coref_info)
 
     logger.info("Sieve 1: Speaker Identification")
-    direct_speech_interpretation(quotations, mentions, coref_info)
-    coref_info.merge()
+    with profiler.stage('sieve 1: speaker identification'):
+        direct_speech_interpretation(
+            quotations, mentions, coref_info, profiler)
+        coref_info.merge()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         from .util import view_coref_classes
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("Sieve 2: String Match")
-    match_full_name_overlap(mentions, coref_info)
-    coref_info.merge()
+    with profiler.stage('sieve 2: string match'):
+        match_full_name_overlap(doc, mentions, coref_info, profiler)
+        coref_info.merge()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("Sieve 3: Relaxed String Match")
-    match_relaxed_string(mentions, coref_info)
-    coref_info.merge()
+    with profiler.stage('sieve 3: relaxed string match'):
+        match_relaxed_string(doc, mentions, coref_info, profiler)
+        coref_info.merge()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("Sieve 4: Precise constructs")
-    apply_precise_constructs(mentions, coref_info)
-    coref_info.merge()
+    with profiler.stage('sieve 4: precise constructs'):
+        apply_precise_constructs(mentions, coref_info, profiler)
+        coref_info.merge()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("Sieve 5-7: Strict Head Match")
-    apply_strict_head_match(mentions, coref_info)
-    coref_info.merge()
+    with profiler.stage('sieve 5-7: strict head match'):
+        apply_strict_head_match(doc, mentions, coref_info, profiler=profiler)
+        coref_info.merge()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("Sieve 8: Proper Head Word Match")
-    apply_proper_head_word_match(mentions, coref_info)
-    coref_info.merge()
+    with profiler.stage('sieve 8: proper head word match'):
+        apply_proper_head_word_match(doc, mentions, coref_info, profiler)
+        coref_info.merge()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("Sieve 9: Relaxed Head Match")
-    apply_relaxed_head_match(mentions, coref_info)
-    coref_info.merge()
+    with profiler.stage('sieve 9: relaxed head match'):
+        apply_relaxed_head_match(doc, mentions, coref_info, profiler)
+        coref_info.merge()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("Sieve 10")
 
     logger.info("\tAdd coreferences prohibitions")
-    add_coref_prohibitions(mentions, coref_info)
+    with profiler.stage('sieve 10: coreference prohibitions'):
+        add_coref_prohibitions(mentions, coref_info, profiler)
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("\tResolve relative pronoun coreferences")
-    resolve_pronoun_coreference(mentions, coref_info)
+    with profiler.stage('sieve 10: pronoun resolution'):
+        resolve_pronoun_coreference(mentions, coref_info, profiler)
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
-    coref_info.merge()
+    with profiler.stage('merge coreference classes'):
+        coref_info.merge()
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         logger.debug(
             "Coreference classes: {}".format(
-                view_coref_classes(nafin, mentions, coref_info.coref_classes)
+                view_coref_classes(doc, mentions, coref_info.coref_classes)
             )
         )
 
     logger.info("Post processing...")
-    post_process(
-        nafin,
-        mentions,
-        coref_info,
-        fill_gaps=fill_gaps,
-        include_singletons=include_singletons
-    )
+    with profiler.stage('post_process'):
+        post_process(
+            doc,
+            mentions,
+            coref_info,
+            fill_gaps=fill_gaps,
+            include_singletons=include_singletons
+        )
 
     return coref_info.coref_classes, mentions
 
@@ -825,27 +950,125 @@ def resolve_coreference(nafin,
 def process_coreference(
         nafin,
         fill_gaps=c.FILL_GAPS_IN_OUTPUT,
-        include_singletons=c.INCLUDE_SINGLETONS_IN_OUTPUT):
+        include_singletons=c.INCLUDE_SINGLETONS_IN_OUTPUT,
+        profiler=NULL_PROFILER,
+        release_memory=False,
+        columns=False):
     """
     Process coreferences and add to the given NAF.
     Note that coreferences are added in place, and the NAF is returned for
     convenience
+
+    Pass a `profiling.Profiler` as `profiler` to record time and counters for
+    every stage. See `resolve_coreference` for `release_memory` and
+    `columns`.
     """
+    with profiler.stage('initialisation'):
+        doc = DocumentInformation.from_naf(nafin, columns=columns)
     coref_classes, mentions = resolve_coreference(
-        nafin,
+        doc,
+        fill_gaps=fill_gaps,
+        include_singletons=include_singletons,
+        profiler=profiler,
+        release_memory=release_memory
+    )
+    logger.info("Adding coreference information to NAF...")
+    with profiler.stage('add_coreference_to_naf'):
+        add_coreference_to_naf(
+            nafin, coref_classes, mentions, doc.offset2term)
+
+
+def process_coreference_bytes(
+        data,
+        fill_gaps=c.FILL_GAPS_IN_OUTPUT,
+        include_singletons=c.INCLUDE_SINGLETONS_IN_OUTPUT,
+        profiler=NULL_PROFILER,
+        begintime=None,
+        cache_dir=None,
+        out=None,
+        strings=None,
+        release_memory=False,
+        columns=False):
+    """
+    Process coreferences of a NAF document given as bytes, without building a
+    NAF object.
+
+    The input is read with `naf_reader.read_naf` and returned unchanged,
+    except for the added coreferences and linguistic processor header entry
+    (see `naf_writer`).
+
+    :param data:        bytes (or memory map) of the input NAF
+    :param begintime:   begin timestamp for the header (default: now)
+    :param cache_dir:   directory to cache preprocessed documents in (see
+                        `cache`), or None to always read the XML
+    :param out:         binary file to write the output NAF to
+    :param strings:     `document_info.StringTable` to share between the
+                        documents of a batch (default: one per document)
+    :param release_memory:  see `resolve_coreference`
+    :param columns:     see `resolve_coreference`
+    :return:            bytes of the output NAF, or None if `out` is given
+    """
+    from .cache import read_document
+    from .naf_writer import add_coreferences, write_naf
+
+    if begintime is None:
+        begintime = time.strftime('%Y-%m-%dT%H:%M:%S%Z')
+    with profiler.stage('initialisation'):
+        doc = read_document(
+            data, cache_dir, strings=strings, columns=columns)
+    coref_classes, mentions = resolve_coreference(
+        doc,
         fill_gaps=fill_gaps,
-        include_singletons=include_singletons
+        include_singletons=include_singletons,
+        profiler=profiler,
+        release_memory=release_memory
     )
     logger.info("Adding coreference information to NAF...")
-    add_coreference_to_naf(nafin, coref_classes, mentions)
+    with profiler.stage('add_coreference_to_naf'):
+        if out is not None:
+            write_naf(out, data, doc, coref_classes, mentions, begintime)
+            return None
+        return add_coreferences(
+            data, doc, coref_classes, mentions, begintime)
+
+
+def process_coreference_file(infile, out, **kwargs):
+    """
+    Process coreferences of a NAF file, like `process_coreference_bytes`,
+    reading it through a memory map.
+
+    Only the parts of the file that are being parsed or copied to `out` have
+    to be in memory at any time, so memory use doesn't grow with several
+    times the size of the file.
+
+    :param infile:  path to the input NAF file
+    :param out:     binary file to write the output NAF to
+    :param kwargs:  see `process_coreference_bytes`
+    """
+    import mmap
+
+    with open(infile, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        process_coreference_bytes(data, out=out, **kwargs)
+    finally:
+        data.close()
+
+
+def get_version():
+    """
+    Get the version of this package.
+    """
+    return __version__
 
 
 def add_naf_header(nafobj, begintime):
+    from KafNafParserPy import Clp
 
     endtime = time.strftime('%Y-%m-%dT%H:%M:%S%Z')
     lp = Clp(
         name="vua-multisieve-coreference",
-        version=get_distribution(__name__.split('.')[0]).version,
+        version=get_version(),
         btimestamp=begintime,
         etimestamp=endtime)
     nafobj.add_linguistic_processor('coreferences', lp)
@@ -856,6 +1079,12 @@ def main(argv=None):
     from argparse import ArgumentParser
 
     parser = ArgumentParser()
+    parser.add_argument(
+        'infile',
+        help="NAF file to process, read through a memory map (implies"
+             " --streaming). By default the input is read from stdin",
+        nargs='?',
+    )
     parser.add_argument('-l', '--level', help="Logging level",
                         default='WARNING')
     parser.add_argument(
@@ -870,22 +1099,203 @@ def main(argv=None):
         help="Whether to fill gaps in mention spans",
         action='store_true',
     )
+    parser.add_argument(
+        '--streaming',
+        help="Read the input without building a NAF object and copy it to"
+             " the output unchanged, except for the new coreferences and"
+             " header entry. Uses much less memory for large documents",
+        action='store_true',
+    )
+    parser.add_argument(
+        '--cache-dir',
+        help="Keep preprocessed documents in this directory, so that running"
+             " again on the same input doesn't parse the XML again. Implies"
+             " --streaming",
+    )
+    parser.add_argument(
+        '--release-memory',
+        help="Free the information that is only needed to find mentions and"
+             " quotations before running the sieves. Useful to lower the"
+             " memory use of long-running modes; the peak memory use of every"
+             " document is in the --profile output",
+        action='store_true',
+    )
+    parser.add_argument(
+        '--columns',
+        help="Compute the offsets of long mention spans with vectorized"
+             " operations (requires NumPy). Doesn't change the output",
+        action='store_true',
+    )
+    parser.add_argument(
+        '-i',
+        '--input-dir',
+        help="Process every file in this directory instead of reading from"
+             " stdin",
+    )
+    parser.add_argument(
+        '--file-list',
+        help="Process every file listed in this file (one path per line)"
+             " instead of reading from stdin",
+    )
+    parser.add_argument(
+        '-o',
+        '--output-dir',
+        help="Directory to write the results of --input-dir or --file-list to",
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        help="Number of worker processes for --input-dir or --file-list"
+             " (0 means one per CPU)",
+        type=int,
+    )
+    parser.add_argument(
+        '--port',
+        help="Serve over HTTP on this port instead of reading from stdin",
+        type=int,
+    )
+    parser.add_argument(
+        '--host',
+        help="Host to bind to with --port (default: %(default)s)",
+        default='127.0.0.1',
+    )
+    parser.add_argument(
+        '--unix-socket',
+        help="Serve over HTTP on this Unix domain socket instead of reading"
+             " from stdin",
+    )
+    parser.add_argument(
+        '--jsonl',
+        help="Keep reading documents from stdin and writing results to stdout"
+             " as JSON objects, one per line",
+        action='store_true',
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='FILE',
+        help="Append time and counters of every pipeline stage to FILE as"
+             " JSON, one line per document ('-' for stderr). With --jsonl the"
+             " profile is added to every response instead",
+        nargs='?',
+        const='-',
+    )
     cmdl_args = vars(parser.parse_args(argv))
     logging.basicConfig(level=cmdl_args.pop('level'))
 
+    infile = cmdl_args.pop('infile')
+
+    input_dir = cmdl_args.pop('input_dir')
+    file_list = cmdl_args.pop('file_list')
+    output_dir = cmdl_args.pop('output_dir')
+    jobs = cmdl_args.pop('jobs')
+    port = cmdl_args.pop('port')
+    host = cmdl_args.pop('host')
+    unix_socket = cmdl_args.pop('unix_socket')
+    jsonl = cmdl_args.pop('jsonl')
+    profile = cmdl_args.pop('profile')
+    streaming = cmdl_args.pop('streaming')
+    cache_dir = cmdl_args.pop('cache_dir')
+    streaming = streaming or cache_dir is not None or infile is not None
+    batch_mode = input_dir is not None or file_list is not None
+    modes = [batch_mode, port is not None, unix_socket is not None, jsonl]
+    if sum(modes) > 1:
+        parser.error("Only one of --input-dir/--file-list, --port,"
+                     " --unix-socket and --jsonl can be used")
+    if infile is not None and any(modes):
+        parser.error("An input file can't be used with --input-dir,"
+                     " --file-list, --port, --unix-socket or --jsonl")
+    if streaming and (jsonl or port is not None or unix_socket is not None):
+        parser.error("--streaming and --cache-dir can't be used with --jsonl,"
+                     " --port or --unix-socket")
+    if jsonl:
+        from .jsonl_worker import run
+        run(profile=profile is not None, **cmdl_args)
+        return
+    elif port is not None or unix_socket is not None:
+        if profile is not None:
+            parser.error("--profile can't be used with --port or"
+                         " --unix-socket")
+        from .server import serve
+        serve(host=host, port=port, unix_socket=unix_socket, **cmdl_args)
+        return
+    elif batch_mode:
+        if output_dir is None:
+            parser.error(
+                "--output-dir is required with --input-dir or --file-list")
+        if jobs is not None and jobs < 0:
+            parser.error("--jobs must not be negative")
+        from .batch import find_input_files, process_files
+        infiles = find_input_files(input_dir, file_list)
+        failed = process_files(
+            infiles,
+            output_dir,
+            jobs=1 if jobs is None else jobs,
+            profile_file=profile,
+            streaming=streaming,
+            cache_dir=cache_dir,
+            **cmdl_args
+        )
+        if failed:
+            logger.error("Failed to process {} of {} files".format(
+                len(failed), len(infiles)))
+            sys.exit(1)
+        return
+    elif output_dir is not None or jobs is not None:
+        parser.error(
+            "--output-dir and --jobs require --input-dir or --file-list")
+
     # timestamp begintime
     begintime = time.strftime('%Y-%m-%dT%H:%M:%S%Z')
+    if profile is None:
+        profiler = NULL_PROFILER
+    else:
+        # Only this document is processed, so its peak memory use can be
+        # measured from here
+        reset_peak_memory()
+        profiler = Profiler()
+
+    if streaming:
+        out = getattr(sys.stdout, 'buffer', sys.stdout)
+        logger.info("Processing...")
+        if infile is not None:
+            process_coreference_file(
+                infile,
+                out,
+                profiler=profiler,
+                begintime=begintime,
+                cache_dir=cache_dir,
+                **cmdl_args
+            )
+        else:
+            data = getattr(sys.stdin, 'buffer', sys.stdin).read()
+            process_coreference_bytes(
+                data,
+                profiler=profiler,
+                begintime=begintime,
+                cache_dir=cache_dir,
+                out=out,
+                **cmdl_args
+            )
+        if profile is not None:
+            write_profiles(profile, [profiler.as_dict()])
+        return
+
+    # Only imported now, so --help and the other modes don't pay for it
+    from KafNafParserPy import KafNafParser
 
     logger.info("Reading...")
     nafobj = KafNafParser(sys.stdin)
     logger.info("Processing...")
-    process_coreference(nafobj, **cmdl_args)
+    process_coreference(nafobj, profiler=profiler, **cmdl_args)
 
     # adding naf header information
     add_naf_header(nafobj, begintime)
     logger.info("Writing...")
     nafobj.dump()
 
+    if profile is not None:
+        write_profiles(profile, [profiler.as_dict()])
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,235 @@
+"""
+This module runs the coreference resolver as a long-running local HTTP
+server, so that the process and its resources stay warm between documents.
+
+    POST /          NAF document in the body, NAF with coreferences returned
+    GET  /health    JSON status of the server
+    GET  /stats     JSON latency statistics of recent requests
+
+Every connection is handled in its own thread, so that an idle (keep-alive)
+connection or a long document doesn't keep the server from answering
+`/health` and `/stats`, but documents are resolved one at a time; run
+several servers behind a load balancer to use more cores. Connections that
+are idle for `IDLE_TIMEOUT` seconds are closed.
+"""
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from collections import deque
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn, UnixStreamServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn, UnixStreamServer
+
+from lxml.etree import XMLSyntaxError
+
+from .batch import init_worker, process_document
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+# Seconds after which an idle connection is closed
+IDLE_TIMEOUT = 60
+
+
+class LatencyStatistics:
+    '''
+    Keeps track of the number of processed documents and of the latencies of
+    the most recent ones. It can be used from several threads.
+    '''
+
+    def __init__(self, window=1000):
+        self.started = time.time()
+        self.count = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds, succeeded=True):
+        with self.lock:
+            self.count += 1
+            if not succeeded:
+                self.errors += 1
+            self.latencies.append(seconds)
+
+    def uptime(self):
+        return time.time() - self.started
+
+    def as_dict(self):
+        '''
+        Summary of the statistics, with latencies in seconds
+        '''
+        with self.lock:
+            latencies = sorted(self.latencies)
+        summary = {
+            'count': self.count,
+            'errors': self.errors,
+            'window': len(latencies),
+        }
+        if latencies:
+            summary.update(
+                mean=sum(latencies) / len(latencies),
+                min=latencies[0],
+                p50=get_percentile(latencies, 50),
+                p95=get_percentile(latencies, 95),
+                p99=get_percentile(latencies, 99),
+                max=latencies[-1],
+            )
+        return summary
+
+
+def get_percentile(ordered, percentile):
+    '''
+    Nearest-rank percentile of a sorted, non-empty list
+    '''
+    index = int(round(percentile / 100.0 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class CoreferenceRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    timeout = IDLE_TIMEOUT
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        stats = self.server.stats
+        if path == '/health':
+            self.send_json({
+                'status': 'ok',
+                'pid': os.getpid(),
+                'uptime': stats.uptime(),
+                'documents': stats.count,
+            })
+        elif path == '/stats':
+            self.send_json(stats.as_dict())
+        else:
+            self.send_text(404, "Not found: {}".format(path))
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        if path not in ('/', '/coref'):
+            self.send_text(404, "Not found: {}".format(path))
+            return
+
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.send_text(411, "Content-Length is required")
+            return
+        try:
+            length = int(length)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.send_text(
+                400, "Invalid Content-Length: {}".format(length))
+            return
+        data = self.rfile.read(length)
+
+        start = time.time()
+        try:
+            with self.server.processing_lock:
+                result = process_document(
+                    data, **self.server.process_kwargs)
+        except XMLSyntaxError as e:
+            self.server.stats.record(time.time() - start, succeeded=False)
+            self.send_text(400, "Could not parse NAF: {}".format(e))
+            return
+        except Exception as e:
+            logger.exception("Could not process document")
+            self.server.stats.record(time.time() - start, succeeded=False)
+            self.send_text(500, "Could not process document: {}".format(e))
+            return
+        self.server.stats.record(time.time() - start)
+        self.send_body(200, 'application/xml', result)
+
+    def send_body(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, obj):
+        self.send_body(200, 'application/json', json.dumps(obj).encode('utf-8'))
+
+    def send_text(self, code, text):
+        self.send_body(code, 'text/plain; charset=utf-8', text.encode('utf-8'))
+
+    def address_string(self):
+        # Unix domain socket clients don't have a (host, port) address
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return 'unix'
+
+    def log_message(self, format, *args):
+        logger.info("{} - {}".format(self.address_string(), format % args))
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    '''
+    HTTP server that handles every connection in its own thread
+    '''
+    daemon_threads = True
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    '''
+    HTTP server listening on a Unix domain socket, that handles every
+    connection in its own thread
+    '''
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        UnixStreamServer.server_bind(self)
+        self.server_name = socket.gethostname()
+        self.server_port = 0
+
+
+def make_server(host='127.0.0.1', port=None, unix_socket=None, **kwargs):
+    '''
+    Create a coreference server on either a TCP port or a Unix domain socket
+
+    :param host:        host to bind to if `port` is given
+    :param port:        TCP port to listen on (0 picks a free one)
+    :param unix_socket: path of the Unix domain socket to listen on
+    :param kwargs:      passed on to `process_document` for every request
+    :return:            server object, which isn't serving yet
+    '''
+    if (port is None) == (unix_socket is None):
+        raise ValueError("Exactly one of `port` and `unix_socket` is needed")
+
+    if unix_socket is not None:
+        server = UnixHTTPServer(unix_socket, CoreferenceRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), CoreferenceRequestHandler)
+    server.stats = LatencyStatistics()
+    server.processing_lock = threading.Lock()
+    server.process_kwargs = kwargs
+    return server
+
+
+def serve(**kwargs):
+    '''
+    Load all resources and serve until interrupted
+
+    :param kwargs:  passed on to `make_server`
+    '''
+    init_worker()
+    server = make_server(**kwargs)
+    logger.info("Serving on {}".format(server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(server, UnixHTTPServer):
+            os.remove(server.server_address)
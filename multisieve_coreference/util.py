@@ -1,14 +1,13 @@
 import itertools as it
-from .dump import get_offset_to_term_id_dict
 
 
-def term_id_to_tokens(nafobj, term_id):
-    term = nafobj.get_term(term_id)
+def term_id_to_tokens(doc, term_id):
+    term = doc.terms.get(term_id)
     if term is None:
         raise ValueError("No term with that ID: {!r}".format(term_id))
     return [
-        (ID, nafobj.get_token(ID).get_text())
-        for ID in term.get_span_ids()
+        (ID, doc.tokens[ID].text)
+        for ID in term.token_ids
     ]
 
 
@@ -19,34 +18,34 @@ def safe_term_id_to_tokens(*args, **kwargs):
         return []
 
 
-def view_mentions(nafobj, mentions):
+def view_mentions(doc, mentions):
     """
     Content of mention constituent on separate lines
     """
     return '\n'.join(
-        view_mention(nafobj, mID, mention)
+        view_mention(doc, mID, mention)
         for mID, mention in mentions.items()
     )
 
 
-def view_mention(nafobj, mention_ID, mention):
-    dic = get_offset_to_term_id_dict(nafobj)
+def view_mention(doc, mention_ID, mention):
+    dic = doc.offset2term
     return '{}: {!r}'.format(
         mention_ID,
         list(it.chain.from_iterable(
-            term_id_to_tokens(nafobj, termID)
+            term_id_to_tokens(doc, termID)
             for termID in map(dic.get, mention.span)
         ))
     )
 
 
-def view_coref_classes(nafobj, mentions, coref_classes):
+def view_coref_classes(doc, mentions, coref_classes):
     """
     Content of mention constituent on separate lines
     """
     return '\n'.join(
         str(cID) + ':\n\t' + '\n\t'.join(
-            view_mention(nafobj, mID, mentions[mID])
+            view_mention(doc, mID, mentions[mID])
             for mID in mention_ids
         )
         for cID, mention_ids in coref_classes.items()
@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
 
+import re
 from setuptools import setup, find_packages
 
 
 with open('README.md') as f:
     readme = f.read()
 
+# Read the version without importing the package (and its dependencies)
+with open('multisieve_coreference/__init__.py') as f:
+    version = re.search(r"^__version__ = '(.*)'$", f.read(), re.M).group(1)
+
 setup(
     name='multisieve_coreference',
-    version='0.1.1',
+    version=version,
     description='Basic coreference resolution module, based on multi-sieve',
     long_description=readme,
     long_description_content_type="text/markdown",
@@ -20,6 +25,10 @@ setup(
     install_requires=[
         "KafNafParserPy>=1.88",
     ],
+    extras_require={
+        # Vectorized span computations for long documents
+        'columns': ["numpy"],
+    },
     classifiers=[
         'Development Status :: 2 - Pre-Alpha',
         'License :: OSI Approved :: Apache Software License',
@@ -27,6 +27,14 @@ def run_and_compare(infile, outfile, correctoutfile):
             stdout=out
         )
 
+    compare_output(outfile, correctoutfile)
+
+
+def compare_output(outfile, correctoutfile):
+    """
+    Compares the contents of `outfile` to `correctoutfile`, filling in the
+    header data of `outfile` like `run_and_compare` does.
+    """
     with open(outfile) as out, open(correctoutfile) as correct:
         # Check something happened and that the result can be parsed
         outnaf = KafNafParser(outfile)
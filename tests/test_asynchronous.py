@@ -0,0 +1,96 @@
+import sys
+
+import pytest
+
+if sys.version_info < (3, 6):
+    pytest.skip("asyncio API requires Python 3.6", allow_module_level=True)
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from run_and_compare import compare_output
+
+from multisieve_coreference.asynchronous import (
+    resolve_as_completed,
+    resolve_documents,
+)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def example_naf(example_naf_file):
+    with open(example_naf_file, 'rb') as fd:
+        return fd.read()
+
+
+def test_resolve_documents(example_naf, example_naf_output, temp_file):
+    documents = [('a', example_naf), ('broken', b'<NAF>'),
+                 ('c', example_naf.decode('utf-8'))]
+    with ThreadPoolExecutor(2) as executor:
+        results = run(resolve_documents(documents, executor))
+
+    assert [r.key for r in results] == ['a', 'broken', 'c']
+    assert results[1].naf is None
+    assert results[1].error is not None
+
+    with open(temp_file, 'wb') as out:
+        out.write(results[0].naf)
+    compare_output(temp_file, example_naf_output)
+    assert results[0].error is None
+    assert results[2].naf == results[0].naf
+
+
+def test_back_pressure(example_naf):
+    pulled = []
+    in_flight = []
+
+    async def documents():
+        for number in range(5):
+            pulled.append(number)
+            yield number, example_naf
+
+    async def consume():
+        results = []
+        async for result in resolve_as_completed(
+                documents(), max_in_flight=2):
+            in_flight.append(len(pulled) - len(results))
+            results.append(result)
+        return results
+
+    results = run(consume())
+
+    assert sorted(r.key for r in results) == list(range(5))
+    assert max(in_flight) <= 2
+
+
+def test_invalid_max_in_flight():
+    with pytest.raises(ValueError):
+        run(resolve_documents([], max_in_flight=0))
+
+
+def test_abandoned_iteration_closes_input(example_naf):
+    closed = []
+
+    async def documents():
+        try:
+            for number in range(5):
+                yield number, example_naf
+        finally:
+            closed.append(True)
+
+    async def consume_one():
+        results = resolve_as_completed(documents(), executor, max_in_flight=2)
+        result = await results.__anext__()
+        await results.aclose()
+        return result
+
+    with ThreadPoolExecutor(2) as executor:
+        assert run(consume_one()).error is None
+    assert closed == [True]
@@ -0,0 +1,105 @@
+import json
+import os
+import pytest
+from run_and_compare import compare_output
+
+from multisieve_coreference.resolve_coreference import main
+from multisieve_coreference.batch import (
+    find_input_files,
+    get_output_files,
+    get_worker_throughput,
+    TaskResult
+)
+
+
+@pytest.fixture
+def in_dir(resources_dir):
+    return os.path.join(resources_dir, 'easy-sentences/NAFin')
+
+
+@pytest.fixture
+def correct_out_dir(resources_dir):
+    return os.path.join(resources_dir, 'easy-sentences/NAFout')
+
+
+def test_find_input_files(in_dir, example_naf_file, tmpdir):
+    file_list = tmpdir.join('files.txt')
+    file_list.write('\n{}\n\n'.format(example_naf_file))
+    infiles = find_input_files(in_dir, str(file_list))
+    assert infiles[:-1] == sorted(infiles[:-1])
+    assert len(infiles) == len(os.listdir(in_dir)) + 1
+    assert infiles[-1] == example_naf_file
+
+
+def test_get_output_files_clash(in_dir, correct_out_dir):
+    infiles = find_input_files(in_dir)
+    infiles.append(os.path.join(correct_out_dir, os.path.basename(infiles[0])))
+    with pytest.raises(ValueError):
+        get_output_files(infiles, 'out')
+
+
+def test_batch_input_dir(in_dir, correct_out_dir, tmpdir):
+    out_dir = str(tmpdir.join('out'))
+    main(['--input-dir', in_dir, '--output-dir', out_dir])
+    assert sorted(os.listdir(out_dir)) == sorted(os.listdir(in_dir))
+    for filename in os.listdir(in_dir):
+        compare_output(
+            os.path.join(out_dir, filename),
+            os.path.join(correct_out_dir, filename)
+        )
+
+
+def test_batch_file_list(example_naf_file, example_naf_output, tmpdir):
+    file_list = tmpdir.join('files.txt')
+    file_list.write(example_naf_file + '\n')
+    out_dir = str(tmpdir.join('out'))
+    main(['--file-list', str(file_list), '-o', out_dir])
+    compare_output(
+        os.path.join(out_dir, os.path.basename(example_naf_file)),
+        example_naf_output
+    )
+
+
+def test_batch_continues_after_failure(example_naf_file, tmpdir):
+    broken = tmpdir.join('broken.naf')
+    broken.write('<NAF>')
+    file_list = tmpdir.join('files.txt')
+    file_list.write('{}\n{}\n'.format(broken, example_naf_file))
+    out_dir = tmpdir.join('out')
+    with pytest.raises(SystemExit):
+        main(['--file-list', str(file_list), '-o', str(out_dir)])
+    assert out_dir.join(os.path.basename(example_naf_file)).check()
+    assert not out_dir.join('broken.naf').check()
+
+
+def test_batch_jobs(in_dir, correct_out_dir, tmpdir):
+    out_dir = str(tmpdir.join('out'))
+    main(['--input-dir', in_dir, '--output-dir', out_dir, '--jobs', '2'])
+    assert sorted(os.listdir(out_dir)) == sorted(os.listdir(in_dir))
+    for filename in os.listdir(in_dir):
+        compare_output(
+            os.path.join(out_dir, filename),
+            os.path.join(correct_out_dir, filename)
+        )
+
+
+def test_get_worker_throughput():
+    results = [
+        TaskResult('a', 1, 1.0, True, None),
+        TaskResult('b', 2, 2.0, True, None),
+        TaskResult('c', 1, 0.5, False, None),
+    ]
+    assert list(get_worker_throughput(results).items()) == [
+        (1, (2, 1.5)),
+        (2, (1, 2.0)),
+    ]
+
+
+def test_batch_profile(in_dir, tmpdir):
+    out_dir = str(tmpdir.join('out'))
+    profile_file = str(tmpdir.join('profile.jsonl'))
+    main(['--input-dir', in_dir, '--output-dir', out_dir,
+          '--profile', profile_file])
+    with open(profile_file) as fd:
+        profiles = [json.loads(line) for line in fd]
+    assert [p['document'] for p in profiles] == find_input_files(in_dir)
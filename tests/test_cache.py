@@ -0,0 +1,85 @@
+import os
+
+from multisieve_coreference.cache import (
+    DocumentCache,
+    get_cache_key,
+    read_document,
+    SUFFIX,
+)
+from multisieve_coreference.resolve_coreference import (
+    main,
+    resolve_coreference,
+)
+
+
+def read_bytes(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def assert_same_document(doc, expected):
+    assert doc.tokens == expected.tokens
+    assert doc.terms == expected.terms
+    assert doc.entities == expected.entities
+    assert doc.tree == expected.tree
+
+
+def test_read_from_cache(sonar_naf_file2, tmpdir):
+    cache_dir = str(tmpdir.join('cache'))
+    data = read_bytes(sonar_naf_file2)
+    expected = read_document(data)
+
+    doc = read_document(data, cache_dir)
+    assert os.listdir(cache_dir) == [get_cache_key(data) + SUFFIX]
+    assert_same_document(doc, expected)
+
+    cached = DocumentCache(cache_dir).load(get_cache_key(data))
+    assert cached is not None
+    assert_same_document(cached, expected)
+    assert resolve_coreference(cached)[0] == resolve_coreference(doc)[0]
+
+
+def test_ignore_other_versions(example_naf_file, tmpdir):
+    cache = DocumentCache(str(tmpdir))
+    data = read_bytes(example_naf_file)
+    key = get_cache_key(data)
+    assert cache.load(key) is None
+
+    read_document(data, str(tmpdir))
+    with open(cache.get_path(key), 'r+b') as f:
+        f.write(b'X')
+    assert cache.load(key) is None
+
+    # A file with another header is replaced
+    read_document(data, str(tmpdir))
+    assert cache.load(key) is not None
+
+
+def test_ignore_corrupt_file(example_naf_file, tmpdir):
+    cache = DocumentCache(str(tmpdir))
+    data = read_bytes(example_naf_file)
+    key = get_cache_key(data)
+    read_document(data, str(tmpdir))
+    with open(cache.get_path(key), 'r+b') as f:
+        f.truncate(os.path.getsize(cache.get_path(key)) // 2)
+    assert cache.load(key) is None
+    assert_same_document(read_document(data, str(tmpdir)),
+                         read_document(data))
+
+
+def test_batch_with_cache(example_naf_file, tmpdir):
+    file_list = tmpdir.join('files.txt')
+    file_list.write(example_naf_file + '\n')
+    cache_dir = str(tmpdir.join('cache'))
+    outputs = []
+    for run in ('first', 'second'):
+        out_dir = str(tmpdir.join(run))
+        main(['--file-list', str(file_list), '-o', out_dir,
+              '--cache-dir', cache_dir])
+        output = read_bytes(
+            os.path.join(out_dir, os.path.basename(example_naf_file)))
+        # Leave out the header entry, which contains timestamps
+        outputs.append(output[output.index(b'</nafHeader>'):])
+    assert len(os.listdir(cache_dir)) == 1
+    assert outputs[0] == outputs[1]
+    assert b'<coref id="co1" type="entity">' in outputs[0]
@@ -0,0 +1,127 @@
+import os
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from multisieve_coreference import offset_info, resolve_coreference
+from multisieve_coreference.columns import DocumentColumns
+from multisieve_coreference.document_info import DocumentInformation
+from multisieve_coreference.mention_data import Cmention
+from multisieve_coreference.resolve_coreference import (
+    main,
+    process_coreference_bytes
+)
+
+
+@pytest.fixture
+def doc(sonar_naf_object3):
+    return DocumentInformation.from_naf(sonar_naf_object3, columns=True)
+
+
+def random_spans(doc, number=200, seed=0):
+    rng = random.Random(seed)
+    term_ids = list(doc.terms)
+    for _ in range(number):
+        size = rng.randint(1, min(500, len(term_ids)))
+        yield rng.sample(term_ids, size)
+
+
+def test_span_offsets(doc):
+    for span in random_spans(doc):
+        assert doc.columns.span_offsets(span) == \
+            sorted(doc.terms[tid].offset for tid in span)
+
+
+def test_span_bounds(doc):
+    assert doc.columns.span_bounds([]) == (0, 0)
+    for span in random_spans(doc):
+        terms = [doc.terms[tid] for tid in span]
+        assert doc.columns.span_bounds(span) == (
+            min(term.offset for term in terms),
+            max(term.offset + term.length for term in terms),
+        )
+
+
+def test_fill_gaps(doc):
+    assert doc.columns.tokens_sorted
+    all_offsets = [token.offset for token in doc.tokens.values()]
+    for span in random_spans(doc):
+        offsets = doc.columns.span_offsets(span)
+        if len(offsets) < 2:
+            continue
+        mention = Cmention('m', span=offsets)
+        mention.fill_gaps(all_offsets)
+        assert tuple(doc.columns.fill_gaps(offsets)) == mention.span
+
+
+def test_fill_gaps_unknown_offset(doc):
+    first = next(iter(doc.tokens.values())).offset
+    with pytest.raises(ValueError):
+        doc.columns.fill_gaps([first, -1])
+
+
+def test_columns_disabled(sonar_naf_object3):
+    assert DocumentInformation.from_naf(sonar_naf_object3, columns=False).columns \
+        is None
+
+
+def test_columns_off_by_default(sonar_naf_object3):
+    assert DocumentInformation.from_naf(sonar_naf_object3).columns is None
+
+
+def test_release_keeps_token_offsets(doc):
+    token_offset = doc.columns.token_offset
+    doc.release()
+    assert doc.columns.token_offset is token_offset
+    assert doc.columns.term_offset is None
+
+
+@pytest.fixture
+def vectorize_all_spans(monkeypatch):
+    '''
+    Use the columns for every span of at least two terms and count the spans
+    whose gaps they filled
+    '''
+    monkeypatch.setattr(offset_info, 'MIN_VECTORIZED_SPAN', 2)
+    monkeypatch.setattr(resolve_coreference, 'MIN_VECTORIZED_SPAN', 2)
+    calls = []
+    fill_gaps = DocumentColumns.fill_gaps
+
+    def counting_fill_gaps(self, offsets):
+        calls.append(offsets)
+        return fill_gaps(self, offsets)
+
+    monkeypatch.setattr(DocumentColumns, 'fill_gaps', counting_fill_gaps)
+    return calls
+
+
+def get_body(naf):
+    # The header contains the time the processing ended
+    return naf[naf.index(b'</nafHeader>'):]
+
+
+def test_output_with_columns(sonar_naf_file1, vectorize_all_spans):
+    with open(sonar_naf_file1, 'rb') as fd:
+        data = fd.read()
+    kwargs = dict(fill_gaps=True, include_singletons=True)
+    expected = process_coreference_bytes(data, **kwargs)
+    assert not vectorize_all_spans
+    output = process_coreference_bytes(data, columns=True, **kwargs)
+    assert vectorize_all_spans
+    assert get_body(output) == get_body(expected)
+
+
+def test_command_line_columns(sonar_naf_file2, vectorize_all_spans, tmpdir):
+    file_list = tmpdir.join('files.txt')
+    file_list.write(sonar_naf_file2 + '\n')
+    outputs = []
+    for options in ([], ['--columns']):
+        out_dir = tmpdir.join('out' + ''.join(options))
+        main(['--file-list', str(file_list), '-o', str(out_dir), '-f', '-s']
+             + options)
+        outputs.append(
+            out_dir.join(os.path.basename(sonar_naf_file2)).read_binary())
+    assert vectorize_all_spans
+    assert get_body(outputs[1]) == get_body(outputs[0])
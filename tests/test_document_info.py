@@ -0,0 +1,117 @@
+from multisieve_coreference.document_info import DocumentInformation
+
+
+def test_index_matches_naf(sonar_naf_object2):
+    nafobj = sonar_naf_object2
+    doc = DocumentInformation.from_naf(nafobj)
+
+    assert list(doc.tokens) == [t.get_id() for t in nafobj.get_tokens()]
+    for token in nafobj.get_tokens():
+        info = doc.tokens[token.get_id()]
+        assert info.offset == int(token.get_offset())
+        assert info.length == int(token.get_length())
+        assert info.text == token.get_text()
+        assert info.sentence == token.get_sent()
+
+    assert list(doc.terms) == [t.get_id() for t in nafobj.get_terms()]
+    for term in nafobj.get_terms():
+        info = doc.terms[term.get_id()]
+        tokens = [nafobj.get_token(wid) for wid in term.get_span_ids()]
+        assert info.offset == min(int(t.get_offset()) for t in tokens)
+        assert info.pos == term.get_pos()
+        assert info.lemma == term.get_lemma()
+        assert info.morphofeat == term.get_morphofeat()
+        assert info.type == term.get_type()
+        assert info.sentence == int(tokens[0].get_sent())
+        assert info.token_ids == tuple(term.get_span_ids())
+        assert doc.offset2lemma[info.offset] == term.get_lemma()
+
+
+def test_term_length(example_naf_object):
+    doc = DocumentInformation.from_naf(example_naf_object)
+    for term in doc.terms.values():
+        tokens = [doc.tokens[wid] for wid in term.token_ids]
+        assert term.length == \
+            tokens[-1].offset + tokens[-1].length - tokens[0].offset
+
+
+def test_indexes(sonar_naf_object1):
+    from multisieve_coreference.dump import get_offset_to_term_id_dict
+
+    nafobj = sonar_naf_object1
+    doc = DocumentInformation.from_naf(nafobj)
+
+    assert doc.offset2term == get_offset_to_term_id_dict(nafobj)
+    assert [doc.term_position[tid] for tid in doc.terms] == \
+        list(range(len(doc.terms)))
+    for offset, position in doc.token_position.items():
+        assert doc.token_offsets.index(offset) == position
+
+    sentences = {}
+    for token in nafobj.get_tokens():
+        sentences.setdefault(token.get_sent(), []).append(
+            doc.token2term[token.get_id()])
+    assert doc.sentence2terms == sentences
+    for term in nafobj.get_terms():
+        for wid in term.get_span_ids():
+            assert doc.token2term[wid] == term.get_id()
+
+
+def test_string_table(sonar_naf_object1, sonar_naf_object2):
+    from multisieve_coreference.document_info import StringTable
+
+    strings = StringTable()
+    doc1 = DocumentInformation.from_naf(sonar_naf_object1, strings=strings)
+    doc2 = DocumentInformation.from_naf(sonar_naf_object2, strings=strings)
+
+    assert len(strings) == len(set(strings.strings))
+    for doc in (doc1, doc2):
+        assert doc.strings is strings
+        for token in doc.tokens.values():
+            sid = doc.offset2string_id[token.offset]
+            assert strings[sid] == token.text
+            assert doc.offset2string[token.offset] is strings[sid]
+        for term in doc.terms.values():
+            assert strings[doc.offset2lemma_id[term.offset]] == term.lemma
+
+    # Equal strings have equal IDs, also between documents
+    words1 = {t.text: doc1.offset2string_id[t.offset]
+              for t in doc1.tokens.values()}
+    for token in doc2.tokens.values():
+        if token.text in words1:
+            assert doc2.offset2string_id[token.offset] == words1[token.text]
+
+    offsets = doc1.token_offsets[:5]
+    assert [strings[sid] for sid in doc1.get_ids_from_offsets(offsets)] == \
+        doc1.get_string_from_offsets(offsets).split()
+
+
+def test_mention_heads(sonar_naf_object3):
+    nafobj = sonar_naf_object3
+    doc = DocumentInformation.from_naf(nafobj)
+
+    assert doc.mention_heads == [
+        term.get_id() for term in nafobj.get_terms()
+        if term.get_pos() in ('noun', 'pron', 'name') or (
+            term.get_pos() == 'det' and 'VNW(bez' in term.get_morphofeat())
+    ]
+
+
+def test_quotation_scanner():
+    from multisieve_coreference.document_info import (
+        QuotationScanner,
+        TermInfo,
+    )
+
+    scanner = QuotationScanner()
+    lemmas = ['a', '"', 'b', "'", 'c', '"', 'd', "'", 'e', "'", 'f', '"']
+    for i, lemma in enumerate(lemmas):
+        scanner.add(TermInfo(
+            't' + str(i), i, 1, 'punct', lemma, '', 'open', 1, ()))
+
+    # The single quotation starting at t3 is broken off by t5; the one at t7
+    # is closed by t9, the double quotation at t11 is never closed
+    assert scanner.quotations == [
+        ('t1', 't5', ('t2', 't3', 't4')),
+        ('t7', 't9', ('t8',)),
+    ]
@@ -0,0 +1,74 @@
+import random
+
+from multisieve_coreference.interval_index import (
+    IntervalIndex,
+    get_span_interval,
+)
+
+
+def test_queries():
+    items = [('a', (5, 9)), ('b', (0, 20)), ('c', (6, 7)), ('d', (12, 15)),
+             ('e', (5, 9)), ('f', None)]
+    index = IntervalIndex(items, lambda item: item[1])
+    assert len(index) == 5
+
+    def names(found):
+        return [name for name, _ in found]
+
+    assert names(index.containing(6, 7)) == ['a', 'b', 'c', 'e']
+    assert names(index.containing(8, 13)) == ['b']
+    assert names(index.contained_in(5, 9)) == ['a', 'c', 'e']
+    assert names(index.contained_in(21, 30)) == []
+    assert names(index.overlapping(9, 12)) == ['a', 'b', 'd', 'e']
+    assert names(index.overlapping(16, 19)) == ['b']
+
+
+def test_queries_match_brute_force():
+    rng = random.Random(3)
+    intervals = []
+    for _ in range(200):
+        begin = rng.randint(0, 500)
+        intervals.append((begin, begin + rng.randint(0, 30)))
+    index = IntervalIndex(intervals, lambda interval: interval)
+
+    for _ in range(200):
+        begin = rng.randint(-10, 520)
+        end = begin + rng.randint(0, 40)
+        assert index.containing(begin, end) == [
+            i for i in intervals if i[0] <= begin and i[1] >= end]
+        assert index.contained_in(begin, end) == [
+            i for i in intervals if i[0] >= begin and i[1] <= end]
+        assert index.overlapping(begin, end) == [
+            i for i in intervals if i[0] <= end and i[1] >= begin]
+
+
+class CountingList(list):
+    reads = 0
+
+    def __getitem__(self, i):
+        CountingList.reads += 1
+        return list.__getitem__(self, i)
+
+
+def test_long_interval_doesnt_slow_down_queries():
+    intervals = [(10 * i, 10 * i + 5) for i in range(1000)]
+    intervals.append((0, 10000))
+    index = IntervalIndex(intervals, lambda interval: interval)
+    index.begins = CountingList(index.begins)
+    index.ends = CountingList(index.ends)
+
+    for query, begin, end, expected in [
+        (index.containing, 5001, 5004, [(5000, 5005), (0, 10000)]),
+        (index.contained_in, 4999, 5006, [(5000, 5005)]),
+        (index.overlapping, 5001, 5004, [(5000, 5005), (0, 10000)]),
+    ]:
+        CountingList.reads = 0
+        assert query(begin, end) == expected
+        # The tree has about 10 levels, so only a few dozen items are read
+        assert CountingList.reads < 100
+
+
+def test_get_span_interval():
+    assert get_span_interval((12, 3, 40)) == (3, 40)
+    assert get_span_interval([7]) == (7, 7)
+    assert get_span_interval(()) is None
@@ -0,0 +1,47 @@
+import io
+import json
+
+from run_and_compare import compare_output
+
+from multisieve_coreference.jsonl_worker import handle_request, run
+
+
+def test_run(example_naf_file, example_naf_output, temp_file):
+    with io.open(example_naf_file, encoding='utf-8') as fd:
+        naf = fd.read()
+    requests = [
+        json.dumps({'id': 'example', 'naf': naf}),
+        '',
+        json.dumps({'id': 2, 'naf': '<NAF>'}),
+        json.dumps({'naf': naf}),
+    ]
+    infile = io.StringIO(u'\n'.join(requests) + u'\n')
+    outfile = io.StringIO()
+    run(infile, outfile)
+
+    responses = [json.loads(line)
+                 for line in outfile.getvalue().splitlines()]
+    assert [r['id'] for r in responses] == ['example', None, 2, None]
+    assert responses[1]['error'] == "Invalid request: empty line"
+    assert 'error' in responses[2]
+
+    with io.open(temp_file, 'w', encoding='utf-8') as out:
+        out.write(responses[0]['naf'])
+    compare_output(temp_file, example_naf_output)
+    assert responses[3]['naf'] == responses[0]['naf']
+
+
+def test_invalid_requests():
+    assert 'error' in handle_request('not json')
+    assert 'error' in handle_request('[1, 2]')
+    assert 'error' in handle_request(' \n')
+    response = handle_request('{"id": "x"}')
+    assert response['id'] == 'x'
+    assert 'error' in response
+
+
+def test_profile(example_naf_file):
+    with io.open(example_naf_file, encoding='utf-8') as fd:
+        line = json.dumps({'naf': fd.read()})
+    response = handle_request(line, profile=True)
+    assert response['profile']['stages']
@@ -1,4 +1,8 @@
+import io
+import threading
+
 import pytest
+from KafNafParserPy import KafNafParser
 from run_and_compare import run_and_compare
 
 from multisieve_coreference.resolve_coreference import process_coreference
@@ -58,3 +62,37 @@ def test_main_sonar3_with_fill(sonar_naf_object3, caplog):
     caplog.set_level('DEBUG', 'multisieve_coreference.dump')
     process_coreference(sonar_naf_object3, fill_gaps=True)
     assert sonar_naf_object3.coreference_layer is not None
+
+
+def resolve_to_bytes(filename):
+    nafobj = KafNafParser(filename)
+    process_coreference(nafobj)
+    out = io.BytesIO()
+    nafobj.dump(out)
+    return out.getvalue()
+
+
+def test_resolve_in_threads(example_naf_file, sonar_naf_file2):
+    filenames = [example_naf_file, sonar_naf_file2] * 3
+    expected = [resolve_to_bytes(filename) for filename in filenames]
+
+    results = [None] * len(filenames)
+    errors = []
+
+    def resolve(index):
+        try:
+            results[index] = resolve_to_bytes(filenames[index])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=resolve, args=(index,))
+        for index in range(len(filenames))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert results == expected
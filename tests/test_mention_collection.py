@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+from multisieve_coreference.mention_collection import MentionCollection
+from multisieve_coreference.mention_data import Cmention
+
+
+def make_collection():
+    mentions = OrderedDict()
+    for mid, span, head, pos, etype, sentence in [
+        ('m0', [1, 2], 2, 'noun', 'PER', 1),
+        ('m1', [4], 4, 'pron', None, 1),
+        ('m2', [2, 1], 1, 'name', 'LOC', 2),
+        ('m3', [8, 9], 9, 'noun', 'PER', 3),
+        ('m4', [6], 6, 'pron', None, 2),
+    ]:
+        mentions[mid] = Cmention(mid, span=span, head_offset=head,
+                                 head_pos=pos, entity_type=etype,
+                                 sentence_number=sentence)
+    return MentionCollection(mentions)
+
+
+def ids(mentions):
+    return [mention.id for mention in mentions]
+
+
+def test_dictionary_interface():
+    mentions = make_collection()
+    assert list(mentions) == ['m0', 'm1', 'm2', 'm3', 'm4']
+    assert len(mentions) == 5
+    assert 'm2' in mentions and 'm5' not in mentions
+    assert mentions['m2'] is mentions.get('m2')
+    assert mentions.get('m5') is None
+    assert [mid for mid, _ in mentions.items()] == list(mentions.keys())
+    assert ids(mentions.values()) == list(mentions)
+
+
+def test_lookups():
+    mentions = make_collection()
+    assert ids(mentions.in_sentences(2)) == ['m2', 'm4']
+    assert ids(mentions.in_sentences(3, 1)) == ['m0', 'm1', 'm3']
+    assert ids(mentions.with_head_offset(9)) == ['m3']
+    assert ids(mentions.with_head_pos('pron')) == ['m1', 'm4']
+    assert ids(mentions.with_entity_type('LOC', 'PER')) == ['m0', 'm2', 'm3']
+    assert ids(mentions.with_entity_type(None)) == ['m1', 'm4']
+    assert ids(mentions.with_span((1, 2))) == ['m0', 'm2']
+    assert mentions.with_span([5]) == []
+
+
+def test_indexes_follow_changes():
+    mentions = make_collection()
+    assert ids(mentions.with_head_pos('noun')) == ['m0', 'm3']
+    del mentions['m0']
+    assert ids(mentions.with_head_pos('noun')) == ['m3']
+    mentions['m5'] = Cmention('m5', span=[12], head_offset=12,
+                              head_pos='noun')
+    assert ids(mentions.with_head_pos('noun')) == ['m3', 'm5']
+
+    mentions['m3'].head_pos = 'name'
+    mentions.reindex()
+    assert ids(mentions.with_head_pos('noun')) == ['m5']
+
+
+def test_span_containment():
+    mentions = make_collection()
+    mentions['m5'] = Cmention('m5', span=[1, 3], head_offset=3)
+    assert ids(mentions.containing([1])) == ['m0', 'm2', 'm5']
+    assert ids(mentions.containing([1, 2])) == ['m0', 'm2']
+    assert ids(mentions.containing([2, 3])) == []
+    assert ids(mentions.contained_in([1, 2, 3, 4])) == \
+        ['m0', 'm1', 'm2', 'm5']
+    assert ids(mentions.contained_in([3, 4])) == ['m1']
+
+
+def test_lookup_all():
+    mentions = make_collection()
+
+    def get_keys(mention):
+        return [mention.head_pos] + list(mention.span)
+
+    assert ids(mentions.lookup_all('keys', get_keys, ['noun'])) == \
+        ['m0', 'm3']
+    assert ids(mentions.lookup_all('keys', get_keys, [2, 1])) == \
+        ['m0', 'm2']
+    assert ids(mentions.lookup_all('keys', get_keys, ['noun', 1])) == ['m0']
+    assert mentions.lookup_all('keys', get_keys, ['pron', 1]) == []
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+
+from multisieve_coreference.document_info import DocumentInformation
+from multisieve_coreference.mention_data import Cmention
+from multisieve_coreference import naf_info
+
+
+def merge_all_pairs(mentions):
+    '''
+    `naf_info.merge_mentions` as it was before it used indexes
+    '''
+    final_mentions = {}
+    for m, val in mentions.items():
+        found = False
+        for prevm, preval in final_mentions.items():
+            if val.head_offset == preval.head_offset or \
+                    set(val.span) == set(preval.span):
+                final_mentions[prevm] = naf_info.merge_two_mentions(
+                    val, preval)
+                found = True
+        if not found:
+            final_mentions[m] = val
+    return final_mentions
+
+
+def make_mentions():
+    mentions = OrderedDict()
+    for mid, span, head, etype in [
+        ('m0', [1, 2, 3], 3, None),
+        ('m1', [5], 5, None),
+        # Same span as m0, other head: moves the head of m0 to 2
+        ('m2', [3, 2, 1], 2, None),
+        # Same head as m0 now, other span: m0 gets this span
+        ('m3', [2], 2, None),
+        # Matches m0 by span and m1 by head
+        ('m4', [2], 5, 'PER'),
+        ('m5', [7, 8], 8, 'LOC'),
+        ('m6', [8], 8, None),
+    ]:
+        mentions[mid] = Cmention(mid, span=span, head_offset=head,
+                                 entity_type=etype)
+    return mentions
+
+
+def test_merge_mentions():
+    expected = merge_all_pairs(make_mentions())
+    result = naf_info.merge_mentions(make_mentions())
+    assert list(result) == list(expected) == ['m0', 'm1', 'm5']
+    assert repr(result) == repr(expected)
+
+
+def test_merge_mentions_document(sonar_naf_object1, monkeypatch):
+    doc = DocumentInformation.from_naf(sonar_naf_object1)
+    result = naf_info.get_mentions(doc)
+    monkeypatch.setattr(naf_info, 'merge_mentions',
+                        lambda mentions, profiler: merge_all_pairs(mentions))
+    expected = naf_info.get_mentions(doc)
+    assert repr(list(result.items())) == repr(list(expected.items()))
+
+
+def test_mention_spans_are_tuples(sonar_naf_object2):
+    doc = DocumentInformation.from_naf(sonar_naf_object2)
+    mentions = naf_info.get_mentions(doc)
+    assert mentions
+    for mention in mentions.values():
+        assert not hasattr(mention, '__dict__')
+        for offsets in (mention.span, mention.relaxed_span, mention.full_head,
+                        mention.no_stop_words, mention.main_modifiers):
+            assert isinstance(offsets, tuple)
+        for spans in (mention.modifiers, mention.appositives,
+                      mention.predicatives):
+            assert isinstance(spans, tuple)
+            assert all(isinstance(span, tuple) for span in spans)
+
+
+def test_link_span_ids_to_mentions(sonar_naf_object1):
+    doc = DocumentInformation.from_naf(sonar_naf_object1)
+    mentions = naf_info.get_mentions(doc)
+    offsets = sorted(doc.offset2term)
+    for length in (1, 2, 3):
+        for start in range(0, len(offsets) - length + 1, 5):
+            span = offsets[start:start + length]
+            span_set = set(span)
+            # The first mention with the same span, otherwise the first
+            # mention whose span contains or is contained in it
+            same = [mid for mid, mention in mentions.items()
+                    if span_set == set(mention.span)]
+            related = [mid for mid, mention in mentions.items()
+                       if span_set.issubset(mention.span) or
+                       span_set.issuperset(mention.span)]
+            expected = (same + related + [None])[0]
+            assert naf_info.link_span_ids_to_mentions(
+                span, mentions) == expected
+
+
+def test_mention_strings(sonar_naf_object1):
+    doc = DocumentInformation.from_naf(sonar_naf_object1)
+    mentions = naf_info.get_mentions(doc)
+    assert any(mention.span_digits for mention in mentions.values())
+    for mention in mentions.values():
+        span_string = ' '.join(doc.offset2string[o] for o in mention.span)
+        assert mention.span_string == span_string
+        assert mention.span_ids == doc.get_ids_from_offsets(mention.span)
+        assert mention.relaxed_span_ids == \
+            doc.get_ids_from_offsets(mention.relaxed_span)
+        assert mention.head_string_id == \
+            doc.offset2string_id[mention.head_offset]
+        assert mention.full_head_string == \
+            doc.get_string_from_offsets(mention.full_head)
+        assert mention.no_stop_words_string == \
+            doc.get_string_from_offsets(mention.no_stop_words)
+        assert mention.main_modifiers_string == \
+            doc.get_string_from_offsets(mention.main_modifiers)
+        assert mention.span_digits == set(
+            c for c in span_string if c.isdigit())
@@ -0,0 +1,45 @@
+import io
+
+from KafNafParserPy import KafNafParser
+
+from multisieve_coreference.document_info import DocumentInformation
+from multisieve_coreference.naf_reader import BufferReader, read_naf
+from multisieve_coreference.resolve_coreference import resolve_coreference
+
+
+def assert_same_information(streamed, nafobj):
+    expected = DocumentInformation.from_naf(nafobj)
+    assert streamed.nafobj is None
+    assert streamed.tokens == expected.tokens
+    assert streamed.terms == expected.terms
+    assert streamed.entities == expected.entities
+    assert streamed.tree == expected.tree
+
+
+def test_read_example(example_naf_file, example_naf_object):
+    assert_same_information(read_naf(example_naf_file), example_naf_object)
+
+
+def test_read_sonar(sonar_naf_file1, sonar_naf_object1):
+    with open(sonar_naf_file1, 'rb') as f:
+        streamed = read_naf(io.BytesIO(f.read()))
+    assert_same_information(streamed, sonar_naf_object1)
+
+
+def test_resolve_streamed(sonar_naf_file2):
+    coref_classes, mentions = resolve_coreference(read_naf(sonar_naf_file2))
+    expected_classes, expected_mentions = resolve_coreference(
+        KafNafParser(sonar_naf_file2))
+    assert coref_classes == expected_classes
+    assert {mid: m.span for mid, m in mentions.items()} == \
+        {mid: m.span for mid, m in expected_mentions.items()}
+
+
+def test_read_buffer(example_naf_file, example_naf_object):
+    with open(example_naf_file, 'rb') as f:
+        reader = BufferReader(f.read())
+    assert reader.read(5) == b'<?xml'
+    reader.position = 0
+    assert_same_information(read_naf(reader), example_naf_object)
+    assert reader.read() == b''
+    reader.close()
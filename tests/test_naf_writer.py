@@ -0,0 +1,137 @@
+import io
+import subprocess
+import sys
+
+from KafNafParserPy import KafNafParser
+
+from multisieve_coreference.dump import add_coreference_to_naf
+from multisieve_coreference.naf_reader import read_naf
+from multisieve_coreference.naf_writer import add_coreferences, write_naf
+from multisieve_coreference.resolve_coreference import (
+    add_naf_header,
+    process_coreference,
+    process_coreference_bytes,
+    process_coreference_file,
+    resolve_coreference,
+)
+
+
+def get_corefs(nafobj):
+    return [
+        (coref.get_id(), coref.get_type(), [
+            [(target.get_id(), target.get_head()) for target in span]
+            for span in coref.get_spans()
+        ])
+        for coref in nafobj.get_corefs()
+    ]
+
+
+def get_processors(nafobj):
+    return [
+        (layer.get_layer(), [
+            lp.get_name() for lp in layer.get_linguistic_processors()
+        ])
+        for layer in nafobj.get_linguisticProcessors()
+    ]
+
+
+def read_bytes(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def check_same_as_naf_object(data):
+    doc = read_naf(io.BytesIO(data))
+    coref_classes, mentions = resolve_coreference(doc)
+    output = add_coreferences(data, doc, coref_classes, mentions, 'begin')
+
+    expected = KafNafParser(io.BytesIO(data))
+    coref_classes, mentions = resolve_coreference(expected)
+    add_coreference_to_naf(expected, coref_classes, mentions)
+    add_naf_header(expected, 'begin')
+
+    result = KafNafParser(io.BytesIO(output))
+    assert get_corefs(result) == get_corefs(expected)
+    assert get_processors(result) == get_processors(expected)
+    return output
+
+
+def test_only_inserts(example_naf_file):
+    data = read_bytes(example_naf_file)
+    output = check_same_as_naf_object(data)
+    header_end = data.index(b'  </nafHeader>')
+    root_end = data.rindex(b'</NAF>')
+    inserted_header = output[header_end:output.index(b'  </nafHeader>')]
+    assert inserted_header.strip().startswith(
+        b'<linguisticProcessors layer="coreferences">')
+    assert output.startswith(data[:header_end])
+    rest = output[header_end + len(inserted_header):]
+    assert rest.startswith(data[header_end:root_end])
+    assert rest.endswith(data[root_end:])
+
+
+def test_existing_layer(example_naf_output):
+    data = read_bytes(example_naf_output)
+    output = check_same_as_naf_object(data)
+    assert b'<coref id="co2" type="entity">' in output
+
+
+def test_empty_layer_without_header(example_naf_file):
+    data = read_bytes(example_naf_file)
+    header_start = data.index(b'<nafHeader>')
+    header_end = data.index(b'</nafHeader>') + len(b'</nafHeader>')
+    data = data[:header_start] + b'<!-- </nafHeader> -->' + \
+        data[header_end:].replace(b'</NAF>', b'<coreferences/>\n</NAF>')
+    check_same_as_naf_object(data)
+
+
+def test_write_naf(sonar_naf_file1):
+    data = read_bytes(sonar_naf_file1)
+    doc = read_naf(io.BytesIO(data))
+    coref_classes, mentions = resolve_coreference(doc)
+    out = io.BytesIO()
+    write_naf(out, data, doc, coref_classes, mentions, 'begin', 'end')
+    assert out.getvalue() == add_coreferences(
+        data, doc, coref_classes, mentions, 'begin', 'end')
+
+
+def test_process_coreference_bytes(sonar_naf_file2):
+    data = read_bytes(sonar_naf_file2)
+    expected = KafNafParser(sonar_naf_file2)
+    process_coreference(expected, fill_gaps=True)
+    result = KafNafParser(io.BytesIO(
+        process_coreference_bytes(data, fill_gaps=True)))
+    assert get_corefs(result) == get_corefs(expected)
+
+
+def test_process_coreference_file(example_naf_file, temp_file):
+    with open(temp_file, 'wb') as out:
+        process_coreference_file(example_naf_file, out, begintime='begin')
+    expected = process_coreference_bytes(
+        read_bytes(example_naf_file), begintime='begin')
+    output = read_bytes(temp_file)
+    # Leave out the header entry, which contains the end time
+    assert output[output.index(b'</nafHeader>'):] == \
+        expected[expected.index(b'</nafHeader>'):]
+
+
+def test_main_with_input_file(example_naf_file):
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'multisieve_coreference', example_naf_file])
+    expected = process_coreference_bytes(read_bytes(example_naf_file))
+    assert output[output.index(b'</nafHeader>'):] == \
+        expected[expected.index(b'</nafHeader>'):]
+
+
+def test_release_memory(sonar_naf_file2):
+    data = read_bytes(sonar_naf_file2)
+    expected = process_coreference_bytes(
+        data, fill_gaps=True, begintime='begin')
+    doc = read_naf(io.BytesIO(data))
+    coref_classes, mentions = resolve_coreference(
+        doc, fill_gaps=True, release_memory=True)
+    assert doc.terms is None and doc.tree is None
+    output = add_coreferences(
+        data, doc, coref_classes, mentions, 'begin')
+    assert output[output.index(b'</nafHeader>'):] == \
+        expected[expected.index(b'</nafHeader>'):]
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from multisieve_coreference.coref_info import CoreferenceInformation
+from multisieve_coreference.profiling import (
+    Profiler,
+    NULL_PROFILER,
+    COUNTERS,
+    get_peak_memory,
+    reset_peak_memory,
+    write_profiles
+)
+from multisieve_coreference.resolve_coreference import process_coreference
+
+
+def test_stage_counters():
+    profiler = Profiler()
+    coref_info = CoreferenceInformation()
+    profiler.count('mentions')  # outside of a stage: ignored
+    with profiler.stage('a'):
+        profiler.count('mentions', 3)
+        with profiler.stage('b'):
+            profiler.count('comparisons', 2)
+        profiler.count('mentions')
+    profiler.track_merges(coref_info)
+    with profiler.stage('b'):
+        coref_info.add_coref_class(['m1'])
+        coref_info.merge()
+
+    profile = profiler.as_dict(document='doc')
+    assert profile['document'] == 'doc'
+    a, b = profile['stages']
+    assert (a['stage'], a['mentions'], a['comparisons']) == ('a', 4, 0)
+    assert (b['stage'], b['comparisons'], b['merges']) == ('b', 2, 2)
+    assert a['wall'] >= 0 and a['cpu'] >= 0
+    assert profile['total']['wall'] == a['wall'] + b['wall']
+
+
+def test_null_profiler():
+    with NULL_PROFILER.stage('a'):
+        NULL_PROFILER.count('mentions')
+    assert NULL_PROFILER.as_dict()['stages'] == []
+    assert 'peak_memory' not in NULL_PROFILER.as_dict()
+
+
+def test_peak_memory():
+    # Otherwise the earlier tests may have used more than is allocated here
+    if not reset_peak_memory() or get_peak_memory() is None:
+        pytest.skip("Peak memory use can't be measured on this platform")
+    profiler = Profiler()
+    start = get_peak_memory()
+    data = b'x' * (50 * 1024 * 1024)
+    profile = profiler.as_dict()
+    del data
+    assert profile['peak_memory'] >= start + 40 * 1024
+    assert profile['peak_memory_at_start'] <= start
+    assert 'peak_memory' not in Profiler(memory=False).as_dict()
+
+
+def test_profilers_dont_reset_peak_memory():
+    first = Profiler()
+    if first.start_peak_memory is None:
+        pytest.skip("Peak memory use is not known on this platform")
+    data = b'x' * (50 * 1024 * 1024)
+    del data
+    peak = get_peak_memory()
+    # Another document starting in the same process
+    Profiler()
+    assert first.as_dict()['peak_memory'] >= peak
+
+
+def test_profile_document(example_naf_object):
+    profiler = Profiler()
+    process_coreference(example_naf_object, profiler=profiler)
+    stages = profiler.as_dict()['stages']
+    names = [stage['stage'] for stage in stages]
+    assert names[:3] == [
+        'initialisation', 'get_mentions', 'identify_direct_quotations']
+    assert names[-3:] == ['merge coreference classes', 'post_process',
+                          'add_coreference_to_naf']
+    assert sum(1 for name in names if name.startswith('sieve')) == 9
+    for stage in stages:
+        assert set(COUNTERS) < set(stage)
+    assert stages[1]['mentions'] > 0
+    assert sum(stage['merges'] for stage in stages) > 0
+
+
+def test_write_profiles(tmpdir):
+    path = str(tmpdir.join('profile.jsonl'))
+    write_profiles(path, [{'a': 1}])
+    write_profiles(path, [{'b': 2}, {'c': 3}])
+    with open(path) as fd:
+        assert [json.loads(line) for line in fd] == [
+            {'a': 1}, {'b': 2}, {'c': 3}]
@@ -0,0 +1,154 @@
+import os
+import json
+import socket
+import threading
+
+import pytest
+from run_and_compare import compare_output
+
+from multisieve_coreference.server import (
+    make_server,
+    get_percentile,
+    LatencyStatistics
+)
+
+try:
+    from urllib.request import urlopen
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import urlopen, HTTPError
+
+
+@pytest.fixture
+def server():
+    server = make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url(server):
+    return 'http://{}:{}'.format(*server.server_address)
+
+
+def test_health(url):
+    health = json.loads(urlopen(url + '/health').read().decode('utf-8'))
+    assert health['status'] == 'ok'
+    assert health['documents'] == 0
+
+
+def test_post_document(url, example_naf_file, example_naf_output, temp_file):
+    with open(example_naf_file, 'rb') as fd:
+        response = urlopen(url + '/', fd.read())
+    assert response.headers['Content-Type'] == 'application/xml'
+    with open(temp_file, 'wb') as out:
+        out.write(response.read())
+    compare_output(temp_file, example_naf_output)
+
+    stats = json.loads(urlopen(url + '/stats').read().decode('utf-8'))
+    assert stats['count'] == 1
+    assert stats['errors'] == 0
+    assert 0 < stats['p50'] <= stats['max']
+
+
+def test_post_broken_document(url):
+    with pytest.raises(HTTPError) as excinfo:
+        urlopen(url + '/', b'<NAF>')
+    assert excinfo.value.code == 400
+
+    stats = json.loads(urlopen(url + '/stats').read().decode('utf-8'))
+    assert stats['errors'] == 1
+
+
+def test_not_found(url):
+    with pytest.raises(HTTPError) as excinfo:
+        urlopen(url + '/nothing')
+    assert excinfo.value.code == 404
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'),
+                    reason="Unix domain sockets not supported")
+def test_unix_socket(tmpdir):
+    path = str(tmpdir.join('coref.sock'))
+    server = make_server(unix_socket=path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(path)
+        client.sendall(b'GET /health HTTP/1.0\r\n\r\n')
+        response = b''
+        while True:
+            data = client.recv(4096)
+            if not data:
+                break
+            response += data
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        os.remove(path)
+    header, body = response.split(b'\r\n\r\n', 1)
+    assert header.startswith(b'HTTP/1.1 200')
+    assert json.loads(body.decode('utf-8'))['status'] == 'ok'
+
+
+def test_latency_statistics():
+    stats = LatencyStatistics(window=3)
+    for seconds in [4.0, 1.0, 2.0, 3.0]:
+        stats.record(seconds)
+    stats.record(5.0, succeeded=False)
+    summary = stats.as_dict()
+    assert summary['count'] == 5
+    assert summary['errors'] == 1
+    assert summary['window'] == 3
+    assert summary['min'] == 2.0
+    assert summary['max'] == 5.0
+    assert summary['p50'] == 3.0
+
+
+def test_get_percentile():
+    assert get_percentile([1], 95) == 1
+    assert get_percentile(list(range(101)), 95) == 95
+
+
+def request(server, raw):
+    '''
+    Send a raw HTTP/1.1 request on a new connection and read the status line
+    '''
+    client = socket.create_connection(server.server_address, timeout=10)
+    try:
+        client.sendall(raw)
+        return client.recv(4096).split(b'\r\n', 1)[0]
+    finally:
+        client.close()
+
+
+def test_keep_alive_connection_doesnt_block(server, url):
+    client = socket.create_connection(server.server_address, timeout=10)
+    try:
+        client.sendall(b'GET /health HTTP/1.1\r\nHost: test\r\n\r\n')
+        assert client.recv(4096).startswith(b'HTTP/1.1 200')
+        # The first connection stays open while another client asks
+        health = urlopen(url + '/health', timeout=10).read()
+        assert json.loads(health.decode('utf-8'))['status'] == 'ok'
+    finally:
+        client.close()
+
+
+def test_post_content_length(server):
+    assert request(server, b'POST / HTTP/1.1\r\nHost: test\r\n\r\n') == \
+        b'HTTP/1.1 411 Length Required'
+    assert request(
+        server,
+        b'POST / HTTP/1.1\r\nHost: test\r\nContent-Length: many\r\n\r\n'
+    ) == b'HTTP/1.1 400 Bad Request'
+    assert request(
+        server,
+        b'POST / HTTP/1.1\r\nHost: test\r\nContent-Length: -1\r\n\r\n'
+    ) == b'HTTP/1.1 400 Bad Request'
@@ -0,0 +1,58 @@
+import sys
+import json
+import subprocess
+
+# Modules that are slow to import and must not be needed to start the CLI
+HEAVY_MODULES = ['pkg_resources', 'KafNafParserPy', 'lxml', 'numpy']
+
+# Generous upper bound (in seconds) on importing the resolver in a fresh
+# interpreter, excluding the interpreter's own start-up. It takes a few tens
+# of milliseconds; importing `pkg_resources` alone used to take more than this.
+IMPORT_TIME_BUDGET = 0.1
+
+
+def run_python(code):
+    output = subprocess.check_output([sys.executable, '-c', code])
+    # The last line is the result, anything before it is e.g. --help output
+    return json.loads(output.decode('utf-8').splitlines()[-1])
+
+
+def get_heavy_modules_after(statement):
+    return run_python(
+        'import sys, json\n' +
+        statement + '\n' +
+        'print(json.dumps([m for m in {!r} if m in sys.modules]))'.format(
+            HEAVY_MODULES)
+    )
+
+
+def test_import_package_is_light():
+    assert get_heavy_modules_after('import multisieve_coreference') == []
+
+
+def test_help_is_light():
+    assert get_heavy_modules_after(
+        'from multisieve_coreference.resolve_coreference import main\n'
+        'try:\n'
+        '    main(["--help"])\n'
+        'except SystemExit:\n'
+        '    pass'
+    ) == []
+
+
+def test_import_time():
+    # Best of a few runs, to be robust against a busy machine
+    code = (
+        'import json, time\n'
+        'start = time.time()\n'
+        'import multisieve_coreference.resolve_coreference\n'
+        'print(json.dumps(time.time() - start))'
+    )
+    seconds = min(run_python(code) for _ in range(3))
+    assert seconds < IMPORT_TIME_BUDGET
+
+
+def test_lazy_process_coreference(example_naf_object):
+    from multisieve_coreference import process_coreference
+    process_coreference(example_naf_object)
+    assert example_naf_object.coreference_layer is not None